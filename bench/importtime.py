@@ -0,0 +1,82 @@
+# Import-cost regression check for the planning modules.
+#
+# Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+# fails if any GUI / imaging / array module gets pulled in, or if the
+# cumulative import time goes over budget (best of --repeat runs).
+#
+# Usage:
+#   python bench/importtime.py
+#   python bench/importtime.py gym_planner --budget-ms 20 --json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ("gym_planner", "gym_planner_app", "gym_render", "gym_batch")
+FORBIDDEN = ("tkinter", "_tkinter", "PIL", "numpy")
+
+
+def measure_import(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    imported = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        imported[name.strip()] = int(cumulative)
+    return imported
+
+
+def check_module(module, budget_us, repeat):
+    best = None
+    for _ in range(repeat):
+        imported = measure_import(module)
+        if best is None or imported[module] < best[module]:
+            best = imported
+
+    forbidden = sorted({name.split(".")[0] for name in best} & set(FORBIDDEN))
+    return {
+        "module": module,
+        "cumulative_us": best[module],
+        "budget_us": budget_us,
+        "modules_imported": len(best),
+        "forbidden": forbidden,
+        "ok": not forbidden and best[module] <= budget_us,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Guard the import cost of the planning modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [check_module(m, int(args.budget_ms * 1000), args.repeat) for m in args.modules]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["ok"] else "FAIL"
+            print(f"{status:4}  {r['module']:<18} {r['cumulative_us'] / 1000:7.2f} ms "
+                  f"(budget {r['budget_us'] / 1000:.0f} ms, {r['modules_imported']} modules)")
+            if r["forbidden"]:
+                print(f"      forbidden imports: {', '.join(r['forbidden'])}")
+
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
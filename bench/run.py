@@ -0,0 +1,252 @@
+# Benchmarks for the planning and rendering hot paths.
+#
+# Every case is run over batches of synthetic members (by default 1, 10k and
+# 1M calls) and reports throughput, per-call latency percentiles and peak
+# traced memory. Results are printed as JSON so runs can be compared across
+# commits:
+#
+#   python bench/run.py -o before.json
+#   python bench/run.py --compare before.json --threshold 10
+#   python bench/run.py --sizes 1,10000 --cases format_plan:text
+#   python bench/run.py --instrument --compare before.json   # instrumentation cost
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gym_planner import (  # noqa: E402
+    ACTIVITY_LEVELS,
+    DIET_PREFS,
+    EXPERIENCE_LEVELS,
+    GOALS,
+    calculate_bmi,
+    get_bmi_status,
+    get_diet_plan,
+    get_general_tips,
+    get_workout_plan,
+)
+from gym_nutrition import plan_meals  # noqa: E402
+from gym_periodize import build_program  # noqa: E402
+from gym_render import RENDERERS, format_plan  # noqa: E402
+from gym_validate import MEMBER_FIELDS, normalise_member  # noqa: E402
+
+
+DEFAULT_SIZES = (1, 10_000, 1_000_000)
+POOL_SIZE = 10_000      # distinct synthetic members; larger batches cycle through them
+BLOCK_CALLS = 100       # calls per latency sample
+MIN_CALLS = 10_000      # small batches are repeated until at least this many calls
+MEMORY_SAMPLE = 10_000  # tracemalloc pass is limited to this many calls
+
+
+# ---------- SYNTHETIC MEMBERS ----------
+
+def make_members(count, seed=1234):
+    rng = random.Random(seed)
+    members = []
+    for i in range(count):
+        members.append((
+            rng.randint(16, 70),
+            rng.choice(("Male", "Female", "Other")),
+            round(rng.uniform(145, 200), 1),
+            round(rng.uniform(45, 130), 1),
+            rng.choice(GOALS),
+            rng.choice(ACTIVITY_LEVELS),
+            rng.choice(EXPERIENCE_LEVELS),
+            rng.choice(DIET_PREFS),
+            f"Member {i}",
+            rng.choice(("", "", "", "knee pain", "lower back")),
+        ))
+    return members
+
+
+# ---------- CASES ----------
+# Each case takes one member tuple:
+# (age, gender, height, weight, goal, activity, experience, diet_pref, name, notes)
+
+def _format(fmt, locale=None):
+    def case(m):
+        return format_plan(*m[:8], name=m[8], notes=m[9], fmt=fmt, locale=locale)
+    return case
+
+
+CASES = {
+    "calculate_bmi": lambda m: calculate_bmi(m[2], m[3]),
+    "get_bmi_status": lambda m: get_bmi_status(calculate_bmi(m[2], m[3])),
+    "get_workout_plan": lambda m: get_workout_plan(m[4], m[6], m[5]),
+    "get_diet_plan": lambda m: get_diet_plan(m[4], m[7], m[3]),
+    "get_general_tips": lambda m: get_general_tips(m[4]),
+    "build_program": lambda m: build_program(m[4], m[6], m[5], 12, 3 + m[0] % 3),
+    "plan_meals": lambda m: plan_meals(m[0], m[1], m[2], m[3], m[4], m[5], m[7]),
+    "normalise_member": lambda m: normalise_member(dict(zip(MEMBER_FIELDS, map(str, m)))),
+}
+for _fmt in RENDERERS:
+    CASES[f"format_plan:{_fmt}"] = _format(_fmt)
+# localised rendering must stay within a few percent of the English path
+CASES["format_plan:text@de"] = _format("text", "de")
+CASES["format_plan:text@en-US"] = _format("text", "en-US")
+
+
+# ---------- MEASUREMENT ----------
+
+def _timer_overhead_ns():
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(1000):
+        start = clock()
+        samples.append(clock() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+def _run_calls(fn, pool, calls, block):
+    clock = time.perf_counter_ns
+    samples = []
+    done = 0
+    pool_len = len(pool)
+    while done < calls:
+        n = min(block, calls - done)
+        start_idx = done % pool_len
+        chunk = pool[start_idx:start_idx + n]
+        if len(chunk) < n:
+            chunk += pool[:n - len(chunk)]
+        start = clock()
+        for m in chunk:
+            fn(m)
+        samples.append((clock() - start, n))
+        done += n
+    return samples
+
+
+def bench_case(name, fn, pool, size, timer_overhead):
+    block = min(BLOCK_CALLS, size)
+    calls = max(size, MIN_CALLS // size * size)
+
+    _run_calls(fn, pool, min(calls, 1000), block)  # warm caches
+    samples = _run_calls(fn, pool, calls, block)
+
+    total_ns = sum(ns for ns, _ in samples)
+    per_call = sorted(max(0, ns - timer_overhead) / n for ns, n in samples)
+
+    tracemalloc.start()
+    for i in range(min(calls, MEMORY_SAMPLE)):
+        fn(pool[i % len(pool)])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "case": name,
+        "batch_size": size,
+        "calls": calls,
+        "seconds": round(total_ns / 1e9, 6),
+        "calls_per_sec": round(calls / (total_ns / 1e9)),
+        "latency_ns": {
+            "p50": round(_percentile(per_call, 0.50), 1),
+            "p90": round(_percentile(per_call, 0.90), 1),
+            "p99": round(_percentile(per_call, 0.99), 1),
+            "max": round(per_call[-1], 1),
+        },
+        "peak_traced_bytes": peak,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(case_names, sizes):
+    pool = make_members(POOL_SIZE)
+    overhead = _timer_overhead_ns()
+    results = []
+    for name in case_names:
+        for size in sizes:
+            result = bench_case(name, CASES[name], pool, size, overhead)
+            results.append(result)
+            print(f"{name:<22} n={size:<9} {result['calls_per_sec']:>12,} calls/s  "
+                  f"p50 {result['latency_ns']['p50']:>9.1f} ns  p99 {result['latency_ns']['p99']:>9.1f} ns  "
+                  f"peak {result['peak_traced_bytes']:>9,} B", file=sys.stderr)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timer_overhead_ns": overhead,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    old = {(r["case"], r["batch_size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        before = old.get((r["case"], r["batch_size"]))
+        if before is None:
+            continue
+        change = (r["calls_per_sec"] - before["calls_per_sec"]) / before["calls_per_sec"] * 100
+        marker = "REGRESSION" if change < -threshold else ""
+        print(f"{r['case']:<22} n={r['batch_size']:<9} {change:+7.1f}%  {marker}", file=sys.stderr)
+        if marker:
+            regressions.append({"case": r["case"], "batch_size": r["batch_size"], "change_pct": round(change, 1)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the plan generation hot paths.")
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help="comma separated case names (default: all)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated batch sizes (default: 1,10000,1000000)")
+    parser.add_argument("-o", "--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="throughput drop (%%) that counts as a regression")
+    parser.add_argument("--instrument", action="store_true",
+                        help="run with gym_instrument stage timing enabled")
+    args = parser.parse_args(argv)
+
+    case_names = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in case_names if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    if args.instrument:
+        import gym_instrument
+        gym_instrument.enable()
+    report = run(case_names, sizes)
+    report["instrumented"] = args.instrument
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            report["regressions"] = compare(report, json.load(fh), args.threshold)
+        status = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# Smart Gym Planner - array versions of the BMI / protein calculations
+#
+# Same rules as calculate_bmi, get_bmi_status and the protein figure in
+# get_diet_plan, applied to whole NumPy columns at once. N/A is NaN for
+# BMI / protein and BMI_NA for status codes.
+
+import numpy as np
+
+
+BMI_CUT_POINTS = np.array([18.5, 25.0, 30.0])
+BMI_STATUS_LABELS = ("Underweight", "Normal", "Overweight", "Obese")
+BMI_NA = -1
+
+PROTEIN_PER_KG = 1.6
+
+_STATUS_LOOKUP = np.array(BMI_STATUS_LABELS + ("N/A",), dtype=object)
+
+
+def calculate_bmi_array(heights_cm, weights_kg):
+    heights = np.asarray(heights_cm, dtype=np.float64)
+    weights = np.asarray(weights_kg, dtype=np.float64)
+
+    h_m = heights / 100
+    valid = (h_m > 0) & (weights > 0)  # False for NaN as well
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weights / (h_m * h_m)
+    return np.where(valid, bmi, np.nan)
+
+
+def get_bmi_status_codes(bmi):
+    bmi = np.asarray(bmi, dtype=np.float64)
+    codes = np.digitize(bmi, BMI_CUT_POINTS).astype(np.int8)
+    codes[np.isnan(bmi)] = BMI_NA
+    return codes
+
+
+def get_bmi_status_labels(codes):
+    # BMI_NA (-1) indexes the trailing "N/A" entry
+    return _STATUS_LOOKUP[np.asarray(codes)]
+
+
+def get_protein_targets(weights_kg):
+    weights = np.asarray(weights_kg, dtype=np.float64)
+    # np.rint rounds half to even, same as round() in get_diet_plan
+    return np.rint(weights * PROTEIN_PER_KG)
+
+
+def classify_members(heights_cm, weights_kg):
+    bmi = calculate_bmi_array(heights_cm, weights_kg)
+    return bmi, get_bmi_status_codes(bmi), get_protein_targets(weights_kg)
+
@@ -0,0 +1,284 @@
+# Smart Gym Planner - headless batch generation for member rosters
+#
+# Usage:
+#   python gym_batch.py roster.csv -o plans.txt
+#   python gym_batch.py roster.jsonl --format jsonl -j 8 > plans.jsonl
+#   python gym_batch.py roster.csv --format json -o plans.ndjson
+#   python gym_batch.py roster.csv --store members.db --incremental -o changed.txt
+#   python gym_batch.py roster.csv -o plans.txt --metrics stages.prom --profile run
+#   python gym_batch.py roster.csv --units imperial -o plans.txt
+#   python gym_batch.py roster.csv --cache plans.db -o plans.txt
+#   python gym_batch.py roster.csv --locale hi -o plans.txt
+#
+# With --cache (or GYM_PLANNER_CACHE) rendered plans are kept in the shared
+# plan cache file (gym_plancache) and only members not seen before are
+# rendered.
+
+import argparse
+import csv
+import json
+import os
+import sys
+from functools import partial
+
+from gym_locale import DEFAULT_LOCALE, LocaleError, available_locales, get_locale
+from gym_plancache import DEFAULT_CACHE_PATH, iter_cached, member_values, open_cache, plan_kind, render_sections
+from gym_render import RENDERERS, format_plan
+from gym_validate import DEFAULT_UNITS, normalise_member, row_id
+
+
+# ---------- ROSTER INPUT ----------
+
+def read_roster(path):
+    if path == "-":
+        fh = sys.stdin
+    else:
+        fh = open(path, newline="", encoding="utf-8")
+    try:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def parse_member(row, units="metric"):
+    # raises gym_validate.ValidationError (a ValueError) naming every bad field
+    return normalise_member(row, units)
+
+
+# ---------- GENERATION ----------
+
+def generate_plan(indexed_row, fmt="text", units="metric", locale=None):
+    index, row = indexed_row
+    member_id = row_id(row, index)
+    try:
+        m = parse_member(row, units)
+    except ValueError as exc:
+        return member_id, None, str(exc)
+
+    text = format_plan(m["age"], m["gender"], m["height"], m["weight"], m["goal"],
+                       m["activity"], m["experience"], m["diet_pref"],
+                       name=m["name"], notes=m["notes"], fmt=fmt, locale=locale)
+    return member_id, text, None
+
+
+def iter_plans(rows, workers=None, chunksize=256, fmt="text", units="metric", cache=None, locale=None):
+    # cache: a gym_plancache.PlanCache; only its misses are rendered
+    # locale: a gym_locale code (codes pickle cheaply for the pool); None is English
+    if cache is not None:
+        yield from _iter_cached_plans(rows, workers, chunksize, "text" if fmt == "jsonl" else fmt, units, cache,
+                                      locale)
+        return
+
+    indexed = enumerate(rows, start=1)
+    generate = partial(generate_plan, fmt="text" if fmt == "jsonl" else fmt, units=units, locale=locale)
+    if workers == 1:
+        yield from map(generate, indexed)
+        return
+
+    from multiprocessing import Pool  # only worth its import cost with workers
+
+    # imap keeps the roster streaming (rows are pulled lazily) and preserves order.
+    with Pool(workers) as pool:
+        yield from pool.imap(generate, indexed, chunksize=chunksize)
+
+
+def _iter_cached_plans(rows, workers, chunksize, fmt, units, cache, locale=None):
+    # the pool only renders the cache misses of each chunk
+    render = partial(render_sections, fmt=fmt, locale=locale)
+    kind = plan_kind(fmt, locale)
+    if workers == 1:
+        yield from _joined(iter_cached(rows, cache, kind, member_values,
+                                       lambda todo: list(map(render, todo)), units))
+        return
+    from multiprocessing import Pool
+
+    with Pool(workers) as pool:
+        yield from _joined(iter_cached(rows, cache, kind, member_values,
+                                       partial(pool.map, render, chunksize=chunksize), units))
+
+
+def _joined(results):
+    for member_id, sections, error in results:
+        yield member_id, None if sections is None else "".join(sections), error
+
+
+_BODY_OPEN, _BODY_CLOSE = "<body>\n", "</body>\n</html>\n"
+
+
+def write_plans(results, out, fmt="text", errors=None):
+    errors = errors or sys.stderr  # looked up per call, so redirected stderr is honoured
+    written = failed = 0
+    last = ""
+    for member_id, text, error in results:
+        if error is not None:
+            failed += 1
+            print(f"member {member_id}: {error}", file=errors)
+            if fmt == "jsonl":
+                out.write(json.dumps({"id": member_id, "error": error}) + "\n")
+            continue
+
+        if fmt == "jsonl":
+            out.write(json.dumps({"id": member_id, "plan": text}, ensure_ascii=False) + "\n")
+        elif fmt == "html":
+            # one page: the first plan's head, then every plan's <main> card
+            head, body = text.split(_BODY_OPEN, 1)
+            if not written:
+                out.write(head + _BODY_OPEN)
+            out.write(body.rsplit("</body>", 1)[0])
+        else:
+            if written:
+                out.write(RENDERERS[fmt].separator)
+            out.write(text)
+            last = text
+        written += 1
+
+    if fmt == "html" and written:
+        out.write(_BODY_CLOSE)
+    elif fmt not in ("jsonl", "html") and written and not last.endswith("\n"):
+        out.write("\n")
+    return written, failed
+
+
+# ---------- CLI ----------
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Generate gym plans for a whole member roster.")
+    parser.add_argument("roster", nargs="?",
+                        help="CSV or JSONL roster file ('-' for CSV on stdin); optional with --store")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", *RENDERERS], default="text",
+                        help="'jsonl' wraps the text plan with the member id; 'html' is one page "
+                             "with a card per member; other formats are written one plan after another")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--units", choices=sorted(DEFAULT_UNITS), default="metric",
+                        help="units of bare height / weight numbers in the roster (default: metric)")
+    parser.add_argument("--locale", default=DEFAULT_LOCALE,
+                        help="language and units of the plans (default: $GYM_PLANNER_LOCALE or en; "
+                             f"available: {', '.join(available_locales())})")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, metavar="FILE",
+                        help="shared plan cache file, 'off' to render every plan "
+                             "(default: GYM_PLANNER_CACHE or off)")
+    parser.add_argument("--store", metavar="DB",
+                        help="SQLite profile store: import the roster into it and save generated plans")
+    parser.add_argument("--incremental", action="store_true",
+                        help="with --store, only regenerate members whose inputs changed since the last run")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="time each generation stage and write the counters to FILE "
+                             "(Prometheus text for .prom, JSON otherwise); runs in-process")
+    parser.add_argument("--track-allocations", action="store_true",
+                        help="with --metrics, also record net allocated bytes per stage (slower)")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="write PREFIX.pstats (cProfile) and PREFIX.folded (sampled stacks "
+                             "for flamegraphs); runs in-process")
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.roster is None and args.store is None:
+        parser.error("a roster file is required unless --store is given")
+    if args.incremental and args.store is None:
+        parser.error("--incremental needs --store")
+    try:
+        get_locale(args.locale)
+    except LocaleError as exc:
+        parser.error(str(exc))
+    if args.metrics or args.profile:
+        return _main_instrumented(args)
+    return _run(args)
+
+
+def _run(args):
+    if args.store:
+        return _main_with_store(args)
+
+    cache = _open_cache(args)
+    if args.output == "-":
+        out = sys.stdout
+    else:
+        out = open(args.output, "w", encoding="utf-8")
+    try:
+        results = iter_plans(read_roster(args.roster), workers=args.workers,
+                             chunksize=args.chunksize, fmt=args.format, units=args.units, cache=cache,
+                             locale=args.locale)
+        written, failed = write_plans(results, out, fmt=args.format)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{written} plans written, {failed} rows rejected", file=sys.stderr)
+    _report_cache(cache)
+    return 1 if failed else 0
+
+
+def _open_cache(args):
+    return None if args.cache == "off" else open_cache(args.cache)
+
+
+def _report_cache(cache):
+    if cache is not None:
+        print(cache.summary(), file=sys.stderr)
+        cache.close()
+
+
+def _main_with_store(args):
+    from gym_store import ProfileStore, regenerate  # gym_store imports this module
+
+    render_fmt = "text" if args.format == "jsonl" else args.format
+    cache = _open_cache(args)
+    rejected = []
+    with ProfileStore(args.store) as store:
+        if args.roster:
+            changed, rejected = store.import_rows(read_roster(args.roster), units=args.units)
+            for member_id, error in rejected:
+                print(f"member {member_id}: {error}", file=sys.stderr)
+            print(f"{changed} profiles added or changed", file=sys.stderr)
+
+        if args.output == "-":
+            out = sys.stdout
+        else:
+            out = open(args.output, "w", encoding="utf-8")
+        try:
+            results = regenerate(store, fmt=render_fmt, incremental=args.incremental, cache=cache,
+                                 workers=args.workers, chunksize=args.chunksize, locale=args.locale)
+            written, failed = write_plans(results, out, fmt=args.format)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    print(f"{written} plans written, {failed + len(rejected)} rows rejected", file=sys.stderr)
+    _report_cache(cache)
+    return 1 if failed or rejected else 0
+
+
+def _main_instrumented(args):
+    # Worker processes would keep their timings to themselves, so measured
+    # runs generate in this process.
+    import gym_instrument
+    from contextlib import nullcontext
+
+    args.workers = 1
+    if args.metrics:
+        gym_instrument.enable(track_allocations=args.track_allocations)
+    try:
+        with gym_instrument.profile(args.profile) if args.profile else nullcontext():
+            status = _run(args)
+    finally:
+        gym_instrument.disable()
+    if args.metrics:
+        gym_instrument.write_metrics(args.metrics)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+# Smart Gym Planner - cohort analytics over all members
+#
+# Usage:
+#   python gym_cohort.py --store members.db --progress progress/ -o cohort.html
+#   python gym_cohort.py --store members.db --gender Female --age 30-45 --format text
+#
+# Every member falls into one cell of a small dense cube:
+#
+#   gender × age (years) × activity × goal × BMI status × protein bin
+#
+# The cube holds member counts; sibling cubes without the protein axis hold
+# protein and adherence sums. A filtered view (gender / age range / activity)
+# is a slice-and-sum over the cube, so its cost depends on the cube size,
+# not on how many members are loaded. upsert() and remove() move one member
+# between cells instead of rebuilding anything.
+#
+# Adherence is logged training days (from gym_progress) over the sessions
+# the plan asks for in the same window, capped at 100%.
+
+import argparse
+import json
+import sys
+from html import escape
+
+import numpy as np
+
+from gym_arrays import BMI_STATUS_LABELS, classify_members
+from gym_planner import ACTIVITY_LEVELS, GOALS
+from gym_validate import GENDERS
+
+
+UNKNOWN = "unknown"
+MAX_AGE = 100             # older ages share the last age slot
+PROTEIN_BIN_G = 10
+PROTEIN_BINS = 30         # the last bin also holds everything above 290 g
+SESSIONS_PER_WEEK = 3     # every workout template has three days
+ADHERENCE_WINDOW_DAYS = 28
+
+STATUS_LABELS = BMI_STATUS_LABELS + ("N/A",)
+
+_AXES = (
+    ("gender", GENDERS + (UNKNOWN,)),
+    ("age", tuple(range(MAX_AGE + 1))),
+    ("activity", ACTIVITY_LEVELS + (UNKNOWN,)),
+    ("goal", GOALS + (UNKNOWN,)),
+    ("status", STATUS_LABELS),
+)
+_SHAPE = tuple(len(values) for _, values in _AXES)
+_CELLS = int(np.prod(_SHAPE))
+_CODES = {name: {v: i for i, v in enumerate(values)} for name, values in _AXES}
+
+
+def _encode(values, axis):
+    codes, unknown = _CODES[axis], len(_CODES[axis]) - 1
+    return np.fromiter((codes.get(v, unknown) for v in values), dtype=np.int64, count=len(values))
+
+
+def _cells(gender, age, activity, goal, status):
+    # flat index into the (gender, age, activity, goal, status) cube
+    age = np.clip(age, 0, MAX_AGE)
+    status = np.where(status < 0, len(STATUS_LABELS) - 1, status)
+    return np.ravel_multi_index((gender, age, activity, goal, status), _SHAPE)
+
+
+def _protein_bins(protein):
+    bins = np.nan_to_num(protein, nan=0.0) // PROTEIN_BIN_G
+    return np.clip(bins, 0, PROTEIN_BINS - 1).astype(np.int64)
+
+
+# ---------- COHORT ----------
+
+class Cohort:
+    def __init__(self, capacity=1024):
+        self.ids = []
+        self.row_of = {}
+        self._free = []
+        self.cell = np.full(capacity, -1, dtype=np.int64)      # -1: empty row
+        self.pbin = np.zeros(capacity, dtype=np.int64)
+        self.protein = np.zeros(capacity, dtype=np.float64)
+        self.adherence = np.full(capacity, np.nan)             # NaN: no log data
+        self.counts = np.zeros(_CELLS * PROTEIN_BINS, dtype=np.int64)
+        self.protein_sum = np.zeros(_CELLS)
+        self.protein_members = np.zeros(_CELLS, dtype=np.int64)  # members with a valid weight
+        self.adherence_sum = np.zeros(_CELLS)
+        self.adherence_members = np.zeros(_CELLS, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.row_of)
+
+    @classmethod
+    def from_profiles(cls, member_ids, profiles):
+        # profiles: sequence of mappings with age, gender, height, weight,
+        # goal and activity (ProfileStore rows, MemberProfile, roster dicts)
+        cohort = cls(capacity=max(1024, len(member_ids)))
+        if not len(member_ids):
+            return cohort
+        age = np.array([int(p["age"]) for p in profiles], dtype=np.int64)
+        height = np.array([float(p["height"]) for p in profiles])
+        weight = np.array([float(p["weight"]) for p in profiles])
+        bmi, status, protein = classify_members(height, weight)
+        cells = _cells(_encode([p["gender"] for p in profiles], "gender"), age,
+                       _encode([p["activity"] for p in profiles], "activity"),
+                       _encode([p["goal"] for p in profiles], "goal"), status)
+
+        n = len(member_ids)
+        cohort.ids = [str(m) for m in member_ids]
+        cohort.row_of = {m: i for i, m in enumerate(cohort.ids)}
+        if len(cohort.row_of) != n:
+            raise ValueError("duplicate member ids")
+        cohort.cell[:n] = cells
+        cohort.pbin[:n] = _protein_bins(protein)
+        cohort.protein[:n] = protein
+        cohort._rebuild()
+        return cohort
+
+    @classmethod
+    def from_store(cls, store):
+        ids, profiles = [], []
+        for row in store.iter_columns(("member_id", "age", "gender", "height", "weight", "goal", "activity")):
+            ids.append(row[0])
+            profiles.append({"age": row[1], "gender": row[2], "height": row[3], "weight": row[4],
+                             "goal": row[5], "activity": row[6]})
+        return cls.from_profiles(ids, profiles)
+
+    def _rebuild(self):
+        used = self.cell >= 0
+        cell, pbin = self.cell[used], self.pbin[used]
+        self.counts = np.bincount(cell * PROTEIN_BINS + pbin, minlength=_CELLS * PROTEIN_BINS)
+        valid = used & ~np.isnan(self.protein)
+        self.protein_sum = np.bincount(self.cell[valid], self.protein[valid], minlength=_CELLS)
+        self.protein_members = np.bincount(self.cell[valid], minlength=_CELLS)
+        logged = used & ~np.isnan(self.adherence)
+        self.adherence_sum = np.bincount(self.cell[logged], self.adherence[logged], minlength=_CELLS)
+        self.adherence_members = np.bincount(self.cell[logged], minlength=_CELLS)
+
+    # ----- incremental updates -----
+
+    def _move(self, row, sign):
+        cell = self.cell[row]
+        self.counts[cell * PROTEIN_BINS + self.pbin[row]] += sign
+        if not np.isnan(self.protein[row]):
+            self.protein_sum[cell] += sign * self.protein[row]
+            self.protein_members[cell] += sign
+        if not np.isnan(self.adherence[row]):
+            self.adherence_sum[cell] += sign * self.adherence[row]
+            self.adherence_members[cell] += sign
+
+    def _grow(self):
+        size = len(self.cell)
+        self.cell = np.concatenate([self.cell, np.full(size, -1, dtype=np.int64)])
+        self.pbin = np.concatenate([self.pbin, np.zeros(size, dtype=np.int64)])
+        self.protein = np.concatenate([self.protein, np.zeros(size)])
+        self.adherence = np.concatenate([self.adherence, np.full(size, np.nan)])
+
+    def upsert(self, member_id, profile):
+        member_id = str(member_id)
+        row = self.row_of.get(member_id)
+        if row is not None:
+            self._move(row, -1)
+        else:
+            if self._free:
+                row = self._free.pop()
+                self.ids[row] = member_id
+            else:
+                row = len(self.ids)
+                if row == len(self.cell):
+                    self._grow()
+                self.ids.append(member_id)
+            self.row_of[member_id] = row
+            self.adherence[row] = np.nan
+
+        bmi, status, protein = classify_members([float(profile["height"])], [float(profile["weight"])])
+        self.cell[row] = _cells(_encode([profile["gender"]], "gender"), np.array([int(profile["age"])]),
+                                _encode([profile["activity"]], "activity"),
+                                _encode([profile["goal"]], "goal"), status)[0]
+        self.protein[row] = protein[0]
+        self.pbin[row] = _protein_bins(protein)[0]
+        self._move(row, +1)
+
+    def remove(self, member_id):
+        row = self.row_of.pop(str(member_id), None)
+        if row is None:
+            return False
+        self._move(row, -1)
+        self.cell[row] = -1
+        self.ids[row] = None
+        self._free.append(row)
+        return True
+
+    def set_adherence(self, member_ids, rates):
+        # rates: fraction of planned sessions done (NaN for no data)
+        rows = [self.row_of.get(str(m)) for m in member_ids]
+        known = np.array([r is not None for r in rows], dtype=bool)
+        self.adherence[:] = np.nan
+        self.adherence[np.array([r for r in rows if r is not None], dtype=np.int64)] = np.asarray(rates)[known]
+        self._rebuild()
+
+    def load_adherence(self, log, end=None, days=ADHERENCE_WINDOW_DAYS, sessions_per_week=SESSIONS_PER_WEEK):
+        member_ids, rates = adherence_rates(log, end, days, sessions_per_week)
+        self.set_adherence(member_ids, rates)
+
+    # ----- views -----
+
+    def summary(self, gender=None, age=None, activity=None):
+        # gender / activity: a value or a list of values; age: (low, high) inclusive
+        counts = self.counts.reshape(_SHAPE + (PROTEIN_BINS,))
+        sums = [a.reshape(_SHAPE) for a in (self.protein_sum, self.protein_members,
+                                            self.adherence_sum, self.adherence_members)]
+        index = (_axis_index(gender, "gender"), _age_slice(age), _axis_index(activity, "activity"))
+        counts = counts[index[0]][:, index[1]][:, :, index[2]].sum(axis=(0, 1, 2))   # goal × status × protein
+        protein_sum, protein_n, adherence_sum, adherence_n = (
+            s[index[0]][:, index[1]][:, :, index[2]].sum(axis=(0, 1, 2)) for s in sums)  # goal × status
+
+        goal_status = counts.sum(axis=2)
+        protein_hist = counts.sum(axis=(0, 1))
+        goals = _AXES[3][1]
+        total = int(goal_status.sum())
+        return {
+            "filters": {"gender": gender, "age": list(age) if age else None, "activity": activity},
+            "members": total,
+            "bmi_status": dict(zip(STATUS_LABELS, goal_status.sum(axis=0).tolist())),
+            "goal_mix": {g: int(n) for g, n in zip(goals, goal_status.sum(axis=1)) if n or g != UNKNOWN},
+            "goal_by_status": {g: dict(zip(STATUS_LABELS, row.tolist()))
+                               for g, row in zip(goals, goal_status) if row.any() or g != UNKNOWN},
+            "protein": {
+                "mean_g": _ratio(protein_sum.sum(), protein_n.sum()),
+                "histogram": {f"{i * PROTEIN_BIN_G}-{(i + 1) * PROTEIN_BIN_G - 1}": int(n)
+                              for i, n in enumerate(protein_hist) if n},
+                "median_g": _histogram_median(protein_hist),
+            },
+            "adherence": {
+                "members_with_logs": int(adherence_n.sum()),
+                "mean": _ratio(adherence_sum.sum(), adherence_n.sum()),
+                "by_goal": {g: _ratio(s, n) for g, s, n in zip(goals, adherence_sum.sum(axis=1),
+                                                               adherence_n.sum(axis=1)) if n},
+                "by_bmi_status": {s: _ratio(a, n) for s, a, n in zip(STATUS_LABELS, adherence_sum.sum(axis=0),
+                                                                     adherence_n.sum(axis=0)) if n},
+            },
+        }
+
+
+def _axis_index(values, axis):
+    if values is None:
+        return slice(None)
+    if isinstance(values, str):
+        values = (values,)
+    codes = _CODES[axis]
+    unknown = [v for v in values if v not in codes]
+    if unknown:
+        raise ValueError(f"unknown {axis} {', '.join(map(repr, unknown))}; expected one of {', '.join(codes)}")
+    return np.array([codes[v] for v in values], dtype=np.int64)
+
+
+def _age_slice(age):
+    if age is None:
+        return slice(None)
+    low, high = age
+    return slice(max(0, int(low)), min(MAX_AGE, int(high)) + 1)
+
+
+def _ratio(total, n):
+    return round(float(total) / int(n), 3) if n else None
+
+
+def _histogram_median(hist):
+    # lower edge of the bin holding the middle member, to PROTEIN_BIN_G
+    total = hist.sum()
+    if not total:
+        return None
+    return int(np.searchsorted(np.cumsum(hist), (total + 1) // 2)) * PROTEIN_BIN_G
+
+
+# ---------- ADHERENCE ----------
+
+def adherence_rates(log, end=None, days=ADHERENCE_WINDOW_DAYS, sessions_per_week=SESSIONS_PER_WEEK):
+    # (member_ids, rates) for every member with lift logs in the window
+    end_day = int(np.datetime64("today", "D").astype(np.int64)) if end is None else int(np.datetime64(end, "D").astype(np.int64))
+    lifts = log.lifts_table.scan(end_day - days + 1, end_day)
+    sessions = np.unique(lifts["member"].astype(np.int64) << 32 | lifts["day"].astype(np.int64))
+    per_member = np.bincount(sessions >> 32)
+    members = np.flatnonzero(per_member)
+    planned = sessions_per_week * days / 7
+    rates = np.minimum(per_member[members] / planned, 1.0)
+    names = log.members.names
+    return [names[m] for m in members], rates
+
+
+# ---------- OUTPUT ----------
+
+def format_summary(summary):
+    lines = [f"Members: {summary['members']}", "", "BMI status:"]
+    total = summary["members"] or 1
+    for label, n in summary["bmi_status"].items():
+        lines.append(f"  {label:<12} {n:>7}  {n / total:6.1%}")
+    lines += ["", "Goal mix:"]
+    for goal, n in summary["goal_mix"].items():
+        lines.append(f"  {goal:<12} {n:>7}  {n / total:6.1%}")
+    protein = summary["protein"]
+    lines += ["", f"Protein target: mean {protein['mean_g']} g, median ~{protein['median_g']} g"]
+    adherence = summary["adherence"]
+    lines += ["", f"Adherence ({adherence['members_with_logs']} members with logs): "
+                  + ("n/a" if adherence["mean"] is None else f"{adherence['mean']:.0%}")]
+    for goal, rate in adherence["by_goal"].items():
+        lines.append(f"  {goal:<12} {rate:.0%}")
+    return "\n".join(lines) + "\n"
+
+
+def _bars(counts, total):
+    rows = []
+    for label, n in counts.items():
+        width = 100 * n / total if total else 0
+        rows.append(f'<tr><th>{escape(str(label))}</th><td><div class="bar" style="width:{width:.1f}%"></div></td>'
+                    f"<td>{n}</td></tr>")
+    return "<table>" + "".join(rows) + "</table>"
+
+
+def render_dashboard_html(summary):
+    total = summary["members"]
+    adherence = summary["adherence"]
+    filters = ", ".join(f"{k}: {v if not isinstance(v, list) else '–'.join(map(str, v))}"
+                        for k, v in summary["filters"].items() if v) or "all members"
+    rates = {g: f"{r:.0%}" for g, r in adherence["by_goal"].items()}
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Smart Gym Planner – Cohort</title>
+<style>
+  body {{ font-family: system-ui, sans-serif; background: #101014; color: #f5f5f5; margin: 2rem; }}
+  section {{ background: #181824; border-radius: 8px; padding: 1rem 1.5rem; margin-bottom: 1rem; }}
+  table {{ width: 100%; border-collapse: collapse; }}
+  th {{ text-align: left; width: 9rem; font-weight: normal; color: #cbd5f5; }}
+  td:last-child {{ width: 5rem; text-align: right; }}
+  .bar {{ background: #22c55e; height: 0.9rem; border-radius: 3px; }}
+</style>
+</head>
+<body>
+<h1>Cohort overview</h1>
+<p>{escape(filters)} · {total} members</p>
+<section><h2>BMI status</h2>{_bars(summary["bmi_status"], total)}</section>
+<section><h2>Goal mix</h2>{_bars(summary["goal_mix"], total)}</section>
+<section><h2>Protein targets</h2>
+<p>Mean {summary["protein"]["mean_g"]} g · median ~{summary["protein"]["median_g"]} g</p>
+{_bars(summary["protein"]["histogram"], total)}</section>
+<section><h2>Adherence</h2>
+<p>{adherence["members_with_logs"]} members with training logs · mean {"n/a" if adherence["mean"] is None else f'{adherence["mean"]:.0%}'}</p>
+<table>{"".join(f"<tr><th>{escape(g)}</th><td>{r}</td></tr>" for g, r in rates.items())}</table></section>
+</body>
+</html>
+"""
+
+
+# ---------- CLI ----------
+
+def _parse_age(value):
+    low, _, high = value.partition("-")
+    try:
+        return int(low or 0), int(high or MAX_AGE)
+    except ValueError:
+        raise argparse.ArgumentTypeError("age range looks like 30-45, 50- or -25") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cohort analytics over the member store.")
+    parser.add_argument("--store", metavar="DB", help="SQLite profile store (default: $GYM_PLANNER_DB)")
+    parser.add_argument("--progress", metavar="DIR", help="progress log directory, for adherence")
+    parser.add_argument("--gender", action="append", help="only these genders (repeatable)")
+    parser.add_argument("--activity", action="append", help="only these activity levels (repeatable)")
+    parser.add_argument("--age", type=_parse_age, help="age range, e.g. 30-45")
+    parser.add_argument("--format", choices=["html", "json", "text"], default="html")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+    for axis in ("gender", "activity"):
+        try:
+            _axis_index(getattr(args, axis), axis)
+        except ValueError as exc:
+            parser.error(str(exc))
+
+    from gym_store import DEFAULT_DB_PATH, ProfileStore
+
+    with ProfileStore(args.store or DEFAULT_DB_PATH) as store:
+        cohort = Cohort.from_store(store)
+    if args.progress:
+        from gym_progress import ProgressLog
+        cohort.load_adherence(ProgressLog(args.progress))
+
+    summary = cohort.summary(args.gender, args.age, args.activity)
+    if args.format == "html":
+        text = render_dashboard_html(summary)
+    elif args.format == "json":
+        text = json.dumps(summary, indent=2) + "\n"
+    else:
+        text = format_summary(summary)
+
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+# Smart Gym Planner - printable PDF and standalone HTML export
+#
+# Usage:
+#   python gym_export.py roster.csv -o handouts/ --format pdf -j 8
+#   python gym_export.py roster.jsonl -o handouts/ --format html
+#
+# The logo is decoded, scaled and compressed once per job (in the parent
+# process) and handed to every worker: HTML embeds it as a data URI, PDF as a
+# single pre-built image XObject. As in gym_render, the workout, meal and tips
+# sections only depend on the template key, so their PDF lines are wrapped,
+# encoded and cached once per key; per member only the header and protein
+# line are laid out before the pages are written.
+
+import argparse
+import base64
+import io
+import os
+import re
+import sys
+import textwrap
+import zlib
+from functools import lru_cache
+from multiprocessing import Pool
+
+from gym_batch import parse_member, read_roster
+from gym_validate import row_id
+from gym_injuries import parse_notes
+from gym_planner import get_diet_plan, get_general_tips, get_restricted_workout_plan, on_rules_changed
+from gym_render import CLOSING_NOTE, Member, render_plan
+
+
+DEFAULT_LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cyberscan-logo.png")
+LOGO_PX = 160            # logo is scaled to this many pixels wide before embedding
+LOGO_PT = 56             # and drawn this wide on the PDF page
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842   # A4 in points
+MARGIN = 50
+CHAR_WIDTH = 0.55        # average Helvetica glyph width in ems, for wrapping
+
+# style: (font resource, size, leading, indent)
+STYLES = {
+    "title": ("F2", 20, 28, 0),
+    "h1": ("F2", 13, 22, 0),
+    "h2": ("F2", 11, 17, 0),
+    "body": ("F1", 10, 14, 0),
+    "item": ("F1", 10, 14, 14),
+    "muted": ("F1", 9, 13, 0),
+}
+
+
+# ---------- ASSETS ----------
+
+class Assets:
+    __slots__ = ("logo_data_uri", "logo_size", "logo_pdf_object")
+
+    def __init__(self, logo_data_uri=None, logo_size=None, logo_pdf_object=None):
+        self.logo_data_uri = logo_data_uri
+        self.logo_size = logo_size
+        self.logo_pdf_object = logo_pdf_object
+
+
+def load_assets(logo_path=DEFAULT_LOGO, width=LOGO_PX):
+    # Without Pillow or the logo file the documents are simply unbranded.
+    try:
+        from PIL import Image
+
+        image = Image.open(logo_path)
+        image.draft("RGB", (width, width))
+        image = image.convert("RGB")
+        size = (width, max(1, round(image.height * width / image.width)))
+        image = image.resize(size, Image.LANCZOS)
+    except (ImportError, OSError):
+        return Assets()
+
+    png = io.BytesIO()
+    image.save(png, "PNG", optimize=True)
+    data_uri = "data:image/png;base64," + base64.b64encode(png.getvalue()).decode("ascii")
+
+    pixels = zlib.compress(image.tobytes(), 9)
+    pdf_object = (
+        b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+        b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (size[0], size[1], len(pixels))
+        + pixels + b"\nendstream"
+    )
+    return Assets(data_uri, size, pdf_object)
+
+
+# ---------- HTML ----------
+
+_MAIN_OPEN = '<main class="main-card">\n'
+
+
+def render_html(member, assets, locale=None):
+    # gym_render's HTML plan (static sections come from its cache) with the
+    # logo spliced in at the top of the card
+    chunks = render_plan(**member, fmt="html", locale=locale)
+    first = next(chunks)
+    if assets.logo_data_uri:
+        logo = (f'    <img src="{assets.logo_data_uri}" alt="CyberScan" width="{LOGO_PT}" '
+                f'style="float: right; border-radius: 12px;" />\n')
+        first = first.replace(_MAIN_OPEN, _MAIN_OPEN + logo, 1)
+    yield first
+    yield from chunks
+
+
+# ---------- PDF LINES ----------
+# A line is (font, size, leading, x, escaped cp1252 bytes); pagination only
+# has to assign y positions.
+
+def _pdf_escape(text):
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _styled(style, text, bullet=False):
+    font, size, leading, indent = STYLES[style]
+    width = PAGE_WIDTH - 2 * MARGIN - indent
+    wrapped = textwrap.wrap(text, width=max(10, int(width / (size * CHAR_WIDTH)))) or [""]
+    lines = []
+    for i, part in enumerate(wrapped):
+        if bullet:
+            part = ("• " if i == 0 else "   ") + part
+        lines.append((font, size, leading, MARGIN + indent, _pdf_escape(part)))
+    return lines
+
+
+def _blank(points=8):
+    return [("F1", 1, points, MARGIN, b"")]
+
+
+def _header_lines(m):
+    lines = _styled("title", "Smart Gym Planner")
+    if m.name:
+        lines += _styled("muted", f"Personalised plan for: {m.name}")
+    lines += _blank() + _styled("h1", "1. Overview")
+    bmi = "N/A" if m.bmi is None else f"{m.bmi:.1f} ({m.bmi_status})"
+    rows = [
+        f"Age: {m.age} yrs | Gender: {m.gender} | Diet: {m.diet_text}",
+        f"Height: {m.height} cm | Weight: {m.weight} kg",
+        f"BMI: {bmi}",
+        f"Goal: {m.goal_text}",
+        f"Activity: {m.activity} | Experience: {m.experience}",
+    ]
+    if m.notes:
+        rows.append(f"Notes: {m.notes}")
+    for row in rows:
+        lines += _styled("body", row)
+    return lines
+
+
+@lru_cache(maxsize=1024)
+def _static_lines(goal, experience, activity, diet_pref, restrictions):
+    workout = get_restricted_workout_plan(goal, experience, activity, restrictions)
+    diet = get_diet_plan(goal, diet_pref, 0)
+    tips = get_general_tips(goal)
+
+    lines = _blank() + _styled("h1", "2. Workout Plan") + _styled("h2", workout.title)
+    lines += _styled("muted", workout.summary)
+    for day in workout.days:
+        lines += _blank(4) + _styled("h2", day.name)
+        for item in day.items:
+            lines += _styled("item", item, bullet=True)
+    workout_lines = tuple(lines)
+
+    diet_title = tuple(_blank() + _styled("h1", "3. Daily Meal Guidance") + _styled("h2", diet.title))
+
+    lines = []
+    for meal in diet.meals:
+        lines += _blank(4) + _styled("h2", meal.name)
+        for item in meal.items:
+            lines += _styled("item", item, bullet=True)
+    lines += _blank(4) + _styled("h2", "Extra rules")
+    for extra in diet.extras:
+        lines += _styled("item", extra, bullet=True)
+    diet_body = tuple(lines)
+
+    lines = _blank() + _styled("h1", "4. Extra Tips")
+    for tip in tips:
+        lines += _styled("item", tip, bullet=True)
+    lines += _blank() + _styled("muted", CLOSING_NOTE)
+    return workout_lines, diet_title, diet_body, tuple(lines)
+
+
+on_rules_changed(_static_lines.cache_clear)
+
+
+# ---------- PDF DOCUMENT ----------
+
+def _paginate(lines, first_page_top):
+    pages, ops = [], []
+    y = first_page_top
+    for font, size, leading, x, text in lines:
+        if y - leading < MARGIN and ops:
+            pages.append(b"".join(ops))
+            ops, y = [], PAGE_HEIGHT - MARGIN
+        y -= leading
+        if text:
+            ops.append(b"BT /%s %d Tf %d %.1f Td (%s) Tj ET\n" % (font.encode(), size, x, y, text))
+    pages.append(b"".join(ops))
+    return pages
+
+
+def render_pdf(member, assets):
+    m = Member(**member)
+    restrictions = parse_notes(m.notes) if m.notes else frozenset()
+    workout, diet_title, diet_body, tips = _static_lines(m.goal, m.experience, m.activity,
+                                                         m.diet_pref, restrictions)
+    summary = _styled("muted", get_diet_plan(m.goal, m.diet_pref, m.weight).summary)
+    lines = _header_lines(m) + list(workout) + list(diet_title) + summary + list(diet_body) + list(tips)
+    pages = _paginate(lines, PAGE_HEIGHT - MARGIN)
+
+    logo_draw = b""
+    if assets.logo_pdf_object:
+        w, h = LOGO_PT, LOGO_PT * assets.logo_size[1] / assets.logo_size[0]
+        logo_draw = b"q %d 0 0 %.1f %d %.1f cm /Im1 Do Q\n" % (w, h, PAGE_WIDTH - MARGIN - w,
+                                                              PAGE_HEIGHT - MARGIN - h + 14)
+
+    # 1 catalog, 2 page tree, 3-4 fonts, 5 logo, then (page, contents) pairs
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        assets.logo_pdf_object or b"null",
+    ]
+    resources = b"/Font << /F1 3 0 R /F2 4 0 R >>"
+    if assets.logo_pdf_object:
+        resources += b" /XObject << /Im1 5 0 R >>"
+    kids = []
+    for number, content in enumerate(pages):
+        if number == 0:
+            content = logo_draw + content
+        stream = zlib.compress(content, 6)
+        page_id = len(objects) + 1
+        kids.append(b"%d 0 R" % page_id)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << %s >> /Contents %d 0 R >>"
+                       % (PAGE_WIDTH, PAGE_HEIGHT, resources, page_id + 1))
+        objects.append(b"<< /Filter /FlateDecode /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+    offsets, position = [], len(out[0])
+    for number, body in enumerate(objects, start=1):
+        chunk = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        offsets.append(position)
+        position += len(chunk)
+        out.append(chunk)
+    out.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+    out.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, position))
+    return b"".join(out)
+
+
+# ---------- BATCH ----------
+
+_worker_assets = None
+
+
+def _init_worker(assets):
+    global _worker_assets
+    _worker_assets = assets
+
+
+def _safe_filename(member_id):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", member_id).strip("._") or "member"
+
+
+def _unique_stems(indexed_rows):
+    # (indexed row, file name stem); a repeated member id (or one that only
+    # differs in case or punctuation) gets "-2", "-3", ... instead of
+    # overwriting the earlier member's file
+    taken = set()
+    for index, row in indexed_rows:
+        stem = base = _safe_filename(row_id(row, index))
+        n = 1
+        while stem.lower() in taken:
+            n += 1
+            stem = f"{base}-{n}"
+        taken.add(stem.lower())
+        yield (index, row), stem
+
+
+def export_member(indexed_row, out_dir, fmt="pdf", assets=None, stem=None):
+    index, row = indexed_row
+    member_id = row_id(row, index)
+    try:
+        member = parse_member(row)
+    except ValueError as exc:
+        return member_id, None, str(exc)
+
+    assets = assets or _worker_assets or Assets()
+    path = os.path.join(out_dir, f"{stem or _safe_filename(member_id)}.{fmt}")
+    if fmt == "pdf":
+        with open(path, "wb") as fh:
+            fh.write(render_pdf(member, assets))
+    else:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.writelines(render_html(member, assets))
+    return member_id, path, None
+
+
+def _export_indexed(args):
+    indexed_row, stem, out_dir, fmt = args
+    return export_member(indexed_row, out_dir, fmt, stem=stem)
+
+
+def export_roster(rows, out_dir, fmt="pdf", workers=None, chunksize=64, assets=None):
+    os.makedirs(out_dir, exist_ok=True)
+    if assets is None:
+        assets = load_assets()
+    jobs = ((indexed, stem, out_dir, fmt) for indexed, stem in _unique_stems(enumerate(rows, start=1)))
+    if workers == 1:
+        _init_worker(assets)
+        yield from map(_export_indexed, jobs)
+        return
+
+    with Pool(workers, initializer=_init_worker, initargs=(assets,)) as pool:
+        yield from pool.imap(_export_indexed, jobs, chunksize=chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export printable plans for a member roster.")
+    parser.add_argument("roster", help="CSV or JSONL roster file ('-' for CSV on stdin)")
+    parser.add_argument("-o", "--output", required=True, help="output directory, one file per member")
+    parser.add_argument("--format", choices=["pdf", "html"], default="pdf")
+    parser.add_argument("--logo", default=DEFAULT_LOGO, help="logo image for the handouts")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    written = failed = 0
+    for member_id, path, error in export_roster(read_roster(args.roster), args.output, fmt=args.format,
+                                                workers=args.workers, chunksize=args.chunksize,
+                                                assets=load_assets(args.logo)):
+        if error is not None:
+            failed += 1
+            print(f"member {member_id}: {error}", file=sys.stderr)
+            continue
+        written += 1
+        if os.path.basename(path) != f"{_safe_filename(member_id)}.{args.format}":
+            print(f"member {member_id}: id already used, written to {path}", file=sys.stderr)
+
+    print(f"{written} {args.format.upper()} files written to {args.output}, {failed} rows rejected",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
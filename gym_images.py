@@ -0,0 +1,93 @@
+# Smart Gym Planner - background image loading for the desktop app
+#
+# Images are decoded and resized on a worker thread and handed back to the
+# Tk main thread through root.after() polling (Tk itself is not thread-safe,
+# so PhotoImage objects are only ever created on the main thread).
+# Resized bitmaps are kept in an on-disk cache keyed by source path, mtime
+# and target size, so warm starts read a raw PPM instead of decoding a JPEG.
+
+import glob
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "smart-gym-planner",
+    "images",
+)
+
+
+def _cache_paths(path, size, cache_dir):
+    src = os.path.abspath(path)
+    mtime = os.stat(src).st_mtime_ns
+    width, height = size
+    # prefix identifies (source, size); the suffix changes whenever the source does
+    prefix = hashlib.sha1(f"{src}|{width}x{height}".encode()).hexdigest()[:16]
+    name = f"{prefix}-{mtime}.ppm"
+    return os.path.join(cache_dir, name), os.path.join(cache_dir, prefix + "-*.ppm")
+
+
+def load_resized(path, size, cache_dir=DEFAULT_CACHE_DIR):
+    cached, stale_pattern = _cache_paths(path, size, cache_dir)
+    try:
+        image = Image.open(cached)
+        image.load()
+        return image
+    except OSError:
+        pass
+
+    image = Image.open(path)
+    # JPEG can decode straight at 1/2, 1/4 or 1/8 scale; draft() picks the
+    # smallest scale that is still at least the requested size.
+    image.draft("RGB", size)
+    image = image.convert("RGB").resize(size)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for old in glob.glob(stale_pattern):
+            os.remove(old)
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        image.save(tmp, format="PPM")
+        os.replace(tmp, cached)
+    except OSError:
+        pass  # the cache is best-effort; a read-only home dir just means no warm starts
+    return image
+
+
+class ImageLoader:
+    POLL_MS = 30
+
+    def __init__(self, root, cache_dir=DEFAULT_CACHE_DIR):
+        self.root = root
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-loader")
+        self._pending = []
+
+    def load(self, path, size, callback):
+        future = self._executor.submit(load_resized, path, size, self.cache_dir)
+        self._pending.append((future, callback))
+        if len(self._pending) == 1:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        waiting = []
+        for future, callback in self._pending:
+            if not future.done():
+                waiting.append((future, callback))
+                continue
+            try:
+                image = future.result()
+            except Exception:
+                continue  # missing / unreadable images are simply not shown
+            callback(image)
+
+        self._pending = waiting
+        if waiting:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
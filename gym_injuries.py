@@ -0,0 +1,195 @@
+# Smart Gym Planner - injury-aware exercise substitution
+#
+# A small exercise knowledge base (movement pattern, muscles, joints the
+# exercise loads, equipment) covering every template exercise plus a few
+# joint-friendly alternates. On first use it is turned into a
+# substitution graph: for each exercise, every other exercise that shares
+# muscles, ranked by muscle overlap with a bonus for the same pattern.
+#
+# parse_notes() maps free-text notes ("knee pain", "lower back") to a
+# frozenset of restricted joints; safe_substitutes() walks an exercise's
+# ranked neighbours for the ones that avoid them. Both are memoised,
+# so after warm-up a plan adds a couple of dict lookups per item.
+#
+# Notes are read as English. Longer phrases win ("upper back pain" is not
+# "back pain"), and a phrase is dropped when "no", "not", "without" or
+# "never" comes at most two words before it in the same clause, or when it
+# is listed straight after a dropped one ("no knee or shoulder pain"). A
+# negation after the phrase ("knee is fine") or one spanning clauses is not
+# understood, and the phrase still counts.
+#
+# No planner imports here: gym_planner builds on this module.
+
+import re
+from functools import lru_cache
+
+
+KNEE, LOWER_BACK, SHOULDER, WRIST, ELBOW, ANKLE, HIP = (
+    "knee", "lower back", "shoulder", "wrist", "elbow", "ankle", "hip",
+)
+NO_RESTRICTIONS = frozenset()
+
+NOTE_PHRASES = {
+    KNEE: ("knee", "knees", "acl", "mcl", "meniscus", "patella", "patellar"),
+    LOWER_BACK: ("lower back", "low back", "back pain", "bad back", "lumbar", "slip disc",
+                 "slipped disc", "herniated", "disc bulge", "sciatica"),
+    SHOULDER: ("shoulder", "shoulders", "rotator cuff", "impingement"),
+    WRIST: ("wrist", "wrists", "carpal tunnel"),
+    ELBOW: ("elbow", "elbows", "tennis elbow", "golfer's elbow"),
+    ANKLE: ("ankle", "ankles", "achilles", "plantar fasciitis"),
+    HIP: ("hip", "hips"),
+}
+# recognised so that they are not read as a shorter phrase above, but no
+# exercise here loads them
+NEUTRAL_PHRASES = ("upper back", "upper-back", "mid back", "middle back")
+
+# id: (name, pattern, muscles, joints loaded, equipment)
+EXERCISE_INFO = {
+    # template exercises
+    "squats-leg-press": ("Squats / Leg Press", "squat", ("quads", "glutes", "adductors"), (KNEE, LOWER_BACK, HIP), "barbell / machine"),
+    "goblet-squat": ("Goblet Squat", "squat", ("quads", "glutes"), (KNEE,), "dumbbell"),
+    "walking-lunges": ("Walking Lunges", "lunge", ("quads", "glutes"), (KNEE, HIP, ANKLE), "bodyweight"),
+    "bodyweight-lunges": ("Bodyweight Lunges", "lunge", ("quads", "glutes"), (KNEE, ANKLE), "bodyweight"),
+    "leg-extension": ("Leg Extension", "knee-extension", ("quads",), (KNEE,), "machine"),
+    "leg-curl": ("Leg Curl", "knee-flexion", ("hamstrings",), (KNEE,), "machine"),
+    "leg-curls": ("Leg Curls", "knee-flexion", ("hamstrings",), (KNEE,), "machine"),
+    "romanian-deadlift": ("Romanian Deadlift", "hinge", ("hamstrings", "glutes", "lower-back"), (LOWER_BACK,), "barbell"),
+    "deadlift-variation-light": ("Deadlift variation (light)", "hinge", ("hamstrings", "glutes", "lower-back"), (LOWER_BACK,), "barbell"),
+    "calf-raises": ("Calf Raises", "calf", ("calves",), (ANKLE,), "machine"),
+    "push-ups-or-bench-press": ("Push-ups or Bench Press", "horizontal-push", ("chest", "triceps", "front-delts"), (SHOULDER, WRIST), "bench"),
+    "bench-press-machine-press": ("Bench Press / Machine Press", "horizontal-push", ("chest", "triceps", "front-delts"), (SHOULDER,), "bench / machine"),
+    "incline-dumbbell-press": ("Incline Dumbbell Press", "horizontal-push", ("chest", "front-delts", "triceps"), (SHOULDER,), "dumbbells"),
+    "dumbbell-bench-press": ("Dumbbell Bench Press", "horizontal-push", ("chest", "triceps", "front-delts"), (SHOULDER,), "dumbbells"),
+    "cable-machine-chest-fly": ("Cable / Machine Chest Fly", "chest-fly", ("chest", "front-delts"), (SHOULDER,), "cable / machine"),
+    "dumbbell-shoulder-press": ("Dumbbell Shoulder Press", "vertical-push", ("front-delts", "triceps"), (SHOULDER, ELBOW), "dumbbells"),
+    "shoulder-press": ("Shoulder Press", "vertical-push", ("front-delts", "triceps"), (SHOULDER,), "machine / dumbbells"),
+    "overhead-press": ("Overhead Press", "vertical-push", ("front-delts", "triceps"), (SHOULDER, LOWER_BACK), "barbell"),
+    "lateral-raises": ("Lateral Raises", "lateral-raise", ("side-delts",), (SHOULDER,), "dumbbells"),
+    "lat-pulldown-assisted-pull-ups": ("Lat Pulldown / Assisted Pull-ups", "vertical-pull", ("lats", "biceps", "upper-back"), (SHOULDER, ELBOW), "cable"),
+    "lat-pulldown-pull-ups": ("Lat Pulldown / Pull-ups", "vertical-pull", ("lats", "biceps", "upper-back"), (SHOULDER, ELBOW), "cable / bar"),
+    "lat-pulldown": ("Lat Pulldown", "vertical-pull", ("lats", "biceps", "upper-back"), (SHOULDER,), "cable"),
+    "one-arm-dumbbell-row": ("One-arm Dumbbell Row", "horizontal-pull", ("lats", "upper-back", "biceps"), (), "dumbbell"),
+    "seated-cable-row": ("Seated Cable Row", "horizontal-pull", ("lats", "upper-back", "biceps"), (), "cable"),
+    "seated-row": ("Seated Row", "horizontal-pull", ("lats", "upper-back", "biceps"), (), "cable / machine"),
+    "face-pulls": ("Face Pulls", "rear-delt", ("rear-delts", "upper-back"), (), "cable"),
+    "barbell-dumbbell-curls": ("Barbell / Dumbbell Curls", "elbow-flexion", ("biceps",), (ELBOW, WRIST), "barbell / dumbbells"),
+    "hammer-curls": ("Hammer Curls", "elbow-flexion", ("biceps", "forearms"), (ELBOW,), "dumbbells"),
+    "triceps-rope-pushdown": ("Triceps Rope Pushdown", "elbow-extension", ("triceps",), (ELBOW,), "cable"),
+    "plank": ("Plank", "core-anti-extension", ("abs", "obliques"), (SHOULDER,), "bodyweight"),
+    "plank-leg-raises": ("Plank + Leg Raises", "core-flexion", ("abs", "hip-flexors"), (LOWER_BACK,), "bodyweight"),
+    "russian-twists": ("Russian twists", "core-rotation", ("obliques", "abs"), (LOWER_BACK,), "bodyweight"),
+    "light-core-work-deadbugs-side-plank": ("Light core work (deadbugs, side plank)", "core-anti-extension", ("abs", "obliques"), (), "bodyweight"),
+    "mountain-climbers": ("Mountain climbers", "cardio-intervals", ("conditioning", "abs"), (WRIST, SHOULDER), "bodyweight"),
+    "hiit-30s-fast-60s-slow-8-rounds": ("HIIT: 30s fast, 60s slow × 8 rounds", "cardio-intervals", ("conditioning",), (KNEE, ANKLE), "treadmill"),
+    "treadmill-walk-incline": ("Treadmill walk / incline", "cardio-steady", ("conditioning",), (ANKLE,), "treadmill"),
+    "cycling-cross-trainer": ("Cycling / cross-trainer", "cardio-steady", ("conditioning",), (), "bike / cross-trainer"),
+    "10-15-mins-light-cardio": ("10–15 mins light cardio", "cardio-steady", ("conditioning",), (), "any"),
+    "30-40-mins-brisk-walk-cycling": ("30–40 mins brisk walk / cycling", "cardio-steady", ("conditioning",), (), "any"),
+    "dynamic-stretches-hips-shoulders-hamstrings": ("Dynamic stretches (hips, shoulders, hamstrings)", "mobility", ("mobility",), (), "none"),
+    "10-mins-cool-down-walk-stretching": ("10 mins cool-down walk + stretching", "mobility", ("mobility",), (), "none"),
+    # joint-friendly alternates, only used as substitutes
+    "glute-bridge-hip-thrust": ("Glute Bridge / Hip Thrust", "hip-extension", ("glutes", "hamstrings"), (), "bench / barbell"),
+    "cable-pull-through": ("Cable Pull-through", "hinge", ("glutes", "hamstrings"), (), "cable"),
+    "straight-leg-raises": ("Straight-leg Raises", "knee-extension", ("quads", "hip-flexors"), (), "bodyweight"),
+    "neutral-grip-floor-press": ("Neutral-grip Dumbbell Floor Press", "horizontal-push", ("chest", "triceps"), (ELBOW,), "dumbbells"),
+    "landmine-press": ("Landmine Press", "vertical-push", ("front-delts", "triceps", "chest"), (), "barbell"),
+    "chest-supported-row": ("Chest-supported Row", "horizontal-pull", ("lats", "upper-back", "biceps", "rear-delts"), (), "bench / machine"),
+    "dead-bug": ("Dead Bug", "core-anti-extension", ("abs",), (), "bodyweight"),
+    "pallof-press": ("Pallof Press", "core-rotation", ("obliques", "abs"), (), "cable / band"),
+    "bike-intervals": ("Bike intervals: 30s fast, 60s easy × 8 rounds", "cardio-intervals", ("conditioning",), (), "bike"),
+}
+
+SAME_PATTERN_BONUS = 0.5
+
+
+# ---------- SUBSTITUTION GRAPH ----------
+
+def _similarity(a, b):
+    _, pattern_a, muscles_a, _, _ = EXERCISE_INFO[a]
+    _, pattern_b, muscles_b, _, _ = EXERCISE_INFO[b]
+    shared = set(muscles_a) & set(muscles_b)
+    if not shared:
+        return 0.0
+    score = len(shared) / len(set(muscles_a) | set(muscles_b))
+    return score + (SAME_PATTERN_BONUS if pattern_a == pattern_b else 0.0)
+
+
+# exercise id -> ids that work the same muscles, best match first; built
+# on first use so importing the module stays cheap
+@lru_cache(maxsize=None)
+def _substitutes():
+    graph = {}
+    for a in EXERCISE_INFO:
+        scored = [(_similarity(a, b), b) for b in EXERCISE_INFO if b != a]
+        graph[a] = tuple(b for score, b in sorted(scored, key=lambda sb: -sb[0]) if score > 0)
+    return graph
+
+
+JOINTS_LOADED = {ex_id: frozenset(info[3]) for ex_id, info in EXERCISE_INFO.items()}
+
+
+# ---------- NOTES ----------
+
+@lru_cache(maxsize=None)
+def _note_pattern():
+    phrases = sorted((re.escape(p) for p in _PHRASE_JOINT), key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(phrases) + r")\b", re.IGNORECASE)
+
+
+_PHRASE_JOINT = {phrase: joint for joint, phrases in NOTE_PHRASES.items() for phrase in phrases}
+_PHRASE_JOINT.update(dict.fromkeys(NEUTRAL_PHRASES))
+
+# a negation and at most two words, up to where a phrase starts
+_NEGATION = re.compile(r"\b(?:no|not|without|never)\W+(?:\w+\W+){0,2}$", re.IGNORECASE)
+_CLAUSE_BREAK = re.compile(r"[.,;:!?()\n]|\bbut\b", re.IGNORECASE)
+# what may sit between two phrases of one list
+_LIST_GAP = re.compile(r"(?:[\s,/&]|\b(?:and|or|nor)\b)*", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def parse_notes(notes):
+    if not notes:
+        return NO_RESTRICTIONS
+    joints = set()
+    end = 0
+    negated = False
+    for m in _note_pattern().finditer(notes):
+        if not (negated and _LIST_GAP.fullmatch(notes, end, m.start())):
+            clause = _CLAUSE_BREAK.split(notes[end:m.start()])[-1]
+            negated = _NEGATION.search(clause) is not None
+        joint = _PHRASE_JOINT[m.group(1).lower()]
+        if joint is not None and not negated:
+            joints.add(joint)
+        end = m.end()
+    return frozenset(joints) if joints else NO_RESTRICTIONS
+
+
+# ---------- SUBSTITUTION ----------
+
+_PRESCRIPTION = re.compile(r"^\d+(?:×\d+(?:–\d+)?s?| sets|(?:–\d+)? mins?)")
+
+
+@lru_cache(maxsize=None)
+def safe_substitutes(exercise_id, restrictions):
+    # exercise_id itself if it is safe (or unknown), otherwise its safe
+    # neighbours, closest first; empty when nothing comparable is safe
+    loaded = JOINTS_LOADED.get(exercise_id)
+    if loaded is None or not loaded & restrictions:
+        return (exercise_id,)
+    return tuple(c for c in _substitutes()[exercise_id] if not JOINTS_LOADED[c] & restrictions)
+
+
+def adapt_item(text, exercise_id, restrictions, exclude=()):
+    # Display line for a template item under the restrictions, or None to
+    # drop it. Substitutes already in `exclude` (the rest of the day) are
+    # skipped, and only the sets / reps part of the prescription is kept.
+    for replacement in safe_substitutes(exercise_id, restrictions):
+        if replacement == exercise_id:
+            return text
+        if replacement not in exclude:
+            break
+    else:
+        return None
+    name = EXERCISE_INFO[replacement][0]
+    m = _PRESCRIPTION.match(text.partition(" – ")[2])
+    return f"{name} – {m.group()}" if m else name
@@ -0,0 +1,423 @@
+# Smart Gym Planner - opt-in instrumentation and profiling
+#
+#   import gym_instrument
+#   gym_instrument.enable(track_allocations=True)
+#   ... generate plans ...
+#   print(gym_instrument.to_prometheus())
+#
+# Nothing is wrapped until enable() is called: it swaps each hot-path
+# function for a timing wrapper in every loaded gym_* module (and __main__)
+# that refers to it, and disable() puts the originals back. Disabled, the
+# planning code runs exactly as before, with no flag checks on the hot path.
+#
+# GYM_PLANNER_METRICS=metrics.prom (or .json) turns it on from the
+# environment and writes the metrics at exit; the batch CLI has --metrics and
+# --profile flags for the same thing.
+
+import atexit
+import cProfile
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+
+# stage name: (module, attribute path); modules that are not loaded when
+# enable() runs (e.g. the GUI ones on a server) are skipped
+STAGES = {
+    "calculate_bmi": ("gym_planner", "calculate_bmi"),
+    "get_workout_plan": ("gym_planner", "get_workout_plan"),
+    "get_restricted_workout_plan": ("gym_planner", "get_restricted_workout_plan"),
+    "get_diet_plan": ("gym_planner", "get_diet_plan"),
+    "get_general_tips": ("gym_planner", "get_general_tips"),
+    "format_plan": ("gym_render", "format_plan"),
+    "render_plan": ("gym_render", "render_plan"),
+    "render_static_sections": ("gym_render", "_static_sections"),
+    "export_pdf": ("gym_export", "render_pdf"),
+    "plan_meals": ("gym_nutrition", "plan_meals"),
+    "service_build_response": ("gym_service", "build_plan_response"),
+    "gui_image_load": ("gym_images", "load_resized"),
+    "gui_show_sections": ("gym_planner_app", "GymPlannerApp.show_sections"),
+}
+
+SAMPLE_INTERVAL = 0.001   # seconds between stack samples in profile()
+CO_GENERATOR = 0x20       # code flag (inspect is slow to import for one constant)
+FOLD_EVERY = 4096         # pending durations per stage before they are summed
+
+
+class StageStats:
+    # Wrappers only append call durations to `pending` (deque.append is
+    # atomic, so the hot path takes no lock); they are folded into the
+    # totals every FOLD_EVERY calls and whenever the stats are read.
+    __slots__ = ("calls", "errors", "total_ns", "max_ns", "alloc_bytes", "pending")
+
+    def __init__(self):
+        self.pending = deque()
+        self.clear()
+
+    def clear(self):
+        # wrappers hold on to `pending`, so it is emptied, never replaced
+        self.pending.clear()
+        self.calls = self.errors = self.total_ns = self.max_ns = self.alloc_bytes = 0
+
+    def fold(self):
+        pop = self.pending.popleft
+        with _lock:
+            while True:
+                try:
+                    elapsed = pop()
+                except IndexError:
+                    return
+                self.calls += 1
+                self.total_ns += elapsed
+                if elapsed > self.max_ns:
+                    self.max_ns = elapsed
+
+    def as_dict(self):
+        self.fold()
+        return {"calls": self.calls, "errors": self.errors, "total_ns": self.total_ns,
+                "max_ns": self.max_ns, "alloc_bytes": self.alloc_bytes}
+
+
+_lock = threading.RLock()
+_stats = {}
+_counters = Counter()
+_patched = []           # (owner, attribute, original)
+_track_allocations = False
+
+
+# ---------- RECORDING ----------
+
+def _stage(stage):
+    with _lock:
+        stats = _stats.get(stage)
+        if stats is None:
+            stats = _stats[stage] = StageStats()
+        return stats
+
+
+def _record(stats, elapsed_ns, alloc, failed):
+    with _lock:
+        stats.calls += 1
+        stats.errors += failed
+        stats.total_ns += elapsed_ns
+        if elapsed_ns > stats.max_ns:
+            stats.max_ns = elapsed_ns
+        stats.alloc_bytes += alloc
+
+
+def count(name, n=1):
+    # free-form counter, e.g. count("plans_written")
+    with _lock:
+        _counters[name] += n
+
+
+@contextmanager
+def timed(stage):
+    # for stages that are not a single function, e.g. a batch write loop
+    clock = time.perf_counter_ns
+    alloc_before = tracemalloc.get_traced_memory()[0] if _track_allocations else 0
+    start = clock()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        alloc = tracemalloc.get_traced_memory()[0] - alloc_before if _track_allocations else 0
+        _record(_stage(stage), clock() - start, alloc, failed)
+
+
+def _wrap(stage, fn):
+    # Everything the wrapper needs is bound here, so a timed call costs two
+    # clock reads and a deque append on top of the original.
+    clock = time.perf_counter_ns
+    stats = _stage(stage)
+    if _track_allocations:
+        return _wrap_tracking(stats, fn)
+    pending = stats.pending
+    append = pending.append
+    fold = stats.fold
+
+    if _is_generator(fn):
+        def wrapper(*args, **kwargs):
+            # time spent producing chunks, not time the caller holds the generator
+            gen = fn(*args, **kwargs)
+            elapsed = 0
+            failed = True
+            try:
+                while True:
+                    start = clock()
+                    try:
+                        chunk = next(gen)
+                    except StopIteration:
+                        failed = False
+                        return
+                    finally:
+                        elapsed += clock() - start
+                    yield chunk
+            finally:
+                _record(stats, elapsed, 0, failed)
+    else:
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                with _lock:
+                    stats.errors += 1
+                raise
+            finally:
+                append(clock() - start)
+                if len(pending) >= FOLD_EVERY:
+                    fold()
+
+    return _named(wrapper, fn)
+
+
+def _wrap_tracking(stats, fn):
+    clock = time.perf_counter_ns
+    get_memory = tracemalloc.get_traced_memory
+
+    if _is_generator(fn):
+        def wrapper(*args, **kwargs):
+            gen = fn(*args, **kwargs)
+            elapsed = alloc = 0
+            failed = True
+            try:
+                while True:
+                    before = get_memory()[0]
+                    start = clock()
+                    try:
+                        chunk = next(gen)
+                    except StopIteration:
+                        failed = False
+                        return
+                    finally:
+                        elapsed += clock() - start
+                        alloc += get_memory()[0] - before
+                    yield chunk
+            finally:
+                _record(stats, elapsed, alloc, failed)
+    else:
+        def wrapper(*args, **kwargs):
+            before = get_memory()[0]
+            start = clock()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _record(stats, clock() - start, get_memory()[0] - before, failed)
+
+    return _named(wrapper, fn)
+
+
+def _is_generator(fn):
+    code = getattr(fn, "__code__", None)
+    return code is not None and bool(code.co_flags & CO_GENERATOR)
+
+
+def _named(wrapper, fn):
+    wrapper.__wrapped__ = fn
+    wrapper.__name__ = getattr(fn, "__name__", wrapper.__name__)
+    wrapper.__qualname__ = getattr(fn, "__qualname__", wrapper.__qualname__)
+    wrapper.__doc__ = getattr(fn, "__doc__", None)
+    for name in ("cache_info", "cache_clear"):  # lru_cache'd stages
+        if hasattr(fn, name):
+            setattr(wrapper, name, getattr(fn, name))
+    return wrapper
+
+
+# ---------- ENABLE / DISABLE ----------
+
+def _resolve(module_name, path):
+    owner = sys.modules.get(module_name)
+    if owner is None:
+        # `python gym_planner_app.py` runs the module as __main__
+        main = sys.modules.get("__main__")
+        if os.path.basename(getattr(main, "__file__", None) or "") != module_name + ".py":
+            return None, None, None
+        owner = main
+    *parents, attr = path.split(".")
+    for name in parents:
+        owner = getattr(owner, name)
+    return owner, attr, getattr(owner, attr)
+
+
+def enable(track_allocations=False):
+    global _track_allocations
+    if _patched:
+        return
+    _track_allocations = track_allocations
+    if track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    modules = [m for name, m in list(sys.modules.items())
+               if m is not None and (name.startswith("gym_") or name == "__main__")]
+    for stage, (module_name, path) in STAGES.items():
+        owner, attr, original = _resolve(module_name, path)
+        if owner is None:
+            continue
+        wrapper = _wrap(stage, original)
+        _patched.append((owner, attr, original))
+        setattr(owner, attr, wrapper)
+        if "." in path:
+            continue  # methods are looked up through the class
+        # modules that did `from gym_planner import get_workout_plan`
+        for module in modules:
+            if module is not owner and getattr(module, attr, None) is original:
+                _patched.append((module, attr, original))
+                setattr(module, attr, wrapper)
+
+
+def disable():
+    global _track_allocations
+    while _patched:
+        owner, attr, original = _patched.pop()
+        setattr(owner, attr, original)
+    if _track_allocations and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _track_allocations = False
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def reset():
+    with _lock:
+        for stats in _stats.values():
+            stats.clear()
+        _counters.clear()
+
+
+# ---------- EXPORT ----------
+
+def snapshot():
+    with _lock:
+        stages = {stage: s.as_dict() for stage, s in sorted(_stats.items())}
+        return {
+            "stages": {stage: s for stage, s in stages.items() if s["calls"]},
+            "counters": dict(sorted(_counters.items())),
+            "tracking_allocations": _track_allocations,
+        }
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+
+def to_prometheus(prefix="gym_planner"):
+    snap = snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_calls_total Calls per plan generation stage.",
+        f"# TYPE {prefix}_stage_calls_total counter",
+    ]
+    stages = snap["stages"]
+    lines += [f'{prefix}_stage_calls_total{{stage="{k}"}} {s["calls"]}' for k, s in stages.items()]
+    lines += [f"# HELP {prefix}_stage_errors_total Calls that raised.",
+              f"# TYPE {prefix}_stage_errors_total counter"]
+    lines += [f'{prefix}_stage_errors_total{{stage="{k}"}} {s["errors"]}' for k, s in stages.items()]
+    lines += [f"# HELP {prefix}_stage_seconds_total Time spent per stage.",
+              f"# TYPE {prefix}_stage_seconds_total counter"]
+    lines += [f'{prefix}_stage_seconds_total{{stage="{k}"}} {s["total_ns"] / 1e9:.9f}' for k, s in stages.items()]
+    lines += [f"# HELP {prefix}_stage_seconds_max Slowest single call per stage.",
+              f"# TYPE {prefix}_stage_seconds_max gauge"]
+    lines += [f'{prefix}_stage_seconds_max{{stage="{k}"}} {s["max_ns"] / 1e9:.9f}' for k, s in stages.items()]
+    if snap["tracking_allocations"]:
+        lines += [f"# HELP {prefix}_stage_alloc_bytes_total Net traced allocation per stage.",
+                  f"# TYPE {prefix}_stage_alloc_bytes_total counter"]
+        lines += [f'{prefix}_stage_alloc_bytes_total{{stage="{k}"}} {s["alloc_bytes"]}' for k, s in stages.items()]
+    if snap["counters"]:
+        lines += [f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{event="{k}"}} {v}' for k, v in snap["counters"].items()]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    text = to_prometheus() if path.endswith((".prom", ".txt")) else to_json() + "\n"
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def enable_from_env():
+    path = os.environ.get("GYM_PLANNER_METRICS")
+    if path:
+        enable(track_allocations=bool(os.environ.get("GYM_PLANNER_TRACK_ALLOCATIONS")))
+        atexit.register(write_metrics, path)
+
+
+# ---------- PROFILING ----------
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _StackSampler:
+    # Counts collapsed stacks ("outer;inner;leaf", the input format of
+    # flamegraph.pl and speedscope) of the calling thread every `interval`
+    # seconds of CPU time. On Unix a SIGPROF timer interrupts the thread
+    # itself; elsewhere a helper thread reads sys._current_frames(), which
+    # only sees the stack when the profiled thread releases the GIL.
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._thread = threading.Thread(target=self._poll, args=(threading.get_ident(),),
+                                            name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        else:
+            self._stop_event.set()
+            self._thread.join()
+
+    def _on_signal(self, signum, frame):
+        self.stacks[_collapse(frame)] += 1
+
+    def _poll(self, thread_id):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+@contextmanager
+def profile(prefix):
+    # Writes <prefix>.pstats (cProfile, for pstats / snakeviz) and
+    # <prefix>.folded (sampled stacks, for flamegraphs).
+    sampler = _StackSampler()
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(prefix + ".pstats")
+        with open(prefix + ".folded", "w", encoding="utf-8") as fh:
+            for stack, samples in sampler.stacks.most_common():
+                fh.write(f"{stack} {samples}\n")
@@ -0,0 +1,451 @@
+# Smart Gym Planner - localised plans: message catalogs, units and numbers
+#
+# Usage:
+#   python gym_batch.py roster.csv --locale hi -o plans.txt
+#   GYM_PLANNER_LOCALE=en-US python gym_planner_app.py
+#   curl 'localhost:8080/plan?...&lang=de'
+#   python gym_locale.py list
+#   python gym_locale.py check locales/hi.json            # untranslated / stale messages
+#   python gym_locale.py template locales/hi.json > new.json  # add new messages to a catalog
+#
+# A catalog (locales/<code>.json) maps English text to the locale's text:
+# the renderer labels (LABELS), input values ("beginner", "Fat Loss", ...)
+# and everything in the rule file. It also names the unit system plans are
+# shown in ("imperial": ft/in, lb, oz, fl oz) and the decimal separator.
+# Untranslated text stays English; "en" is built in and never reads a file.
+#
+# A catalog is compiled once per process, on first use, into a Locale: the
+# labels become attributes, the messages a dict, and the message keys one
+# regex (longest first) so text assembled from several messages - a summary
+# plus modifier sentences, a substituted exercise with its prescription -
+# is translated piece by piece; messages with {placeholders} match as
+# patterns. gym_render translates the plan records once per locale and
+# caches the rendered static sections per locale, so a localised plan costs
+# the same dict lookups per member as an English one.
+#
+# Quantities written with the unit attached ("150–180g", "2.5–3.5L") are
+# converted for imperial locales; protein targets stay in grams.
+
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+
+from gym_model import Day, DietPlan, Exercise, Meal, WorkoutPlan
+from gym_rules import DIET_TITLE
+from gym_validate import DEFAULT_UNITS, DIET_TEXT, GENDERS, GOAL_TEXT, TO_CANONICAL
+
+
+CATALOG_VERSION = 1
+DEFAULT_LOCALE = os.environ.get("GYM_PLANNER_LOCALE", "en")
+LOCALE_DIR = os.environ.get("GYM_PLANNER_LOCALES",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales"))
+
+CLOSING_NOTE = "This is a starting point. As your body responds, adjust food quantity and workout intensity."
+
+# Locale attribute -> English text (the catalog key)
+LABELS = {
+    "app_title": "Smart Gym Planner",
+    "your_plan": "Your Plan",
+    "plan_for": "Personalised plan for",
+    "overview": "Overview",
+    "workout_plan": "Workout Plan",
+    "meal_guidance": "Daily Meal Guidance",
+    "extra_rules": "Extra rules",
+    "extra_tips": "Extra Tips",
+    "age": "Age",
+    "years": "yrs",
+    "gender": "Gender",
+    "diet": "Diet",
+    "height": "Height",
+    "weight": "Weight",
+    "bmi": "BMI",
+    "not_available": "N/A",
+    "goal": "Goal",
+    "activity": "Activity",
+    "experience": "Experience",
+    "notes": "Notes",
+    "closing_note": CLOSING_NOTE,
+    "cm": "cm",
+    "kg": "kg",
+    "ft": "ft",
+    "inch": "in",
+    "lb": "lb",
+    "oz": "oz",
+    "fl_oz": "fl oz",
+}
+
+# gym_planner.get_bmi_status()
+BMI_STATUSES = ("Underweight", "Normal", "Overweight", "Obese", "N/A")
+
+G_PER_OZ = 28.349523125
+ML_PER_FL_OZ = 29.5735295625
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_QUANTITY = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)(?:–(\d+(?:\.\d+)?))?(g|L)\b")
+
+
+class LocaleError(ValueError):
+    pass
+
+
+class Locale:
+    # One compiled catalog. Read-only once built; shared between threads.
+    __slots__ = ("code", "name", "units", "decimal", "messages", "_pieces", "_templates",
+                 "_memo", "_heights", "_weights", "_version") + tuple(LABELS)
+
+    def __init__(self, code, name="", units="metric", decimal=".", messages=None):
+        self.code = code
+        self.name = name or code
+        self.units = units
+        self.decimal = decimal
+        self.messages = dict(messages or {})
+        for attr, english in LABELS.items():
+            setattr(self, attr, self.messages.get(english, english))
+        self._memo = {}
+        self._heights = {}   # per-member values repeat, so formatted numbers are memoised
+        self._weights = {}
+        self._version = None
+        self._pieces, self._templates = _compile_pieces(self.messages)
+
+    def __repr__(self):
+        return f"Locale({self.code!r}, units={self.units!r})"
+
+    @property
+    def version(self):
+        # hash of the catalog content, for caches of localised plans (like RuleIndex.version)
+        if self._version is None:
+            import hashlib
+
+            content = json.dumps([self.code, self.units, self.decimal, self.messages], sort_keys=True,
+                                 ensure_ascii=False)
+            self._version = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+        return self._version
+
+    # ---------- TEXT ----------
+
+    def value(self, text):
+        # an input value or label: exact matches only
+        return self.messages.get(text, text)
+
+    def text(self, text):
+        # rule text, possibly assembled from several messages
+        out = self._memo.get(text)
+        if out is None:
+            out = self.messages.get(text)
+            if out is None:
+                out = text if self._pieces is None else self._pieces.sub(self._piece, text)
+            if len(self._memo) >= 4096:
+                self._memo.clear()
+            self._memo[text] = out
+        return out
+
+    def _piece(self, match):
+        name = match.lastgroup
+        if name == "m":
+            return self.messages[match.group()]
+        template, fields = self._templates[name]
+        return template.format_map({f: self.text(match.group(g)) for f, g in fields})
+
+    def rule_text(self, text):
+        # text() plus quantities in this locale's units
+        out = self.text(text)
+        if self.units == "imperial":
+            out = _QUANTITY.sub(self._convert, out)
+        return out
+
+    def _convert(self, match):
+        low, high, unit = match.groups()
+        if unit == "g":
+            scale, digits, label = 1 / G_PER_OZ, 1, self.oz
+        else:
+            scale, digits, label = 1000 / ML_PER_FL_OZ, 0, self.fl_oz
+        amounts = [self.format_number(round(float(v) * scale, digits) if digits else round(float(v) * scale))
+                   for v in (low, high) if v is not None]
+        return "–".join(amounts) + " " + label
+
+    # ---------- NUMBERS ----------
+
+    def format_number(self, value, digits=None):
+        text = str(value) if digits is None else f"{value:.{digits}f}"
+        return text if self.decimal == "." else text.replace(".", self.decimal)
+
+    def format_height(self, cm):
+        out = self._heights.get(cm)
+        if out is None:
+            if self.units == "imperial":
+                feet, inches = divmod(round(cm / TO_CANONICAL["height"]["in"]), 12)
+                out = f"{feet} {self.ft} {inches} {self.inch}"
+            else:
+                out = f"{self.format_number(_trim(cm))} {self.cm}"
+            _remember(self._heights, cm, out)
+        return out
+
+    def format_weight(self, kg):
+        out = self._weights.get(kg)
+        if out is None:
+            if self.units == "imperial":
+                out = f"{self.format_number(_trim(kg / TO_CANONICAL['weight']['lb']))} {self.lb}"
+            else:
+                out = f"{self.format_number(_trim(kg))} {self.kg}"
+            _remember(self._weights, kg, out)
+        return out
+
+    def format_bmi(self, bmi, status):
+        if bmi is None:
+            return self.not_available
+        return f"{self.format_number(bmi, 1)} ({self.value(status)})"
+
+    # ---------- PLAN RECORDS ----------
+    # Called on a section cache miss only (see gym_render).
+
+    def translate_workout(self, plan):
+        days = tuple(
+            Day(self.text(day.name),
+                tuple(Exercise(ex.exercise_id, self.text(ex.name), ex.sets, ex.rep_low, ex.rep_high,
+                               ex.unit, self.rule_text(ex.text)) for ex in day.exercises))
+            for day in plan.days
+        )
+        return WorkoutPlan(self.text(plan.title), self.rule_text(plan.summary), days)
+
+    def translate_diet(self, diet):
+        meals = tuple(Meal(self.text(meal.name), tuple(map(self.rule_text, meal.items))) for meal in diet.meals)
+        return DietPlan(self.text(diet.title), self.text(diet.summary), meals,
+                        tuple(map(self.rule_text, diet.extras)))
+
+    def translate_tips(self, tips):
+        return tuple(map(self.rule_text, tips))
+
+
+def _trim(value):
+    # 154.0 -> 154, 154.32 -> 154.3; 170 and 170.0 format alike, so memo keys can mix them
+    value = round(float(value), 1)
+    return int(value) if value.is_integer() else value
+
+
+def _remember(memo, key, value):
+    if len(memo) >= 4096:
+        memo.clear()
+    memo[key] = value
+
+
+def _compile_pieces(messages):
+    # (regex, {group: (template, ((field, group), ...))}) over the keys that
+    # may appear inside longer text; input values and labels only match whole
+    if not messages:
+        return None, {}
+    exact_only = _exact_only()
+    literals, alternatives, templates = [], [], {}
+    for key in messages:
+        if key in exact_only or not key.strip():
+            continue
+        fields = _PLACEHOLDER.findall(key)
+        if not fields:
+            literals.append(key)
+            continue
+        name = f"t{len(templates)}"
+        parts, groups = [], []
+        for i, piece in enumerate(_PLACEHOLDER.split(key)):
+            if i % 2:
+                group = f"{name}_{len(groups)}"
+                groups.append((piece, group))
+                parts.append(f"(?P<{group}>.+?)")
+            else:
+                parts.append(re.escape(piece))
+        alternatives.append(f"(?P<{name}>{''.join(parts)})")
+        templates[name] = (messages[key], tuple(groups))
+    if literals:
+        literals.sort(key=len, reverse=True)
+        alternatives.append("(?P<m>" + "|".join(map(re.escape, literals)) + ")")
+    if not alternatives:
+        return None, templates
+    return re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)"), templates
+
+
+def _exact_only():
+    from gym_planner import current_rules
+
+    rules = current_rules()
+    return frozenset((*LABELS.values(), *GENDERS, *BMI_STATUSES, *GOAL_TEXT.values(), *DIET_TEXT.values(),
+                      *rules.experience_levels, *rules.activity_levels))
+
+
+ENGLISH = Locale("en", "English")
+
+
+# ---------- CATALOGS ----------
+
+def catalog_path(code, directory=None):
+    return os.path.join(directory or LOCALE_DIR, f"{code}.json")
+
+
+def read_catalog(path):
+    with open(path, encoding="utf-8") as fh:
+        try:
+            return json.load(fh)
+        except json.JSONDecodeError as exc:
+            raise LocaleError(f"{path}: {exc}") from None
+
+
+def compile_catalog(data, code=None, source="<catalog>"):
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+        raise LocaleError(f"{source}: expected a version {CATALOG_VERSION} message catalog")
+    units = data.get("units", "metric")
+    if units not in DEFAULT_UNITS:
+        raise LocaleError(f"{source}: units must be one of {', '.join(sorted(DEFAULT_UNITS))}")
+    messages = data.get("messages", {})
+    if not isinstance(messages, dict) or not all(isinstance(v, str) for v in messages.values()):
+        raise LocaleError(f"{source}: messages must map English text to text")
+    for key, text in messages.items():
+        if sorted(_PLACEHOLDER.findall(key)) != sorted(_PLACEHOLDER.findall(text)) and text:
+            raise LocaleError(f"{source}: {text!r} must keep the placeholders of {key!r}")
+    return Locale(code or data.get("locale", ""), data.get("name", ""), units, data.get("decimal", "."),
+                  {k: v for k, v in messages.items() if v})
+
+
+def available_locales(directory=None):
+    directory = directory or LOCALE_DIR
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    return ("en", *sorted(n[:-5] for n in names if n.endswith(".json")))
+
+
+def normalise_code(code):
+    # "hi_IN.UTF-8" -> "hi-IN"
+    language, _, region = code.split(".")[0].replace("_", "-").partition("-")
+    return f"{language.lower()}-{region.upper()}" if region else language.lower()
+
+
+def get_locale(code=None):
+    # a Locale for a code ("de", "en-US", "hi_IN"), falling back from the
+    # region to the language; raises LocaleError for unknown locales
+    if code is None:
+        return ENGLISH
+    if isinstance(code, Locale):
+        return code
+    return _locale_for(code)
+
+
+@lru_cache(maxsize=256)
+def _locale_for(code):
+    # per spelling, so a render with a code costs one dict lookup
+    return _load_locale(normalise_code(code))
+
+
+@lru_cache(maxsize=None)
+def _load_locale(code):
+    language = code.partition("-")[0]
+    for candidate in dict.fromkeys((code, language)):
+        path = catalog_path(candidate)
+        if os.path.exists(path):
+            return compile_catalog(read_catalog(path), candidate, source=path)
+        if candidate == "en":
+            return ENGLISH
+    raise LocaleError(f"no catalog for locale '{code}' (available: {', '.join(available_locales())})")
+
+
+@lru_cache(maxsize=256)
+def match_locale(accept_language):
+    # best available locale for an Accept-Language header, or None
+    ranked = []
+    for i, part in enumerate(accept_language.split(",")):
+        tag, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        if tag and tag != "*" and q > 0:
+            ranked.append((-q, i, tag))
+    for _, _, tag in sorted(ranked):
+        try:
+            return get_locale(tag)
+        except LocaleError:
+            continue
+    return None
+
+
+# ---------- SOURCE MESSAGES ----------
+
+def source_messages():
+    # every English text a plan can contain, in first-seen order
+    from gym_injuries import EXERCISE_INFO, NOTE_PHRASES
+    from gym_planner import current_rules
+    from gym_rules import read_rules
+
+    rules = current_rules()
+    found = dict.fromkeys(LABELS.values())
+    found.update(dict.fromkeys((*GENDERS, *BMI_STATUSES, *GOAL_TEXT.values(), *DIET_TEXT.values(),
+                                *rules.experience_levels, *rules.activity_levels)))
+
+    def walk(node):
+        if isinstance(node, str):
+            found[node] = None
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+        elif isinstance(node, dict):
+            for key, item in node.items():
+                if key not in ("version", "inputs", "fallback", "when"):
+                    walk(item)
+
+    found[DIET_TITLE] = None
+    walk(read_rules(rules.source))
+    found.update(dict.fromkeys(info[0] for info in EXERCISE_INFO.values()))
+    found.update(dict.fromkeys(NOTE_PHRASES))
+    return list(found)
+
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List, check or extend the plan message catalogs.")
+    parser.add_argument("command", choices=["list", "check", "template"])
+    parser.add_argument("catalog", nargs="?", help="catalog file (check / template)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for code in available_locales():
+            locale = get_locale(code)
+            print(f"{code}\t{locale.name}\t{locale.units}")
+        return 0
+
+    sources = source_messages()
+    data = {"version": CATALOG_VERSION, "locale": "", "name": "", "units": "metric", "decimal": ".",
+            "messages": {}}
+    if args.catalog:
+        data = read_catalog(args.catalog)
+        compile_catalog(data, source=args.catalog)
+
+    messages = data.get("messages", {})
+    if args.command == "template":
+        known = set(sources)
+        data["messages"] = {**{text: messages.get(text, "") for text in sources},
+                            **{k: v for k, v in messages.items() if k not in known}}
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return 0
+
+    if not args.catalog:
+        parser.error("check needs a catalog file")
+    # English variants only override what differs
+    english = normalise_code(data.get("locale", "")).partition("-")[0] == "en"
+    missing = [] if english else [text for text in sources if not messages.get(text)]
+    stale = [text for text in messages if text not in set(sources)]
+    for text in missing:
+        print(f"untranslated: {text!r}")
+    for text in stale:
+        print(f"not in the rules: {text!r}")
+    print(f"{len(sources) - len(missing)}/{len(sources)} messages translated, {len(stale)} stale",
+          file=sys.stderr)
+    return 1 if missing or stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+# Smart Gym Planner - plan and member records
+#
+# Plans and member profiles are immutable __slots__ records. Template text
+# is interned when records are built (and when they are decoded), so the
+# thousands of plans that share a template share its strings too. Records
+# keep mapping-style access (plan["days"], **profile) for older callers.
+#
+# dumps() / loads() give a compact binary form: a header with the schema
+# version, a table of the distinct strings in the record, then the fields as
+# varints / doubles / string-table indexes.
+
+import re
+import struct
+import sys
+from functools import lru_cache
+
+
+SCHEMA_VERSION = 1
+MAGIC = b"GPR"
+
+
+# ---------- RECORDS ----------
+
+def _restore(cls, values):
+    record = object.__new__(cls)
+    for field, value in zip(cls.__slots__, values):
+        object.__setattr__(record, field, value)
+    return record
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, *values, **fields):
+        slots = self.__slots__
+        if len(values) + len(fields) != len(slots) or not fields.keys() <= set(slots[len(values):]):
+            raise TypeError(f"{type(self).__name__} takes the fields {', '.join(slots)}")
+        for field, value in zip(slots, values):
+            object.__setattr__(self, field, value)
+        for field in slots[len(values):]:
+            object.__setattr__(self, field, fields[field])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __reduce__(self):
+        return _restore, (type(self), tuple(getattr(self, f) for f in self.__slots__))
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        return type(other) is type(self) and all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, f) for f in self.__slots__))
+
+    # mapping-style access
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def as_dict(self):
+        return {f: getattr(self, f) for f in self.__slots__}
+
+
+class Exercise(_Record):
+    # One prescribed workout item. `text` is the display line used by the
+    # renderers; the other fields are parsed from it for the engines.
+    __slots__ = ("exercise_id", "name", "sets", "rep_low", "rep_high", "unit", "text")
+    # unit: "reps", "s", "min" or None for free-form items
+
+    def __repr__(self):
+        return f"Exercise({self.exercise_id!r}, sets={self.sets}, reps={self.rep_low}-{self.rep_high} {self.unit})"
+
+    def __str__(self):
+        return self.text
+
+
+class Day(_Record):
+    # items are the exercises' display lines, kept for the renderers
+    __slots__ = ("name", "items", "exercises")
+
+    def __init__(self, name, exercises):
+        super().__init__(sys.intern(name), tuple(ex.text for ex in exercises), exercises)
+
+
+class WorkoutPlan(_Record):
+    __slots__ = ("title", "summary", "days")
+
+
+class Meal(_Record):
+    __slots__ = ("name", "items")
+
+
+class DietPlan(_Record):
+    __slots__ = ("title", "summary", "meals", "extras")
+
+
+class MemberProfile(_Record):
+    __slots__ = ("age", "gender", "height", "weight", "goal", "activity",
+                 "experience", "diet_pref", "name", "notes")
+
+    @classmethod
+    def from_mapping(cls, m):
+        return cls(*(m.get(f, "") for f in cls.__slots__))
+
+
+# ---------- EXERCISE PARSING ----------
+
+_SETS_REPS = re.compile(r"^(\d+)×(\d+)(?:–(\d+))?(s)?\b")
+_SETS_ONLY = re.compile(r"^(\d+) sets\b")
+_MINUTES = re.compile(r"^(\d+)(?:–(\d+))? mins?\b")
+
+
+def exercise_id(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+@lru_cache(maxsize=4096)
+def parse_exercise(text):
+    name, sep, prescription = text.partition(" – ")
+    sets = rep_low = rep_high = unit = None
+    if sep:
+        m = _SETS_REPS.match(prescription)
+        if m:
+            sets, rep_low = int(m.group(1)), int(m.group(2))
+            rep_high = int(m.group(3)) if m.group(3) else rep_low
+            unit = "s" if m.group(4) else "reps"
+        elif _SETS_ONLY.match(prescription):
+            sets = int(_SETS_ONLY.match(prescription).group(1))
+        elif _MINUTES.match(prescription):
+            m = _MINUTES.match(prescription)
+            sets, rep_low = 1, int(m.group(1))
+            rep_high = int(m.group(2)) if m.group(2) else rep_low
+            unit = "min"
+    return Exercise(sys.intern(exercise_id(name)), sys.intern(name), sets, rep_low, rep_high,
+                    unit, sys.intern(text))
+
+
+# ---------- BINARY FORM ----------
+# kind byte, then per record:
+#   Exercise       display text (the other fields are parsed back from it)
+#   Day            name, count, exercises
+#   WorkoutPlan    title, summary, count, days
+#   Meal           name, count, item strings
+#   DietPlan       title, summary, count, meals, count, extra strings
+#   MemberProfile  age, gender, height, weight, goal, activity, experience,
+#                  diet_pref, name, notes (height / weight as doubles)
+
+_KINDS = {WorkoutPlan: 1, DietPlan: 2, MemberProfile: 3}
+_DOUBLE = struct.Struct("<d")
+
+
+class _Writer:
+    __slots__ = ("strings", "body")
+
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+
+    def uint(self, n):
+        while n >= 0x80:
+            self.body.append((n & 0x7F) | 0x80)
+            n >>= 7
+        self.body.append(n)
+
+    def string(self, s):
+        self.uint(self.strings.setdefault(s, len(self.strings)))
+
+    def string_list(self, items):
+        self.uint(len(items))
+        for s in items:
+            self.string(s)
+
+    def double(self, x):
+        self.body += _DOUBLE.pack(x)
+
+    def getvalue(self, kind):
+        out = _Writer()
+        out.body += MAGIC
+        out.uint(SCHEMA_VERSION)
+        out.uint(kind)
+        out.uint(len(self.strings))
+        for s in self.strings:
+            data = s.encode("utf-8")
+            out.uint(len(data))
+            out.body += data
+        return bytes(out.body + self.body)
+
+
+class _Reader:
+    __slots__ = ("data", "pos", "strings")
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings = ()
+
+    def uint(self):
+        n = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    def string(self):
+        return self.strings[self.uint()]
+
+    def string_list(self):
+        return tuple(self.string() for _ in range(self.uint()))
+
+    def double(self):
+        (x,) = _DOUBLE.unpack_from(self.data, self.pos)
+        self.pos += _DOUBLE.size
+        return x
+
+    def read_strings(self):
+        strings = []
+        for _ in range(self.uint()):
+            size = self.uint()
+            strings.append(sys.intern(bytes(self.data[self.pos:self.pos + size]).decode("utf-8")))
+            self.pos += size
+        self.strings = tuple(strings)
+
+
+def _write_day(w, day):
+    w.string(day.name)
+    w.uint(len(day.exercises))
+    for ex in day.exercises:
+        w.string(ex.text)
+
+
+def _write_meal(w, meal):
+    w.string(meal.name)
+    w.string_list(meal.items)
+
+
+def dumps(record):
+    try:
+        kind = _KINDS[type(record)]
+    except KeyError:
+        raise TypeError(f"cannot serialise {type(record).__name__}") from None
+
+    w = _Writer()
+    if kind == 1:
+        w.string(record.title)
+        w.string(record.summary)
+        w.uint(len(record.days))
+        for day in record.days:
+            _write_day(w, day)
+    elif kind == 2:
+        w.string(record.title)
+        w.string(record.summary)
+        w.uint(len(record.meals))
+        for meal in record.meals:
+            _write_meal(w, meal)
+        w.string_list(record.extras)
+    else:
+        w.uint(int(record.age))
+        w.string(record.gender)
+        w.double(float(record.height))
+        w.double(float(record.weight))
+        for field in ("goal", "activity", "experience", "diet_pref", "name", "notes"):
+            w.string(getattr(record, field))
+    return w.getvalue(kind)
+
+
+def _load_v1(r, kind):
+    if kind == 1:
+        title, summary = r.string(), r.string()
+        days = tuple(Day(r.string(), tuple(parse_exercise(r.string()) for _ in range(r.uint())))
+                     for _ in range(r.uint()))
+        return WorkoutPlan(title, summary, days)
+    if kind == 2:
+        title, summary = r.string(), r.string()
+        meals = tuple(Meal(r.string(), r.string_list()) for _ in range(r.uint()))
+        return DietPlan(title, summary, meals, r.string_list())
+    if kind == 3:
+        age, gender, height, weight = r.uint(), r.string(), r.double(), r.double()
+        return MemberProfile(age, gender, height, weight, *(r.string() for _ in range(6)))
+    raise ValueError(f"unknown record kind {kind}")
+
+
+_LOADERS = {1: _load_v1}
+
+
+def loads(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a serialised plan record")
+    r = _Reader(memoryview(data))
+    r.pos = len(MAGIC)
+    version, kind = r.uint(), r.uint()
+    loader = _LOADERS.get(version)
+    if loader is None:
+        raise ValueError(f"unsupported plan record schema version {version}")
+    r.read_strings()
+    return loader(r, kind)
@@ -0,0 +1,338 @@
+# Smart Gym Planner - calorie / macro targets and meal solver
+#
+# Targets:
+#   * BMR from Mifflin-St Jeor (10w + 6.25h - 5a + 5 male / -161 female;
+#     "Other" uses the midpoint), times the activity factor -> TDEE
+#   * goal adjustment: -20% for fat loss, +10% for muscle gain
+#   * protein 1.6 g/kg (same figure as get_diet_plan), fat 25% of calories,
+#     carbs the rest
+#
+# Meals are solved against a small local food table. For every (diet level,
+# meal) the solver's search space - one protein source, one carb source and
+# an optional side at a range of servings - is expanded once into a macro
+# matrix, so a meal is a single vectorised argmin over a few thousand rows.
+#
+# Usage:
+#   python gym_nutrition.py roster.csv -j 8 > meals.txt
+#   python gym_nutrition.py roster.csv --cache plans.db > meals.txt   # reuse solved days
+
+import argparse
+import json
+import sys
+from functools import lru_cache, partial
+from multiprocessing import Pool
+
+import numpy as np
+
+
+ACTIVITY_FACTORS = {"sedentary": 1.2, "light": 1.375, "moderate": 1.55, "high": 1.725}
+GOAL_CALORIE_FACTORS = {"fat-loss": 0.8, "muscle-gain": 1.1, "fitness": 1.0}
+GENDER_OFFSETS = {"male": 5, "female": -161}
+PROTEIN_PER_KG = 1.6
+FAT_CALORIE_SHARE = 0.25
+MIN_CALORIES = 1200
+
+# (name, code used in the food table, share of the day's targets)
+MEALS = (
+    ("Breakfast", "B", 0.25),
+    ("Lunch", "L", 0.35),
+    ("Evening Snack", "S", 0.10),
+    ("Dinner", "D", 0.30),
+)
+
+# a veg food suits every preference, egg suits egg and non-veg eaters
+DIET_LEVELS = {"veg": 0, "egg": 1, "non-veg": 2}
+
+# error weights for (kcal, protein, carbs, fat), and the penalty for serving
+# a protein or carb food that already appeared earlier in the day
+MACRO_WEIGHTS = np.array([4.0, 2.0, 1.0, 1.0])
+REPEAT_PENALTY = 0.1
+
+PROTEIN, CARB, SIDE = "protein", "carb", "side"
+SERVINGS = {
+    PROTEIN: (0.5, 1, 1.5, 2, 2.5, 3),
+    CARB: (0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4),
+    SIDE: (1, 2),
+}
+
+
+# ---------- FOOD TABLE ----------
+# name, serving, kcal, protein g, carbs g, fat g, diet, role, meals (B/L/S/D)
+
+FOODS = (
+    ("Paneer", "100g", 265, 18.0, 1.2, 20.8, "veg", PROTEIN, "LD"),
+    ("Tofu", "100g", 144, 17.0, 3.0, 9.0, "veg", PROTEIN, "BLD"),
+    ("Dal", "1 katori (180g)", 150, 9.0, 22.0, 3.0, "veg", PROTEIN, "LD"),
+    ("Rajma / chole", "1 katori (180g)", 230, 12.0, 37.0, 4.0, "veg", PROTEIN, "LD"),
+    ("Soya chunks", "50g dry", 172, 26.0, 16.0, 0.3, "veg", PROTEIN, "LD"),
+    ("Greek curd", "200g", 146, 20.0, 8.0, 4.0, "veg", PROTEIN, "BS"),
+    ("Whey protein", "1 scoop (30g)", 120, 24.0, 3.0, 1.5, "veg", PROTEIN, "BS"),
+    ("Besan chilla", "2 pieces", 240, 12.0, 30.0, 8.0, "veg", PROTEIN, "B"),
+    ("Sprouts salad", "150g", 105, 8.0, 18.0, 1.0, "veg", PROTEIN, "S"),
+    ("Roasted chana", "50g", 185, 10.0, 29.0, 3.0, "veg", PROTEIN, "S"),
+    ("Boiled eggs", "2 eggs", 155, 13.0, 1.0, 11.0, "egg", PROTEIN, "BLSD"),
+    ("Egg whites", "4 whites", 68, 14.0, 1.0, 0.2, "egg", PROTEIN, "B"),
+    ("Egg bhurji", "3 eggs", 270, 19.0, 4.0, 20.0, "egg", PROTEIN, "BD"),
+    ("Chicken breast", "150g cooked", 248, 46.0, 0.0, 5.4, "non-veg", PROTEIN, "LD"),
+    ("Fish", "150g cooked", 200, 33.0, 0.0, 7.0, "non-veg", PROTEIN, "LD"),
+    ("Chicken sandwich", "1 sandwich", 320, 25.0, 32.0, 10.0, "non-veg", PROTEIN, "S"),
+    ("Phulka", "2 phulkas", 140, 5.0, 28.0, 1.0, "veg", CARB, "LD"),
+    ("Rice", "1 cup cooked", 205, 4.3, 45.0, 0.4, "veg", CARB, "LD"),
+    ("Oats", "50g dry", 190, 6.5, 33.0, 3.5, "veg", CARB, "B"),
+    ("Whole wheat bread", "2 slices", 160, 8.0, 28.0, 2.0, "veg", CARB, "BS"),
+    ("Poha", "1 plate", 250, 5.0, 45.0, 6.0, "veg", CARB, "B"),
+    ("Banana", "1 medium", 105, 1.3, 27.0, 0.4, "veg", CARB, "BS"),
+    ("Apple", "1 medium", 95, 0.5, 25.0, 0.3, "veg", CARB, "S"),
+    ("Toned milk", "250ml", 145, 8.0, 12.0, 7.5, "veg", SIDE, "BS"),
+    ("Mixed veg sabzi", "1 cup", 120, 3.0, 12.0, 7.0, "veg", SIDE, "LD"),
+    ("Salad bowl", "1 bowl", 50, 2.0, 10.0, 0.3, "veg", SIDE, "LD"),
+    ("Peanuts", "30g", 170, 7.7, 4.8, 14.8, "veg", SIDE, "S"),
+    ("Mixed nuts", "20g", 120, 4.0, 4.0, 10.0, "veg", SIDE, "BS"),
+    ("Buttermilk", "250ml", 40, 2.0, 5.0, 1.0, "veg", SIDE, "LS"),
+    ("Peanut butter", "1 tbsp", 95, 3.5, 3.0, 8.0, "veg", SIDE, "BS"),
+)
+
+_FOOD_MACROS = np.array([f[2:6] for f in FOODS], dtype=np.float64)
+
+
+# ---------- TARGETS ----------
+
+class NutritionTargets:
+    __slots__ = ("bmr", "tdee", "calories", "protein", "carbs", "fat")
+
+    def __init__(self, bmr, tdee, calories, protein, carbs, fat):
+        self.bmr = bmr
+        self.tdee = tdee
+        self.calories = calories
+        self.protein = protein
+        self.carbs = carbs
+        self.fat = fat
+
+
+def calculate_bmr(age, gender, height_cm, weight_kg):
+    offset = GENDER_OFFSETS.get(str(gender).lower(), sum(GENDER_OFFSETS.values()) / 2)
+    return 10 * weight_kg + 6.25 * height_cm - 5 * age + offset
+
+
+def calculate_targets(age, gender, height_cm, weight_kg, goal, activity):
+    bmr = calculate_bmr(age, gender, height_cm, weight_kg)
+    tdee = bmr * ACTIVITY_FACTORS.get(activity, ACTIVITY_FACTORS["moderate"])
+    calories = max(MIN_CALORIES, int(round(tdee * GOAL_CALORIE_FACTORS.get(goal, 1.0), -1)))
+    protein = round(weight_kg * PROTEIN_PER_KG)
+    fat = round(calories * FAT_CALORIE_SHARE / 9)
+    carbs = max(0, round((calories - protein * 4 - fat * 9) / 4))
+    return NutritionTargets(round(bmr), round(tdee), calories, protein, carbs, fat)
+
+
+# ---------- MEAL INDEX ----------
+
+def _role_options(level, meal_code, role):
+    # (food index, servings) for every food of this role allowed here
+    foods = [i for i, f in enumerate(FOODS)
+             if f[7] == role and DIET_LEVELS[f[6]] <= level and meal_code in f[8]]
+    return [(i, s) for i in foods for s in SERVINGS[role]]
+
+
+@lru_cache(maxsize=None)
+def meal_index(level, meal_code):
+    # Every candidate meal for this diet level and meal as parallel arrays:
+    # macros (n, 4), foods (n, 3) food indices (-1 = no side), servings (n, 3).
+    columns = []
+    for role in (PROTEIN, CARB, SIDE):
+        options = _role_options(level, meal_code, role)
+        if role == SIDE:
+            options.append((-1, 0))
+        food = np.array([i for i, _ in options], dtype=np.int64)
+        servings = np.array([s for _, s in options], dtype=np.float64)
+        macros = np.where(food[:, None] >= 0, _FOOD_MACROS[food] * servings[:, None], 0.0)
+        columns.append((food, servings, macros))
+
+    (fp, sp, mp), (fc, sc, mc), (fs, ss, ms) = columns
+    macros = (mp[:, None, None] + mc[None, :, None] + ms[None, None, :]).reshape(-1, 4)
+    grid = np.meshgrid(np.arange(len(fp)), np.arange(len(fc)), np.arange(len(fs)), indexing="ij")
+    p, c, s = (g.ravel() for g in grid)
+    foods = np.stack([fp[p], fc[c], fs[s]], axis=1)
+    servings = np.stack([sp[p], sc[c], ss[s]], axis=1)
+    for arr in (macros, foods, servings):
+        arr.flags.writeable = False
+    return macros, foods, servings
+
+
+# ---------- SOLVER ----------
+
+class Meal:
+    __slots__ = ("name", "items", "calories", "protein", "carbs", "fat")
+
+    def __init__(self, name, items, macros):
+        self.name = name
+        self.items = items            # ((food name, serving text, servings), ...)
+        self.calories, self.protein, self.carbs, self.fat = (round(float(v), 1) for v in macros)
+
+
+class MealPlan:
+    __slots__ = ("diet_pref", "targets", "meals", "calories", "protein", "carbs", "fat")
+
+    def __init__(self, diet_pref, targets, meals):
+        self.diet_pref = diet_pref
+        self.targets = targets
+        self.meals = meals
+        self.calories = round(sum(m.calories for m in meals))
+        self.protein = round(sum(m.protein for m in meals))
+        self.carbs = round(sum(m.carbs for m in meals))
+        self.fat = round(sum(m.fat for m in meals))
+
+
+def _solve_meal(level, meal_code, target, used):
+    macros, foods, _ = meal_index(level, meal_code)
+    scale = np.maximum(target, 1.0)
+    error = (((macros - target) / scale) ** 2) @ MACRO_WEIGHTS
+    if used:
+        error = error + REPEAT_PENALTY * np.isin(foods[:, :2], list(used)).sum(axis=1)
+    return int(np.argmin(error))
+
+
+@lru_cache(maxsize=4096)
+def _solve_day(level, calories, protein, carbs, fat):
+    day = np.array([calories, protein, carbs, fat], dtype=np.float64)
+    used = set()
+    meals = []
+    for name, code, share in MEALS:
+        row = _solve_meal(level, code, day * share, used)
+        macros, foods, servings = meal_index(level, code)
+        items = tuple((FOODS[f][0], FOODS[f][1], float(s))
+                      for f, s in zip(foods[row], servings[row]) if f >= 0)
+        used.update(int(f) for f in foods[row, :2])
+        meals.append(Meal(name, items, macros[row]))
+    return tuple(meals)
+
+
+def meal_plan_to_json(plan):
+    # the plan as plain JSON (the shared plan cache stores it like this)
+    t = plan.targets
+    return json.dumps([
+        plan.diet_pref,
+        [t.bmr, t.tdee, t.calories, t.protein, t.carbs, t.fat],
+        [[m.name, m.items, [m.calories, m.protein, m.carbs, m.fat]] for m in plan.meals],
+    ], ensure_ascii=False, separators=(",", ":"))
+
+
+def meal_plan_from_json(text):
+    diet_pref, targets, meals = json.loads(text)
+    return MealPlan(diet_pref, NutritionTargets(*targets),
+                    tuple(Meal(name, tuple(tuple(item) for item in items), macros)
+                          for name, items, macros in meals))
+
+
+def plan_meals(age, gender, height, weight, goal, activity, diet_pref):
+    targets = calculate_targets(age, gender, height, weight, goal, activity)
+    if diet_pref not in DIET_LEVELS:
+        diet_pref = "egg"
+    meals = _solve_day(DIET_LEVELS[diet_pref], targets.calories, targets.protein,
+                       targets.carbs, targets.fat)
+    return MealPlan(diet_pref, targets, meals)
+
+
+# ---------- BATCH ----------
+
+def _plan_member(indexed_row):
+    from gym_batch import parse_member
+    from gym_validate import row_id
+
+    index, row = indexed_row
+    member_id = row_id(row, index)
+    try:
+        m = parse_member(row)
+    except ValueError as exc:
+        return member_id, None, str(exc)
+    return member_id, plan_meals(m["age"], m["gender"], m["height"], m["weight"],
+                                 m["goal"], m["activity"], m["diet_pref"]), None
+
+
+MEAL_INPUTS = ("age", "gender", "height", "weight", "goal", "activity", "diet_pref")
+
+
+def _meal_inputs(member):
+    return tuple(member[f] for f in MEAL_INPUTS)
+
+
+def _solve(values):
+    return plan_meals(*values)
+
+
+def iter_meal_plans(rows, workers=None, chunksize=256, cache=None):
+    # cache: a gym_plancache.PlanCache; only members it has not seen are solved
+    if cache is not None:
+        yield from _iter_cached_meal_plans(rows, workers, chunksize, cache)
+        return
+
+    indexed = enumerate(rows, start=1)
+    if workers == 1:
+        yield from map(_plan_member, indexed)
+        return
+
+    with Pool(workers) as pool:
+        yield from pool.imap(_plan_member, indexed, chunksize=chunksize)
+
+
+def _iter_cached_meal_plans(rows, workers, chunksize, cache):
+    from gym_plancache import iter_cached
+
+    if workers == 1:
+        yield from iter_cached(rows, cache, "meals", _meal_inputs, lambda todo: list(map(_solve, todo)))
+        return
+    with Pool(workers) as pool:
+        yield from iter_cached(rows, cache, "meals", _meal_inputs, partial(pool.map, _solve, chunksize=chunksize))
+
+
+# ---------- TEXT OUTPUT ----------
+
+def _servings(n):
+    return f"{n:g} × " if n != 1 else ""
+
+
+def format_meal_plan(plan):
+    t = plan.targets
+    lines = [
+        f"BMR {t.bmr} kcal | TDEE {t.tdee} kcal",
+        f"Daily target: {t.calories} kcal | P {t.protein}g | C {t.carbs}g | F {t.fat}g",
+        f"Planned:      {plan.calories} kcal | P {plan.protein}g | C {plan.carbs}g | F {plan.fat}g",
+        "",
+    ]
+    for meal in plan.meals:
+        lines.append(f"- {meal.name} ({meal.calories:.0f} kcal, P {meal.protein:.0f}g)")
+        for food, serving, n in meal.items:
+            lines.append(f"    • {_servings(n)}{food} ({serving})")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    from gym_batch import read_roster
+    from gym_plancache import DEFAULT_CACHE_PATH, open_cache
+
+    parser = argparse.ArgumentParser(description="Solve daily meal plans for a member roster.")
+    parser.add_argument("roster", help="CSV or JSONL roster file ('-' for CSV on stdin)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=256)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, metavar="FILE",
+                        help="shared plan cache file, 'off' to solve every member "
+                             "(default: GYM_PLANNER_CACHE or off)")
+    args = parser.parse_args(argv)
+
+    cache = None if args.cache == "off" else open_cache(args.cache)
+    failed = 0
+    for member_id, plan, error in iter_meal_plans(read_roster(args.roster), args.workers, args.chunksize, cache):
+        if error is not None:
+            failed += 1
+            print(f"member {member_id}: {error}", file=sys.stderr)
+            continue
+        print(f"=== member {member_id} ===")
+        print(format_meal_plan(plan))
+    if cache is not None:
+        print(cache.summary(), file=sys.stderr)
+        cache.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# Smart Gym Planner - progressive overload engine
+#
+# Turns logged lift sessions into next-session targets for every
+# (member, exercise) pair in one vectorised pass:
+#
+#   * e1RM per logged set (Epley: load * (1 + reps / 30))
+#   * double progression: hit the top of the rep range -> add load and drop
+#     back to the bottom; otherwise keep the load and aim for one more rep
+#   * deload: e1RM fell two sessions running, or the bottom of the rep range
+#     was missed two sessions running -> scale the load by DEFAULT_DELOAD_FACTOR
+#
+# Rep ranges come from the member's own plan when targets_from_log() is
+# given one (goals prescribe the same lift differently: 3×10–12 squats for
+# fat loss, 4×8–10 for muscle gain), so targets follow whatever the plan
+# asks for. Without a plan the template prescription in
+# gym_planner.EXERCISES is used, which is the first one in the rule file.
+
+import numpy as np
+
+from gym_model import exercise_id
+from gym_planner import EXERCISES
+
+
+DEFAULT_REP_RANGE = (8, 12)
+PCT_INCREASE = 0.025     # load increase after hitting the top of the range
+MIN_INCREASE = 1.0       # kg, so light dumbbell work still moves up
+DEFAULT_DELOAD_FACTOR = 0.9
+LOAD_STEP = 0.5          # targets are rounded to this many kg
+
+HOLD, PROGRESS, DELOAD = 0, 1, 2
+STATUS_LABELS = ("hold", "progress", "deload")
+
+
+def estimate_1rm(load, reps):
+    load = np.asarray(load, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    return load * (1 + reps / 30)
+
+
+def _plan_exercises(plan):
+    # exercise id -> its prescription in a WorkoutPlan (first day wins)
+    found = {}
+    for day in plan.days:
+        for ex in day.exercises:
+            found.setdefault(ex.exercise_id, ex)
+    return found
+
+
+def rep_ranges(exercise_names, plan=None):
+    # (rep_low, rep_high) arrays for exercise ids / display names, from
+    # `plan` (a WorkoutPlan) where it has the exercise, else the templates;
+    # timed or free-form items and unknown exercises fall back to
+    # DEFAULT_REP_RANGE
+    own = _plan_exercises(plan) if plan is not None else {}
+    low = np.empty(len(exercise_names), dtype=np.int64)
+    high = np.empty(len(exercise_names), dtype=np.int64)
+    for i, name in enumerate(exercise_names):
+        key = exercise_id(name)
+        ex = own.get(key) or EXERCISES.get(key)
+        if ex is not None and ex.unit == "reps":
+            low[i], high[i] = ex.rep_low, ex.rep_high
+        else:
+            low[i], high[i] = DEFAULT_REP_RANGE
+    return low, high
+
+
+def _shift(values, n, fill):
+    out = np.full_like(values, fill)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+def compute_targets(member, exercise, day, load, reps, rep_low, rep_high,
+                    deload_factor=DEFAULT_DELOAD_FACTOR):
+    # member / exercise are integer codes, day is any sortable int (days since
+    # epoch); rep_low / rep_high are indexed by exercise code, or by
+    # (member code, exercise code) when ranges differ per member.
+    member = np.asarray(member, dtype=np.int64)
+    exercise = np.asarray(exercise, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    load = np.asarray(load, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    e1rm = estimate_1rm(load, reps)
+
+    # one row per (member, exercise, day): the set with the best e1RM
+    order = np.lexsort((e1rm, day, exercise, member))
+    member, exercise, day, load, reps, e1rm = (a[order] for a in (member, exercise, day, load, reps, e1rm))
+    last_of_session = np.ones(len(order), dtype=bool)
+    if len(order):
+        last_of_session[:-1] = (member[1:] != member[:-1]) | (exercise[1:] != exercise[:-1]) | (day[1:] != day[:-1])
+    member, exercise, day, load, reps, e1rm = (a[last_of_session] for a in (member, exercise, day, load, reps, e1rm))
+
+    n = len(member)
+    group_start = np.ones(n, dtype=bool)
+    if n:
+        group_start[1:] = (member[1:] != member[:-1]) | (exercise[1:] != exercise[:-1])
+    group_id = np.cumsum(group_start) - 1
+    starts = np.flatnonzero(group_start)
+    ends = np.append(starts[1:], n) - 1
+
+    rep_low, rep_high = np.asarray(rep_low), np.asarray(rep_high)
+    if rep_low.ndim == 2:
+        low, high = rep_low[member, exercise], rep_high[member, exercise]
+    else:
+        low, high = rep_low[exercise], rep_high[exercise]
+    low, high = low.astype(np.float64), high.astype(np.float64)
+
+    # previous sessions of the same (member, exercise); NaN when there are none
+    same1 = _shift(group_id, 1, -1) == group_id
+    same2 = _shift(group_id, 2, -1) == group_id
+    e1rm_prev = np.where(same1, _shift(e1rm, 1, np.nan), np.nan)
+    e1rm_prev2 = np.where(same2, _shift(e1rm, 2, np.nan), np.nan)
+    missed_prev = same1 & (_shift(reps, 1, np.inf) < _shift(low, 1, 0))
+
+    last = ends
+    declining = (e1rm[last] < e1rm_prev[last]) & (e1rm_prev[last] < e1rm_prev2[last])
+    missed = reps[last] < low[last]
+    deload = declining | (missed & missed_prev[last])
+    progress = ~deload & (reps[last] >= high[last])
+
+    last_load = load[last]
+    increase = np.maximum(last_load * PCT_INCREASE, MIN_INCREASE)
+    next_load = np.where(deload, last_load * deload_factor,
+                         np.where(progress, last_load + increase, last_load))
+    next_load = np.round(next_load / LOAD_STEP) * LOAD_STEP
+    next_reps = np.where(deload | progress, low[last], np.clip(reps[last] + 1, low[last], high[last]))
+
+    return {
+        "member": member[last],
+        "exercise": exercise[last],
+        "last_day": day[last],
+        "last_load": last_load,
+        "last_reps": reps[last].astype(np.int64),
+        "e1rm": e1rm[last],
+        "best_e1rm": np.maximum.reduceat(e1rm, starts) if n else e1rm[:0],
+        "sessions": ends - starts + 1,
+        "next_load": next_load,
+        "next_reps": next_reps.astype(np.int64),
+        "status": np.where(deload, DELOAD, np.where(progress, PROGRESS, HOLD)).astype(np.int8),
+    }
+
+
+def targets_from_log(progress_log, start=None, end=None, plans=None):
+    # Targets for every member / exercise in a gym_progress.ProgressLog.
+    # plans: {member_id: WorkoutPlan} (see gym_planner.get_workout_plan);
+    # members without one get the template rep ranges.
+    rows = progress_log.all_lifts(start, end)
+    names = progress_log.exercises.names
+    if plans is None:
+        low, high = rep_ranges(names)
+    else:
+        members = progress_log.members.names
+        low = np.empty((len(members), len(names)), dtype=np.int64)
+        high = np.empty_like(low)
+        for code, member_id in enumerate(members):
+            low[code], high[code] = rep_ranges(names, plans.get(member_id))
+    targets = compute_targets(rows["member"], rows["exercise"], rows["day"],
+                              rows["load"], rows["reps"], low, high)
+    targets["member_id"] = np.asarray(progress_log.members.names, dtype=object)[targets["member"]]
+    targets["exercise_id"] = np.asarray(progress_log.exercises.names, dtype=object)[targets["exercise"]]
+    return targets
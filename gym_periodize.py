@@ -0,0 +1,171 @@
+# Smart Gym Planner - multi-week periodised programs
+#
+# A program is 8–16 weeks of 4-week accumulation -> intensification blocks,
+# each ending in a deload week. Week blocks depend
+# only on (goal, experience, days per week, phase, wave), so they are built
+# once and shared by reference between weeks and between members; a whole
+# roster on the same settings holds one copy of each distinct week.
+
+from functools import lru_cache
+
+from gym_planner import get_workout_plan, on_rules_changed
+
+
+MIN_WEEKS, MAX_WEEKS = 8, 16
+MIN_DAYS, MAX_DAYS = 2, 6
+
+ACCUMULATION = "accumulation"
+INTENSIFICATION = "intensification"
+DELOAD = "deload"
+
+PHASE_NOTES = {
+    ACCUMULATION: "Build volume: moderate loads, 2–3 reps in reserve.",
+    INTENSIFICATION: "Heavier loads, fewer reps: 1–2 reps in reserve on main lifts.",
+    DELOAD: "Recovery week: ~60% of normal load, stop well short of failure.",
+}
+
+# extra sets on the main lifts (first two items of each day) by experience
+EXPERIENCE_SET_DELTA = {"beginner": -1, "intermediate": 0, "advanced": 1}
+MAIN_LIFTS_PER_DAY = 2
+
+
+class Prescription:
+    __slots__ = ("exercise", "sets", "rep_low", "rep_high", "text")
+
+    def __init__(self, exercise, sets, rep_low, rep_high, text):
+        self.exercise = exercise
+        self.sets = sets
+        self.rep_low = rep_low
+        self.rep_high = rep_high
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class ProgramDay:
+    __slots__ = ("name", "items")
+
+    def __init__(self, name, items):
+        self.name = name
+        self.items = items
+
+
+class WeekBlock:
+    __slots__ = ("phase", "wave", "note", "days")
+
+    def __init__(self, phase, wave, note, days):
+        self.phase = phase
+        self.wave = wave
+        self.note = note
+        self.days = days
+
+
+class Program:
+    __slots__ = ("goal", "experience", "activity", "days_per_week", "title", "summary", "weeks")
+
+    def __init__(self, goal, experience, activity, days_per_week, title, summary, weeks):
+        self.goal = goal
+        self.experience = experience
+        self.activity = activity
+        self.days_per_week = days_per_week
+        self.title = title
+        self.summary = summary
+        self.weeks = weeks
+
+
+# ---------- BLOCK LAYOUT ----------
+
+def block_layout(weeks):
+    # [(phase, wave), ...]: 4-week blocks, the first half accumulation and the
+    # rest intensification, each closed by a deload week. wave is the week
+    # number inside the block. A short last block ends on a deload if it has
+    # at least one training week before it.
+    blocks = -(-weeks // 4)
+    layout = []
+    for week in range(weeks):
+        block, wave = divmod(week, 4)
+        is_last = week == weeks - 1
+        if wave == 3 or (is_last and wave > 0):
+            layout.append((DELOAD, 1))
+        else:
+            layout.append((ACCUMULATION if block < -(-blocks // 2) else INTENSIFICATION, wave + 1))
+    return tuple(layout)
+
+
+# ---------- MEMOISED BUILDING BLOCKS ----------
+
+def _format_reps(low, high, unit):
+    reps = f"{low}" if low == high else f"{low}–{high}"
+    return reps + ("s" if unit == "s" else "")
+
+
+@lru_cache(maxsize=None)
+def _prescribe(exercise, phase, wave, set_delta):
+    if exercise.unit not in ("reps", "s") or exercise.sets is None:
+        return Prescription(exercise, exercise.sets, exercise.rep_low, exercise.rep_high, exercise.text)
+
+    sets, low, high = exercise.sets + set_delta, exercise.rep_low, exercise.rep_high
+    if phase == ACCUMULATION:
+        sets += min(wave - 1, 1)            # one extra set from the second week of a block
+    elif phase == INTENSIFICATION and exercise.unit == "reps":
+        low, high = max(3, low - 3), max(4, high - 3)
+    elif phase == DELOAD:
+        sets = (sets + 1) // 2
+    sets = max(1, sets)
+
+    text = f"{exercise.name} – {sets}×{_format_reps(low, high, exercise.unit)}"
+    return Prescription(exercise, sets, low, high, text)
+
+
+@lru_cache(maxsize=None)
+def _template_days(goal, days_per_week):
+    days = get_workout_plan(goal, "intermediate", "moderate").days
+    # more training days than template days: cycle through them again
+    return tuple(days[i % len(days)] for i in range(days_per_week))
+
+
+@lru_cache(maxsize=None)
+def week_block(goal, experience, days_per_week, phase, wave):
+    delta = EXPERIENCE_SET_DELTA.get(experience, 0)
+    days = []
+    for i, day in enumerate(_template_days(goal, days_per_week)):
+        items = tuple(
+            _prescribe(ex, phase, wave, delta if j < MAIN_LIFTS_PER_DAY else min(delta, 0))
+            for j, ex in enumerate(day.exercises)
+        )
+        days.append(ProgramDay(f"Session {i + 1} – {day.name.split(' – ', 1)[-1]}", items))
+    return WeekBlock(phase, wave, PHASE_NOTES[phase], tuple(days))
+
+
+@lru_cache(maxsize=4096)
+def build_program(goal, experience, activity, weeks=12, days_per_week=3):
+    if not MIN_WEEKS <= weeks <= MAX_WEEKS:
+        raise ValueError(f"weeks must be between {MIN_WEEKS} and {MAX_WEEKS}")
+    if not MIN_DAYS <= days_per_week <= MAX_DAYS:
+        raise ValueError(f"days_per_week must be between {MIN_DAYS} and {MAX_DAYS}")
+
+    plan = get_workout_plan(goal, experience, activity)
+    blocks = tuple(week_block(goal, experience, days_per_week, phase, wave)
+                   for phase, wave in block_layout(weeks))
+    return Program(goal, experience, activity, days_per_week,
+                   f"{weeks}-Week {plan.title}", plan.summary, blocks)
+
+
+for _cache in (_template_days, week_block, build_program):
+    on_rules_changed(_cache.cache_clear)
+del _cache
+
+
+# ---------- TEXT OUTPUT ----------
+
+def format_program(program):
+    lines = [program.title, program.summary, ""]
+    for number, week in enumerate(program.weeks, start=1):
+        lines.append(f"Week {number} – {week.phase.title()}: {week.note}")
+        for day in week.days:
+            lines.append(f"- {day.name}")
+            for item in day.items:
+                lines.append(f"    • {item}")
+        lines.append("")
+    return "\n".join(lines)
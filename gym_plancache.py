@@ -0,0 +1,390 @@
+# Smart Gym Planner - two-tier cache of generated plans
+#
+# Usage:
+#   GYM_PLANNER_CACHE=plans.db python gym_planner_app.py   # GUI, service and
+#   python gym_batch.py roster.csv --cache plans.db -o out  # batch share it
+#   python gym_plancache.py stats --cache plans.db
+#   python gym_plancache.py prune --cache plans.db --max-mb 64
+#
+# Generated output only depends on the normalised member inputs (see
+# gym_validate), what is generated (the "kind": "plan:text", "plan:json",
+# "plan:text:de:<catalog version>", "meals", ...) and the rule file. PlanCache keeps recent results in an
+# in-process LRU and, when a cache file is given, in an on-disk
+# content-addressed store shared by the desktop app, the batch CLIs and the
+# service: one SQLite table keyed by a hash of (CACHE_SCHEMA, rules version,
+# kind, inputs), bounded in size, least recently used entries evicted first.
+#
+# Invalidation is by version: results built under another rule file have
+# other keys, so they are never served and age out through LRU pruning.
+# A rule reload does not delete them: the file is shared, and other
+# processes may still be running the previous rules. use_rules() only
+# empties this process's memory tier. Bump CACHE_SCHEMA when a generator
+# changes its output for the same inputs.
+#
+# A disk hit costs a hash and an indexed read (~15 µs here, looked up a few
+# hundred at a time), so it pays for meal plans (~2 ms to solve) and is about
+# even with text plans, whose static sections gym_render already memoises.
+# That is why the disk tier is opt-in (GYM_PLANNER_CACHE / --cache).
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+
+from gym_planner import current_rules, on_rules_changed
+from gym_locale import ENGLISH, get_locale
+from gym_render import render_plan
+from gym_validate import MEMBER_FIELDS, validate_rows
+
+
+CACHE_SCHEMA = 2
+DEFAULT_CACHE_PATH = os.environ.get("GYM_PLANNER_CACHE", "off")
+DEFAULT_MAX_BYTES = int(os.environ.get("GYM_PLANNER_CACHE_MB", "256")) * 1024 * 1024
+MEMORY_ENTRIES = 4096
+TOUCH_INTERVAL = 3600    # a hit refreshes an entry's last use at most this often (s)
+PRUNE_TO = 0.9           # prune down to this share of max_bytes
+QUERY_BATCH = 500        # keys per SELECT ... IN (...)
+CHUNK_ROWS = 4096        # roster rows validated and looked up at a time
+
+SEPARATOR = "\0"         # between sections of a stored plan; never part of a plan
+
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_cache (
+    key     BLOB PRIMARY KEY,      -- blake2b of schema, rules version, kind and inputs
+    rules   TEXT NOT NULL,         -- RuleIndex.version the entry was generated with
+    body    BLOB NOT NULL,
+    size    INTEGER NOT NULL,
+    used    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_plan_cache_used ON plan_cache (used);
+CREATE INDEX IF NOT EXISTS idx_plan_cache_rules ON plan_cache (rules);
+"""
+
+
+# ---------- KINDS ----------
+# kind prefix -> (encode, decode) between the cached value and the stored body
+
+def _encode_sections(sections):
+    return SEPARATOR.join(sections).encode()
+
+
+def _decode_sections(body):
+    return tuple(body.decode().split(SEPARATOR))
+
+
+def _encode_meals(plan):
+    from gym_nutrition import meal_plan_to_json  # numpy; already loaded by whoever solved the plan
+
+    return meal_plan_to_json(plan).encode()
+
+
+def _decode_meals(body):
+    # JSON rather than pickle: the cache file is shared, and loading it must
+    # not run code
+    from gym_nutrition import meal_plan_from_json
+
+    return meal_plan_from_json(body.decode())
+
+
+CODECS = {
+    "plan": (_encode_sections, _decode_sections),
+    "meals": (_encode_meals, _decode_meals),
+}
+
+
+def _codec(kind):
+    return CODECS[kind.partition(":")[0]]
+
+
+def member_values(member):
+    # the cache identity of a normalised member mapping or MemberProfile
+    return tuple(member[f] for f in MEMBER_FIELDS)
+
+
+def disk_key(version, kind, values):
+    import hashlib  # only the disk tier hashes; imported once, then a dict lookup
+
+    return hashlib.blake2b(repr((CACHE_SCHEMA, version, kind, values)).encode(), digest_size=16).digest()
+
+
+def plan_kind(fmt="text", locale=None):
+    # localised plans are keyed by the catalog content as well as the locale
+    t = get_locale(locale)
+    return f"plan:{fmt}" if t is ENGLISH else f"plan:{fmt}:{t.code}:{t.version}"
+
+
+def render_sections(values, fmt="text", locale=None):
+    # member_values() -> render_plan's chunks, the value of a "plan:<fmt>" entry
+    return tuple(render_plan(*values[:8], name=values[8], notes=values[9], fmt=fmt, locale=locale))
+
+
+# ---------- DISK TIER ----------
+
+class DiskStore:
+    # Content-addressed bodies in SQLite, shared between processes (WAL).
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        import sqlite3  # only when a disk tier is used
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(DISK_SCHEMA)
+        self.lock = threading.Lock()
+        self.size = None          # total body bytes, read on the first write
+        self.evicted = 0
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, keys):
+        found = {}
+        now = time.time()
+        with self.lock:
+            for start in range(0, len(keys), QUERY_BATCH):
+                batch = keys[start:start + QUERY_BATCH]
+                marks = ", ".join("?" * len(batch))
+                rows = self.conn.execute(f"SELECT key, body FROM plan_cache WHERE key IN ({marks})", batch).fetchall()
+                if rows:
+                    found.update(rows)
+                    with self.conn:
+                        self.conn.execute(
+                            f"UPDATE plan_cache SET used = ? WHERE key IN ({marks}) AND used < ?",
+                            (now, *batch, now - TOUCH_INTERVAL))
+        return found
+
+    def put_many(self, entries):
+        # entries: (key, rules version, body bytes)
+        now = time.time()
+        with self.lock:
+            if self.size is None:
+                self.size = self._total()
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO plan_cache (key, rules, body, size, used) VALUES (?, ?, ?, ?, ?)",
+                    ((key, version, body, len(body), now) for key, version, body in entries))
+            self.size += sum(len(body) for _, _, body in entries)
+            if self.size > self.max_bytes:
+                self._prune(int(self.max_bytes * PRUNE_TO))
+
+    def _total(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM plan_cache").fetchone()[0]
+
+    def _prune(self, target):
+        self.size = self._total()  # other processes write to the same file
+        excess = self.size - target
+        if excess <= 0:
+            return
+        doomed, freed = [], 0
+        for rowid, size in self.conn.execute("SELECT rowid, size FROM plan_cache ORDER BY used"):
+            doomed.append((rowid,))
+            freed += size
+            if freed >= excess:
+                break
+        with self.conn:
+            self.conn.executemany("DELETE FROM plan_cache WHERE rowid = ?", doomed)
+        self.size -= freed
+        self.evicted += len(doomed)
+
+    def prune(self, max_bytes=None):
+        with self.lock:
+            self._prune(self.max_bytes if max_bytes is None else max_bytes)
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM plan_cache")
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM plan_cache").fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "evicted": self.evicted}
+
+
+# ---------- BOTH TIERS ----------
+
+class PlanCache:
+    # Values by (kind, inputs tuple) for the loaded rules: an LRU of decoded
+    # values in front of an optional DiskStore of encoded bodies.
+
+    def __init__(self, disk=None, memory_entries=MEMORY_ENTRIES):
+        self.disk = disk
+        self.memory = OrderedDict()   # (version, kind, values) -> value
+        self.memory_entries = memory_entries
+        self.memory_hits = self.disk_hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def lookup_many(self, kind, values_list):
+        # -> list of values, None for a miss, in the order given
+        version = current_rules().version
+        found = [None] * len(values_list)
+        missing = []
+        with self.lock:
+            for i, values in enumerate(values_list):
+                value = self.memory.get((version, kind, values))
+                if value is None:
+                    missing.append(i)
+                else:
+                    self.memory.move_to_end((version, kind, values))
+                    found[i] = value
+            self.memory_hits += len(values_list) - len(missing)
+
+        if missing and self.disk is not None:
+            decode = _codec(kind)[1]
+            keys = [disk_key(version, kind, values_list[i]) for i in missing]
+            bodies = self.disk.get_many(keys)
+            still_missing = []
+            for i, key in zip(missing, keys):
+                body = bodies.get(key)
+                if body is None:
+                    still_missing.append(i)
+                else:
+                    found[i] = decode(body)
+                    self._remember(version, kind, values_list[i], found[i])
+            with self.lock:
+                self.disk_hits += len(missing) - len(still_missing)
+            missing = still_missing
+        with self.lock:
+            self.misses += len(missing)
+        return found
+
+    def store_many(self, kind, values_list, results):
+        version = current_rules().version
+        for values, value in zip(values_list, results):
+            self._remember(version, kind, values, value)
+        if self.disk is not None and values_list:
+            encode = _codec(kind)[0]
+            self.disk.put_many([(disk_key(version, kind, values), version, encode(value))
+                                for values, value in zip(values_list, results)])
+
+    def _remember(self, version, kind, values, value):
+        if not self.memory_entries:
+            return
+        with self.lock:
+            self.memory[(version, kind, values)] = value
+            self.memory.move_to_end((version, kind, values))
+            if len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def get_many(self, kind, values_list, build_many):
+        # build_many(list of inputs) -> list of values, called once for the misses
+        found = self.lookup_many(kind, values_list)
+        missing = [i for i, value in enumerate(found) if value is None]
+        if missing:
+            todo = [values_list[i] for i in missing]
+            built = build_many(todo)
+            self.store_many(kind, todo, built)
+            for i, value in zip(missing, built):
+                found[i] = value
+        return found
+
+    def sections(self, values, fmt="text", locale=None):
+        # one member's member_values() -> render_plan's chunks as a tuple
+        return self.get_many(plan_kind(fmt, locale), [values],
+                             lambda todo: [render_sections(todo[0], fmt, locale)])[0]
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stats = {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else None,
+            "memory_entries": len(self.memory),
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+    def summary(self):
+        return (f"plan cache: {self.memory_hits + self.disk_hits} hits "
+                f"({self.memory_hits} memory, {self.disk_hits} disk), {self.misses} generated")
+
+
+def iter_cached(rows, cache, kind, inputs, build_many, units="metric"):
+    # Roster rows -> (member_id, value, error) in order. Rows are validated a
+    # chunk at a time so the whole chunk is looked up at once; build_many
+    # (e.g. a pool's map) only sees the misses. inputs(member) -> key tuple.
+    validated = validate_rows(rows, units)
+    while True:
+        chunk = list(islice(validated, CHUNK_ROWS))
+        if not chunk:
+            return
+        accepted = [i for i, (_, member, _) in enumerate(chunk) if member is not None]
+        values = cache.get_many(kind, [inputs(chunk[i][1]) for i in accepted], build_many)
+        results = dict(zip(accepted, values))
+        for i, (member_id, member, issues) in enumerate(chunk):
+            if member is None:
+                yield member_id, None, "; ".join(issue.message for issue in issues)
+            else:
+                yield member_id, results[i], None
+
+
+# ---------- SHARED INSTANCE ----------
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def open_cache(path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, memory_entries=MEMORY_ENTRIES):
+    # path "off" (or empty) keeps the in-process tier only
+    disk = None if path in ("", "off") else DiskStore(path, max_bytes)
+    return PlanCache(disk, memory_entries)
+
+
+def default_cache():
+    # the process-wide cache of the GUI and the service (GYM_PLANNER_CACHE)
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = open_cache()
+        return _default
+
+
+@on_rules_changed
+def _rules_changed():
+    if _default is not None:
+        _default.clear_memory()
+
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect or trim the on-disk plan cache.")
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="cache file (default: GYM_PLANNER_CACHE)")
+    parser.add_argument("--max-mb", type=float, help="with prune: size to prune down to")
+    args = parser.parse_args(argv)
+
+    if args.cache in ("", "off") or not os.path.exists(args.cache):
+        print(f"no plan cache at {args.cache!r}", file=sys.stderr)
+        return 1
+    disk = DiskStore(args.cache)
+    try:
+        if args.command == "prune":
+            disk.prune(None if args.max_mb is None else int(args.max_mb * 1024 * 1024))
+        elif args.command == "clear":
+            disk.clear()
+        print(json.dumps(disk.stats()))
+    finally:
+        disk.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# Smart Gym Planner - planning logic (no GUI imports)
+
+import sys
+from functools import lru_cache
+
+from gym_injuries import NO_RESTRICTIONS, adapt_item, parse_notes
+from gym_model import (  # noqa: F401  (Exercise / exercise_id re-exported)
+    Day,
+    DietPlan,
+    Exercise,
+    WorkoutPlan,
+    exercise_id,
+    parse_exercise,
+)
+from gym_rules import load_rules
+
+
+# ---------- PLAN RULES ----------
+# Templates, meal guidance, tips and modifiers come from the rule file (see
+# gym_rules), compiled once into read-only, shared structures; the lookup
+# functions only fill in the per-member protein figure. The memoised helpers
+# take the index as their first argument, so swapping rules in never serves
+# a plan cached from the old ones.
+
+_rules = load_rules()
+_RELOAD_HOOKS = []
+
+# input choices of the rules loaded at import (the GUI and bench use these)
+GOALS = _rules.goals
+EXPERIENCE_LEVELS = _rules.experience_levels
+ACTIVITY_LEVELS = _rules.activity_levels
+DIET_PREFS = _rules.diet_prefs
+
+# every exercise that appears in a template, by id; updated in place on reload
+EXERCISES = dict(_rules.exercises)
+
+
+def current_rules():
+    return _rules
+
+
+def use_rules(index):
+    # Swap in a compiled RuleIndex. The swap is a single assignment; caches
+    # elsewhere that hold rendered plans register a hook to be cleared.
+    global _rules
+    _rules = index
+    EXERCISES.update(index.exercises)
+    for stale in EXERCISES.keys() - index.exercises.keys():
+        del EXERCISES[stale]
+    _restricted_days.cache_clear()
+    _restricted_workout_plan.cache_clear()
+    _diet_plan.cache_clear()
+    for hook in _RELOAD_HOOKS:
+        hook()
+
+
+def reload_rules(path=None):
+    index = load_rules(path or _rules.source)
+    use_rules(index)
+    return index
+
+
+def on_rules_changed(hook):
+    _RELOAD_HOOKS.append(hook)
+    return hook
+
+
+# ---------- PLAN RECORDS ----------
+
+def _build_workout_plan(rules, goal, experience, activity, restrictions=NO_RESTRICTIONS):
+    template = goal if goal in rules.templates else rules.fallback_workout
+    title = rules.templates[template][0]
+    summary = rules.summary_for(goal, experience, activity)
+    days = rules.workout_days[template]
+    if restrictions:
+        days, swapped, removed = _restricted_days(rules, template, restrictions)
+        if swapped or removed:
+            summary += rules.restriction_note.format(joints=", ".join(sorted(restrictions)),
+                                                     swapped=swapped, removed=removed)
+    return WorkoutPlan(title, sys.intern(summary), days)
+
+
+@lru_cache(maxsize=None)
+def _restricted_days(rules, template, restrictions):
+    # (days, swapped, removed) for a template with unsafe items replaced
+    days, swapped, removed = [], 0, 0
+    for day in rules.workout_days[template]:
+        items, used = [], {ex.exercise_id for ex in day.exercises}
+        for ex in day.exercises:
+            text = adapt_item(ex.text, ex.exercise_id, restrictions, exclude=used)
+            if text is None:
+                removed += 1
+            else:
+                swapped += text != ex.text
+                used.add(exercise_id(text.partition(" – ")[0]))
+                items.append(text)
+        days.append(Day(day.name, tuple(map(parse_exercise, items))))
+    return tuple(days), swapped, removed
+
+
+# ---------- LOGIC FUNCTIONS ----------
+
+def calculate_bmi(height_cm, weight_kg):
+    # None (shown as N/A) for missing or non-positive numbers; inputs are
+    # numbers already, gym_validate parses and range-checks them
+    if not height_cm or not weight_kg or height_cm <= 0 or weight_kg <= 0:
+        return None
+    h_m = height_cm / 100
+    return weight_kg / (h_m * h_m)
+
+
+def get_bmi_status(bmi):
+    if bmi is None:
+        return "N/A"
+    if bmi < 18.5:
+        return "Underweight"
+    if bmi < 25:
+        return "Normal"
+    if bmi < 30:
+        return "Overweight"
+    return "Obese"
+
+
+def get_workout_plan(goal, experience, activity, notes=""):
+    restrictions = parse_notes(notes) if notes else NO_RESTRICTIONS
+    rules = _rules
+    if restrictions:
+        return _restricted_workout_plan(rules, goal, experience, activity, restrictions)
+    plan = rules.workouts.get((goal, experience, activity))
+    if plan is None:
+        plan = _build_workout_plan(rules, goal, experience, activity)
+    return plan
+
+
+def get_restricted_workout_plan(goal, experience, activity, restrictions):
+    # restrictions: frozenset of joints from gym_injuries.parse_notes()
+    return _restricted_workout_plan(_rules, goal, experience, activity, restrictions)
+
+
+@lru_cache(maxsize=1024)
+def _restricted_workout_plan(rules, goal, experience, activity, restrictions):
+    if not restrictions:
+        plan = rules.workouts.get((goal, experience, activity))
+        return plan or _build_workout_plan(rules, goal, experience, activity)
+    return _build_workout_plan(rules, goal, experience, activity, restrictions)
+
+
+@lru_cache(maxsize=4096)
+def _diet_plan(rules, goal, diet_pref, protein):
+    return DietPlan(
+        rules.diet_titles[diet_pref],
+        rules.diet_summary.format(protein=protein),
+        rules.diet_sections[diet_pref],
+        rules.diet_extras[goal],
+    )
+
+
+def get_diet_plan(goal, diet_pref, weight):
+    rules = _rules
+    base_protein = round(weight * 1.6)
+    if diet_pref not in rules.diet_sections:
+        diet_pref = rules.fallback_diet
+    if goal not in rules.diet_extras:
+        goal = rules.fallback_extras
+    return _diet_plan(rules, goal, diet_pref, base_protein)
+
+
+def get_general_tips(goal):
+    rules = _rules
+    return rules.tips.get(goal, rules.base_tips)
@@ -1,356 +1,79 @@
 # Smart Gym Planner - desktop app
+#
+# tkinter and Pillow are only imported when the GUI is actually built, so
+# importing this module (e.g. for calculate_bmi) works on headless servers
+# and stays cheap. bench/importtime.py guards that.
 
-import tkinter as tk
-from tkinter import ttk, messagebox
-from tkinter.scrolledtext import ScrolledText
+import os
 
-from PIL import Image, ImageTk  # for photos
+from gym_planner import (  # noqa: F401  (re-exported for existing callers)
+    calculate_bmi,
+    get_bmi_status,
+    get_diet_plan,
+    get_general_tips,
+    get_workout_plan,
+)
+from gym_locale import DEFAULT_LOCALE, ENGLISH, available_locales, get_locale
+from gym_model import MemberProfile
+from gym_render import format_plan, render_plan  # noqa: F401  (format_plan re-exported)
+from gym_validate import ValidationError, normalise_member
 
 
-# ---------- LOGIC FUNCTIONS ----------
+BANNER_IMAGE = "assets/gym_banner.jpg"
+BANNER_SIZE = (1060, 120)
+SIDE_IMAGE = "assets/gym_side.jpg"
+SIDE_SIZE = (260, 260)
 
-def calculate_bmi(height_cm, weight_kg):
-    try:
-        h_m = height_cm / 100
-        if h_m <= 0 or weight_kg <= 0:
-            return None
-        return weight_kg / (h_m * h_m)
-    except Exception:
-        return None
-
-
-def get_bmi_status(bmi):
-    if bmi is None:
-        return "N/A"
-    if bmi < 18.5:
-        return "Underweight"
-    if bmi < 25:
-        return "Normal"
-    if bmi < 30:
-        return "Overweight"
-    return "Obese"
-
-
-def get_workout_plan(goal, experience, activity):
-    plan = {"title": "", "summary": "", "days": []}
-
-    if goal == "fat-loss":
-        plan["title"] = "Fat Loss + Strength Plan"
-        plan["summary"] = (
-            "Focus on calorie burn + preserving muscle. "
-            "Start with compound lifts, finish with short but intense cardio."
-        )
-        plan["days"] = [
-            {
-                "name": "Day 1 – Full Body + Cardio",
-                "items": [
-                    "Squats / Leg Press – 3×10–12",
-                    "Push-ups or Bench Press – 3×10",
-                    "Lat Pulldown / Assisted Pull-ups – 3×10–12",
-                    "Plank – 3×30s",
-                    "Treadmill walk / incline – 20 mins",
-                ],
-            },
-            {
-                "name": "Day 2 – Upper Body + Core",
-                "items": [
-                    "Dumbbell Shoulder Press – 3×10–12",
-                    "One-arm Dumbbell Row – 3×10 each side",
-                    "Cable / Machine Chest Fly – 3×12",
-                    "Russian twists – 3×16",
-                    "Cycling / cross-trainer – 15–20 mins",
-                ],
-            },
-            {
-                "name": "Day 3 – Lower Body + HIIT",
-                "items": [
-                    "Leg Extension – 3×12",
-                    "Leg Curl – 3×12",
-                    "Walking Lunges – 3×12 steps each leg",
-                    "Mountain climbers – 3×30s",
-                    "HIIT: 30s fast, 60s slow × 8 rounds",
-                ],
-            },
-        ]
-    elif goal == "muscle-gain":
-        plan["title"] = "Hypertrophy (Muscle Gain) Plan"
-        plan["summary"] = (
-            "Progressive overload with enough volume. "
-            "Keep form clean, increase weights slowly every week."
-        )
-        plan["days"] = [
-            {
-                "name": "Day 1 – Push (Chest + Shoulders + Triceps)",
-                "items": [
-                    "Bench Press / Machine Press – 4×8–10",
-                    "Incline Dumbbell Press – 3×10–12",
-                    "Shoulder Press – 3×10",
-                    "Lateral Raises – 3×12–15",
-                    "Triceps Rope Pushdown – 3×12",
-                ],
-            },
-            {
-                "name": "Day 2 – Pull (Back + Biceps)",
-                "items": [
-                    "Lat Pulldown / Pull-ups – 4×8–10",
-                    "Seated Cable Row – 3×10–12",
-                    "Face Pulls – 3×15",
-                    "Barbell / Dumbbell Curls – 3×10–12",
-                    "Hammer Curls – 3×10",
-                ],
-            },
-            {
-                "name": "Day 3 – Legs + Core",
-                "items": [
-                    "Squats / Leg Press – 4×8–10",
-                    "Romanian Deadlift – 3×10",
-                    "Leg Curls – 3×12",
-                    "Calf Raises – 3×15–20",
-                    "Plank + Leg Raises – 3 sets each",
-                ],
-            },
-        ]
-    else:
-        plan["title"] = "General Fitness & Conditioning Plan"
-        plan["summary"] = (
-            "Balanced strength, mobility and cardio. "
-            "Great if you want to stay active, toned and healthy."
-        )
-        plan["days"] = [
-            {
-                "name": "Day 1 – Full Body Strength",
-                "items": [
-                    "Goblet Squat – 3×12",
-                    "Dumbbell Bench Press – 3×12",
-                    "Seated Row – 3×12",
-                    "Plank – 3×30s",
-                    "10–15 mins light cardio",
-                ],
-            },
-            {
-                "name": "Day 2 – Cardio + Mobility",
-                "items": [
-                    "30–40 mins brisk walk / cycling",
-                    "Dynamic stretches (hips, shoulders, hamstrings)",
-                    "Light core work (deadbugs, side plank)",
-                ],
-            },
-            {
-                "name": "Day 3 – Mixed Strength",
-                "items": [
-                    "Deadlift variation (light) – 3×8",
-                    "Overhead Press – 3×10",
-                    "Lat Pulldown – 3×12",
-                    "Bodyweight Lunges – 3×12 each leg",
-                    "10 mins cool-down walk + stretching",
-                ],
-            },
-        ]
-
-    if experience == "beginner":
-        plan["summary"] += (
-            " Since you are a beginner, start with lighter weights, "
-            "keep 1–2 reps in reserve and focus on learning technique first."
-        )
-    elif experience == "advanced":
-        plan["summary"] += (
-            " As you are advanced, you can add 1–2 extra sets for main lifts "
-            "and use variations like drop-sets or supersets."
-        )
+DEBOUNCE_MS = 300   # quiet time after the last edit before a live re-render
+POLL_MS = 15
+SYNC_URL = os.environ.get("GYM_PLANNER_SYNC_URL", "http://127.0.0.1:8080/sync")
 
-    if activity == "sedentary" and goal == "fat-loss":
-        plan["summary"] += (
-            " Because your current activity is low, try to hit a minimum of "
-            "8–9k steps per day outside the gym."
-        )
+# filled in by load_gui_modules()
+tk = ttk = messagebox = filedialog = ScrolledText = ImageTk = ImageLoader = None
+
+
+def load_gui_modules():
+    global tk, ttk, messagebox, filedialog, ScrolledText, ImageTk, ImageLoader
+    if tk is not None:
+        return
 
-    return plan
-
-
-def get_diet_plan(goal, diet_pref, weight):
-    base_protein = round(weight * 1.6)
-    diet = {"title": "", "summary": "", "meals": [], "extras": []}
-
-    if diet_pref == "veg":
-        pref_name = "Vegetarian"
-    elif diet_pref == "non-veg":
-        pref_name = "Non-Vegetarian"
-    else:
-        pref_name = "Eggetarian"
-
-    diet["title"] = f"Daily Meal Guidance ({pref_name})"
-    diet["summary"] = (
-        f"Aim for around {base_protein}g of protein per day. "
-        "Keep most of your meals simple, repeatable and easy to cook."
-    )
-
-    if diet_pref == "veg":
-        diet["meals"] = [
-            {
-                "name": "Breakfast",
-                "items": [
-                    "Oats with milk + 1 scoop whey (if available) + nuts",
-                    "OR 2–3 besan chillas with curd",
-                    "1 fruit (banana / apple)",
-                ],
-            },
-            {
-                "name": "Lunch",
-                "items": [
-                    "2–3 phulkas / 1.5 cup rice",
-                    "1.5 cup dal / rajma / chole",
-                    "1 cup mixed veg sabzi",
-                    "Salad: cucumber, carrot, onion, lemon",
-                ],
-            },
-            {
-                "name": "Evening Snack",
-                "items": [
-                    "Sprouts salad with onion + tomato + lemon",
-                    "OR roasted chana + buttermilk",
-                ],
-            },
-            {
-                "name": "Dinner",
-                "items": [
-                    "Paneer bhurji / tofu + 2 phulkas",
-                    "Mixed veggie sabzi",
-                    "Light salad (avoid heavy fried food at night)",
-                ],
-            },
-        ]
-    elif diet_pref == "non-veg":
-        diet["meals"] = [
-            {
-                "name": "Breakfast",
-                "items": [
-                    "3–4 egg omelette (2 whole + 2 whites) + 2 bread slices",
-                    "OR oats with milk + boiled eggs",
-                    "1 fruit",
-                ],
-            },
-            {
-                "name": "Lunch",
-                "items": [
-                    "150–180g chicken (grilled / curry) or fish",
-                    "2–3 phulkas / 1.5 cup rice",
-                    "1 cup sabzi",
-                    "Salad bowl",
-                ],
-            },
-            {
-                "name": "Evening Snack",
-                "items": [
-                    "Greek curd / dahi + peanuts / nuts",
-                    "OR tuna / chicken sandwich (less mayo)",
-                ],
-            },
-            {
-                "name": "Dinner",
-                "items": [
-                    "Chicken / fish + lots of veggies (stir-fried / grilled)",
-                    "1–2 phulkas or small portion of rice",
-                    "Avoid sugary drinks and deep fried sides",
-                ],
-            },
-        ]
-    else:  # eggetarian
-        diet["meals"] = [
-            {
-                "name": "Breakfast",
-                "items": [
-                    "Oats with milk + 1–2 boiled eggs",
-                    "OR 2–3 egg bhurji + 2 phulkas",
-                    "1 fruit",
-                ],
-            },
-            {
-                "name": "Lunch",
-                "items": [
-                    "2–3 phulkas / 1.5 cup rice",
-                    "1 cup dal",
-                    "2 boiled eggs / egg curry",
-                    "Veg sabzi + salad",
-                ],
-            },
-            {
-                "name": "Evening Snack",
-                "items": [
-                    "Sprouts / chana + buttermilk",
-                    "OR peanut butter on toast (thin layer)",
-                ],
-            },
-            {
-                "name": "Dinner",
-                "items": [
-                    "Paneer / tofu / egg bhurji",
-                    "2 phulkas",
-                    "Veg sabzi + salad",
-                ],
-            },
-        ]
-
-    if goal == "fat-loss":
-        diet["extras"].extend([
-            "Keep sugar low. Avoid daily sweets, soft drinks and heavy fried food.",
-            "Use smaller plates, eat slowly and stop when you are ~80% full.",
-            "Prioritise protein + veggies in every meal; control oil quantity.",
-        ])
-    elif goal == "muscle-gain":
-        diet["extras"].extend([
-            "You may need a small calorie surplus; add extra roti / rice or 1 extra snack if weight is not increasing.",
-            "Keep protein high across all meals, not only at night.",
-            "If using whey protein, 1–2 scoops per day is enough for most people.",
-        ])
-    else:
-        diet["extras"].extend([
-            "Balance: half the plate veggies / salad, quarter protein, quarter carbs.",
-            "Stay consistent through the week; small treats are okay but not daily.",
-            "Drink water regularly instead of sugary drinks.",
-        ])
-
-    return diet
-
-
-def get_general_tips(goal):
-    tips = [
-        "Sleep 7–8 hours every night. Recovery is where the real progress happens.",
-        "Water target: roughly 2.5–3.5L per day (more if you sweat a lot).",
-        "Warm up 5–10 mins before lifting (light cardio + mobility).",
-        "Track your progress: photos, measurements, or notes every 2 weeks.",
-    ]
-    if goal == "muscle-gain":
-        tips.append("Log your lifts and try to add a little weight or reps over time (progressive overload).")
-    elif goal == "fat-loss":
-        tips.append("Steps matter! Try to keep daily steps high in addition to gym sessions.")
-    return tips
+    import tkinter
+    from tkinter import filedialog as tk_filedialog, messagebox as tk_messagebox, ttk as tk_ttk
+    from tkinter.scrolledtext import ScrolledText as TkScrolledText
+
+    from PIL import ImageTk as PILImageTk  # for photos
+
+    from gym_images import ImageLoader as BackgroundImageLoader
+
+    ttk, messagebox, filedialog, ScrolledText = tk_ttk, tk_messagebox, tk_filedialog, TkScrolledText
+    ImageTk, ImageLoader = PILImageTk, BackgroundImageLoader
+    tk = tkinter
 
 
 # ---------- GUI APP ----------
 
 class GymPlannerApp:
     def __init__(self, root):
+        load_gui_modules()
         self.root = root
         root.title("Smart Gym Planner")
         root.geometry("1100x650")
         root.configure(bg="#101014")
 
-        # ---------- load images (safe if missing) ----------
+        # images are loaded in the background and swapped in when ready (safe if missing)
         self.banner_img = None
         self.side_img = None
-        try:
-            banner = Image.open("assets/gym_banner.jpg")
-            banner = banner.resize((1060, 120))
-            self.banner_img = ImageTk.PhotoImage(banner)
-        except Exception:
-            pass
-
-        try:
-            side = Image.open("assets/gym_side.jpg")
-            side = side.resize((260, 260))
-            self.side_img = ImageTk.PhotoImage(side)
-        except Exception:
-            pass
+        self.store = None  # opened on first use
+        self.export_assets = None  # logo for exported plans, decoded on first export
+        self.cohort = None         # gym_cohort.Cohort, loaded when the dashboard first opens
+        self.cohort_window = None
+
+        from concurrent.futures import ThreadPoolExecutor  # pulls in logging; only the window needs it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan")
+        self._pending = None       # (future, inputs, locale) of the newest request
+        self._polling = False
+        self._debounce_id = None
+        self._sections = None      # sections currently shown in self.output
 
         # ---------- styles ----------
         style = ttk.Style()
@@ -387,19 +110,15 @@ class GymPlannerApp:
         outer = ttk.Frame(root, padding=10)
         outer.pack(fill="both", expand=True)
 
-        # ----- banner -----
-        if self.banner_img:
-            banner_label = ttk.Label(outer, image=self.banner_img)
-            banner_label.pack(fill="x", pady=(0, 10))
-        else:
-            header_frame = ttk.Frame(outer)
-            header_frame.pack(fill="x", pady=(0, 10))
-            ttk.Label(header_frame,
-                      text="Smart Gym Planner",
-                      style="Header.TLabel").pack(side="left")
-            ttk.Label(header_frame,
-                      text="Personalised workout & diet guide",
-                      style="Small.TLabel").pack(side="left", padx=12)
+        # ----- banner (text header until the banner image is ready) -----
+        self.header_frame = ttk.Frame(outer)
+        self.header_frame.pack(fill="x", pady=(0, 10))
+        ttk.Label(self.header_frame,
+                  text="Smart Gym Planner",
+                  style="Header.TLabel").pack(side="left")
+        ttk.Label(self.header_frame,
+                  text="Personalised workout & diet guide",
+                  style="Small.TLabel").pack(side="left", padx=12)
 
         # ----- content area (left form + right plan) -----
         content = ttk.Frame(outer)
@@ -416,6 +135,33 @@ class GymPlannerApp:
         self.build_left_panel()
         self.build_right_panel()
 
+        self.image_loader = ImageLoader(root)
+        self.image_loader.load(BANNER_IMAGE, BANNER_SIZE, self.show_banner)
+        self.image_loader.load(SIDE_IMAGE, SIDE_SIZE, self.show_side_image)
+
+    def show_banner(self, image):
+        self.banner_img = ImageTk.PhotoImage(image)
+        banner_label = ttk.Label(self.header_frame.master, image=self.banner_img)
+        banner_label.pack(fill="x", pady=(0, 10), before=self.header_frame)
+        self.header_frame.pack_forget()
+
+    def show_side_image(self, image):
+        self.side_img = ImageTk.PhotoImage(image)
+        self.side_placeholder.destroy()
+
+        side_frame = ttk.Frame(self.plan_container)
+        side_frame.pack(side="right", fill="y")
+
+        img_label = ttk.Label(side_frame, image=self.side_img)
+        img_label.pack(pady=(0, 4))
+
+        ttk.Label(
+            side_frame,
+            text="Stay consistent.\nSmall daily steps → big results.",
+            style="Small.TLabel",
+            justify="center",
+        ).pack()
+
     def build_left_panel(self):
         lf = self.left
 
@@ -489,15 +235,42 @@ class GymPlannerApp:
         self.notes_var = tk.StringVar()
         ttk.Entry(lf, textvariable=self.notes_var, width=30).grid(row=9, column=1, pady=2, padx=4, sticky="w")
 
+        ttk.Label(lf, text="Member ID (optional):").grid(row=10, column=0, sticky="w", pady=2)
+        self.member_id_var = tk.StringVar()
+        ttk.Entry(lf, textvariable=self.member_id_var, width=20).grid(row=10, column=1, pady=2, padx=4, sticky="w")
+
+        ttk.Label(lf, text="Plan language:").grid(row=11, column=0, sticky="w", pady=2)
+        self.locale_var = tk.StringVar(value=DEFAULT_LOCALE)
+        ttk.Combobox(lf, textvariable=self.locale_var, state="readonly",
+                     values=list(available_locales()), width=17).grid(row=11, column=1, pady=2, padx=4, sticky="w")
+
         btn = ttk.Button(lf, text="Generate Plan", command=self.on_generate)
-        btn.grid(row=10, column=0, columnspan=2, pady=12, sticky="ew")
+        btn.grid(row=12, column=0, columnspan=2, pady=(12, 4), sticky="ew")
+
+        load_btn = ttk.Button(lf, text="Load Saved Member", command=self.on_load_member)
+        load_btn.grid(row=13, column=0, columnspan=2, pady=(0, 4), sticky="ew")
+
+        export_btn = ttk.Button(lf, text="Export PDF / HTML", command=self.on_export)
+        export_btn.grid(row=14, column=0, columnspan=2, pady=(0, 4), sticky="ew")
+
+        cohort_btn = ttk.Button(lf, text="Cohort Dashboard", command=self.on_cohort)
+        cohort_btn.grid(row=15, column=0, columnspan=2, pady=(0, 4), sticky="ew")
 
-        for i in range(11):
+        self.sync_btn = ttk.Button(lf, text="Sync with Server", command=self.on_sync)
+        self.sync_btn.grid(row=16, column=0, columnspan=2, pady=(0, 12), sticky="ew")
+
+        for i in range(17):
             lf.grid_rowconfigure(i, pad=3)
 
+        for var in (self.name_var, self.age_var, self.gender_var, self.height_var, self.weight_var,
+                    self.goal_var, self.activity_var, self.experience_var, self.diet_var, self.notes_var,
+                    self.locale_var):
+            var.trace_add("write", self.on_field_change)
+
     def build_right_panel(self):
         container = ttk.Frame(self.right)
         container.pack(fill="both", expand=True)
+        self.plan_container = container
 
         text_frame = ttk.Frame(container)
         text_frame.pack(side="left", fill="both", expand=True)
@@ -514,125 +287,322 @@ class GymPlannerApp:
         self.output.insert("end", "Fill your details on the left and click 'Generate Plan' to see your plan here.")
         self.output.configure(state="disabled")
 
-        if self.side_img:
-            side_frame = ttk.Frame(container)
-            side_frame.pack(side="right", fill="y")
+        # replaced by show_side_image() once the photo has loaded
+        self.side_placeholder = ttk.Label(
+            container,
+            text="Tip: Add 'assets/gym_side.jpg' to show a motivation photo here.",
+            style="Small.TLabel",
+            justify="center",
+        )
+        self.side_placeholder.pack(side="right", padx=6)
 
-            img_label = ttk.Label(side_frame, image=self.side_img)
-            img_label.pack(pady=(0, 4))
+    # ---------- plan generation ----------
+    # Plans are rendered on a worker thread; the Tk thread only reads the
+    # form, polls for the result and patches the sections that changed.
 
-            ttk.Label(
-                side_frame,
-                text="Stay consistent.\nSmall daily steps → big results.",
-                style="Small.TLabel",
-                justify="center",
-            ).pack()
-        else:
-            ttk.Label(
-                container,
-                text="Tip: Add 'assets/gym_side.jpg' to show a motivation photo here.",
-                style="Small.TLabel",
-                justify="center",
-            ).pack(side="right", padx=6)
+    def read_inputs(self, show_errors=True):
+        # height / weight may carry units ("5'11\"", "176 lb"); see gym_validate
+        try:
+            member = normalise_member({
+                "age": self.age_var.get(),
+                "gender": self.gender_var.get(),
+                "height": self.height_var.get(),
+                "weight": self.weight_var.get(),
+                "goal": self.goal_var.get(),
+                "activity": self.activity_var.get(),
+                "experience": self.experience_var.get(),
+                "diet_pref": self.diet_var.get(),
+                "name": self.name_var.get(),
+                "notes": self.notes_var.get(),
+            })
+        except ValidationError as exc:
+            if show_errors:
+                messagebox.showerror("Error", "\n".join(issue.message for issue in exc.issues))
+            return None
+        return MemberProfile.from_mapping(member)
 
     def on_generate(self):
+        inputs = self.read_inputs(show_errors=True)
+        if inputs is not None:
+            self.request_plan(inputs)
+
+    def on_field_change(self, *_):
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(DEBOUNCE_MS, self._regenerate_from_fields)
+
+    def _regenerate_from_fields(self):
+        self._debounce_id = None
+        if self._sections is None:
+            return  # live updates only once a plan is showing
+        inputs = self.read_inputs(show_errors=False)
+        if inputs is not None:
+            self.request_plan(inputs)
+
+    def request_plan(self, inputs):
+        # a newer request makes any older one stale: cancel it if it has not
+        # started yet, and ignore its result if it has
+        if self._pending is not None:
+            self._pending[0].cancel()
+        locale = self.locale_var.get()
+        self._pending = (self.executor.submit(build_plan_sections, inputs, locale), inputs, locale)
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll_plan)
+
+    def _poll_plan(self):
+        future, inputs, locale = self._pending
+        if not future.done():
+            self.root.after(POLL_MS, self._poll_plan)
+            return
+
+        self._polling = False
+        self._pending = None
+        if future.cancelled():
+            return
+        try:
+            sections = future.result()
+        except Exception as exc:
+            # the previous plan (if any) stays on screen
+            messagebox.showerror("Error", f"Could not build the plan: {exc}")
+            return
+        self.show_sections(sections)
+
+        member_id = self.member_id_var.get().strip()
+        if member_id:
+            store = self.get_store()
+            store.upsert(member_id, inputs)
+            t = get_locale(locale)
+            store.save_plan(member_id, inputs, "".join(sections), "text" if t is ENGLISH else f"text:{t.code}")
+            if self.cohort is not None:
+                self.cohort.upsert(member_id, inputs)
+                self.refresh_cohort()
+
+    def show_sections(self, sections):
+        out = self.output
+        out.configure(state="normal")
+        if self._sections is None or len(sections) != len(self._sections):
+            out.delete("1.0", "end")
+            for i, text in enumerate(sections):
+                out.mark_set(f"section{i}", "end-1c")
+                out.mark_gravity(f"section{i}", "left")
+                out.insert("end", text)
+            for i in range(len(sections)):
+                out.mark_gravity(f"section{i}", "right")
+        else:
+            for i, (old, new) in enumerate(zip(self._sections, sections)):
+                if old == new:
+                    continue
+                start = out.index(f"section{i}")
+                end = f"section{i + 1}" if i + 1 < len(sections) else "end-1c"
+                out.delete(start, end)
+                out.insert(start, new)
+                out.mark_set(f"section{i}", start)  # the insert pushed it past the new text
+        out.configure(state="disabled")
+        self._sections = sections
+
+    def on_export(self):
+        inputs = self.read_inputs(show_errors=True)
+        if inputs is None:
+            return
+        # the PDF layout is English and metric only (Helvetica, cp1252); other
+        # locales export as HTML
+        locale = get_locale(self.locale_var.get())
+        pdf = locale is ENGLISH
+        ext = ".pdf" if pdf else ".html"
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            defaultextension=ext,
+            filetypes=[("PDF", "*.pdf"), ("HTML", "*.html")] if pdf else [("HTML", "*.html")],
+            initialfile=(inputs.name or "gym-plan").replace(" ", "-") + ext,
+        )
+        if not path:
+            return
+        html = path.lower().endswith((".html", ".htm"))
+        if not html and not pdf:
+            messagebox.showerror("Error", f"PDF export is English only; save the {locale.name} plan as HTML.")
+            return
+
+        from gym_export import load_assets, render_html, render_pdf
+
+        if self.export_assets is None:
+            self.export_assets = load_assets()
         try:
-            age = int(self.age_var.get())
-            height = float(self.height_var.get())
-            weight = float(self.weight_var.get())
+            if html:
+                with open(path, "w", encoding="utf-8") as fh:
+                    fh.writelines(render_html(inputs, self.export_assets, locale))
+            else:
+                with open(path, "wb") as fh:
+                    fh.write(render_pdf(inputs, self.export_assets))
+        except OSError as exc:
+            messagebox.showerror("Error", f"Could not save the plan: {exc}")
+
+    # ---------- cohort dashboard ----------
+    # The cohort is loaded from the member store once; members saved from
+    # the form afterwards are folded in with Cohort.upsert(), and every
+    # filter change is a slice of the precomputed cube (a few ms at 100k).
+
+    def on_cohort(self):
+        if self.cohort_window is not None and self.cohort_window.winfo_exists():
+            self.cohort_window.lift()
+            return
+        from gym_cohort import GENDERS, Cohort  # numpy only when the dashboard is used
+        from gym_planner import ACTIVITY_LEVELS
+
+        if self.cohort is None:
+            self.cohort = Cohort.from_store(self.get_store())
+
+        win = tk.Toplevel(self.root)
+        win.title("Cohort Dashboard")
+        win.geometry("640x560")
+        win.configure(bg="#101014")
+        self.cohort_window = win
+
+        filters = ttk.Frame(win, padding=10)
+        filters.pack(fill="x")
+        self.cohort_gender_var = tk.StringVar(value="All")
+        self.cohort_activity_var = tk.StringVar(value="All")
+        self.cohort_age_from_var = tk.StringVar()
+        self.cohort_age_to_var = tk.StringVar()
+
+        ttk.Label(filters, text="Gender:").pack(side="left")
+        ttk.Combobox(filters, textvariable=self.cohort_gender_var, state="readonly",
+                     values=["All", *GENDERS], width=8).pack(side="left", padx=(4, 12))
+        ttk.Label(filters, text="Activity:").pack(side="left")
+        ttk.Combobox(filters, textvariable=self.cohort_activity_var, state="readonly",
+                     values=["All", *ACTIVITY_LEVELS], width=10).pack(side="left", padx=(4, 12))
+        ttk.Label(filters, text="Age:").pack(side="left")
+        ttk.Entry(filters, textvariable=self.cohort_age_from_var, width=4).pack(side="left", padx=(4, 2))
+        ttk.Label(filters, text="–").pack(side="left")
+        ttk.Entry(filters, textvariable=self.cohort_age_to_var, width=4).pack(side="left", padx=(2, 12))
+        ttk.Button(filters, text="Save HTML", command=self.on_cohort_export).pack(side="right")
+
+        self.cohort_output = ScrolledText(win, wrap="word", font=("Menlo", 11), bg="#050509", fg="#f5f5f5")
+        self.cohort_output.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        for var in (self.cohort_gender_var, self.cohort_activity_var,
+                    self.cohort_age_from_var, self.cohort_age_to_var):
+            var.trace_add("write", lambda *_: self.refresh_cohort())
+        self.refresh_cohort()
+
+    def cohort_summary(self):
+        def choice(var):
+            value = var.get()
+            return None if value == "All" else value
+
+        try:
+            low = int(self.cohort_age_from_var.get() or 0)
+            high = int(self.cohort_age_to_var.get() or 200)
         except ValueError:
-            messagebox.showerror("Error", "Please enter valid numbers for age, height and weight.")
+            low, high = 0, 200  # half-typed ages filter nothing
+        age = None if (low, high) == (0, 200) else (low, high)
+        return self.cohort.summary(choice(self.cohort_gender_var), age, choice(self.cohort_activity_var))
+
+    def refresh_cohort(self):
+        if self.cohort_window is None or not self.cohort_window.winfo_exists():
             return
+        from gym_cohort import format_summary
 
-        gender = self.gender_var.get()
-        goal = self.goal_var.get()
-        activity = self.activity_var.get()
-        experience = self.experience_var.get()
-        diet_pref = self.diet_var.get()
-        name = self.name_var.get().strip()
-        notes = self.notes_var.get().strip()
+        out = self.cohort_output
+        out.configure(state="normal")
+        out.delete("1.0", "end")
+        out.insert("end", format_summary(self.cohort_summary()))
+        out.configure(state="disabled")
 
-        if not (gender and goal and activity and experience and diet_pref):
-            messagebox.showerror("Error", "Please fill all required fields.")
+    def on_cohort_export(self):
+        from gym_cohort import render_dashboard_html
+
+        path = filedialog.asksaveasfilename(parent=self.cohort_window, defaultextension=".html",
+                                            filetypes=[("HTML", "*.html")], initialfile="cohort.html")
+        if not path:
             return
+        try:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(render_dashboard_html(self.cohort_summary()))
+        except OSError as exc:
+            messagebox.showerror("Error", f"Could not save the dashboard: {exc}")
 
-        bmi = calculate_bmi(height, weight)
-        bmi_status = get_bmi_status(bmi)
+    # ---------- member store ----------
 
-        workout = get_workout_plan(goal, experience, activity)
-        diet = get_diet_plan(goal, diet_pref, weight)
-        tips = get_general_tips(goal)
+    def get_store(self):
+        if self.store is None:
+            from gym_store import DEFAULT_DB_PATH, ProfileStore  # sqlite only when a member id is used
 
-        if diet_pref == "veg":
-            diet_text = "Vegetarian"
-        elif diet_pref == "non-veg":
-            diet_text = "Non-Veg"
-        else:
-            diet_text = "Eggetarian"
-
-        goal_text = {
-            "fat-loss": "Fat Loss",
-            "muscle-gain": "Muscle Gain",
-            "fitness": "Fitness / Toning",
-        }.get(goal, goal)
-
-        lines = []
-        lines.append("=== SMART GYM PLANNER ===")
-        if name:
-            lines.append(f"Personalised plan for: {name}")
-        lines.append("")
-
-        lines.append("1. OVERVIEW")
-        lines.append(f"Age: {age} yrs | Gender: {gender} | Diet: {diet_text}")
-        lines.append(f"Height: {height} cm | Weight: {weight} kg")
-        if bmi is not None:
-            lines.append(f"BMI: {bmi:.1f} ({bmi_status})")
-        else:
-            lines.append("BMI: N/A")
-        lines.append(f"Goal: {goal_text}")
-        lines.append(f"Activity: {activity} | Experience: {experience}")
-        if notes:
-            lines.append(f"Notes: {notes}")
-        lines.append("")
-
-        lines.append("2. WORKOUT PLAN")
-        lines.append(workout["title"])
-        lines.append(workout["summary"])
-        lines.append("")
-        for day in workout["days"]:
-            lines.append(f"- {day['name']}")
-            for item in day["items"]:
-                lines.append(f"    • {item}")
-            lines.append("")
-        lines.append("")
-
-        lines.append("3. DAILY MEAL GUIDANCE")
-        lines.append(diet["title"])
-        lines.append(diet["summary"])
-        lines.append("")
-        for meal in diet["meals"]:
-            lines.append(f"- {meal['name']}:")
-            for item in meal["items"]:
-                lines.append(f"    • {item}")
-            lines.append("")
-        lines.append("Extra rules:")
-        for ex in diet["extras"]:
-            lines.append(f"    • {ex}")
-        lines.append("")
-
-        lines.append("4. EXTRA TIPS")
-        for t in tips:
-            lines.append(f"- {t}")
-        lines.append("")
-        lines.append("This is a starting point. As your body responds, adjust food quantity and workout intensity.")
-
-        self.output.configure(state="normal")
-        self.output.delete("1.0", "end")
-        self.output.insert("end", "\n".join(lines))
-        self.output.configure(state="disabled")
+            self.store = ProfileStore(DEFAULT_DB_PATH)
+        return self.store
+
+    # Syncing runs on the plan worker with its own connection (sqlite
+    # connections stay on the thread that opened them); a failed sync keeps
+    # the local change log, so the next attempt sends the same changes.
+
+    def on_sync(self):
+        self.sync_btn.state(["disabled"])
+        self.root.after(POLL_MS, self._poll_sync, self.executor.submit(sync_store))
+
+    def _poll_sync(self, future):
+        if not future.done():
+            self.root.after(POLL_MS, self._poll_sync, future)
+            return
+        self.sync_btn.state(["!disabled"])
+        try:
+            result = future.result()
+        except Exception as exc:
+            messagebox.showerror("Sync", f"Sync failed, changes are kept for next time: {exc}")
+            return
+        if result["received"] and self.cohort is not None:
+            from gym_cohort import Cohort
+
+            self.cohort = Cohort.from_store(self.get_store())
+            self.refresh_cohort()
+        message = f"Sent {result['sent']} and received {result['received']} member changes."
+        if result["conflicts"]:
+            message += f"\nConflicting edits settled for: {', '.join(result['conflicts'])}"
+        messagebox.showinfo("Sync", message)
+
+    def on_load_member(self):
+        member_id = self.member_id_var.get().strip()
+        if not member_id:
+            messagebox.showerror("Error", "Enter a member ID to load.")
+            return
+
+        profile = self.get_store().get(member_id)
+        if profile is None:
+            messagebox.showerror("Error", f"No saved member with ID '{member_id}'.")
+            return
+
+        self.name_var.set(profile["name"])
+        self.age_var.set(str(profile["age"]))
+        self.gender_var.set(profile["gender"])
+        self.height_var.set(str(profile["height"]))
+        self.weight_var.set(str(profile["weight"]))
+        self.goal_var.set(profile["goal"])
+        self.activity_var.set(profile["activity"])
+        self.experience_var.set(profile["experience"])
+        self.diet_var.set(profile["diet_pref"])
+        self.notes_var.set(profile["notes"])
+        self.on_generate()
+
+
+def build_plan_sections(inputs, locale=None):
+    # switching back to inputs seen before (or saved by a batch run into the
+    # GYM_PLANNER_CACHE file) is a cache hit rather than a render
+    from gym_plancache import default_cache, member_values
+
+    return default_cache().sections(member_values(inputs), "text", locale)
+
+
+def sync_store(url=SYNC_URL):
+    from gym_store import DEFAULT_DB_PATH, ProfileStore
+    from gym_sync import HTTPTransport, sync
+
+    with ProfileStore(DEFAULT_DB_PATH) as store:
+        return sync(store, HTTPTransport(url))
 
 
 if __name__ == "__main__":
+    load_gui_modules()
+    import gym_instrument
+    gym_instrument.enable_from_env()  # GYM_PLANNER_METRICS=path times the GUI stages
     root = tk.Tk()
     app = GymPlannerApp(root)
     root.mainloop()
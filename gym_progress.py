@@ -0,0 +1,316 @@
+# Smart Gym Planner - progress log (weigh-ins and lift logs)
+#
+# Each table is stored column by column as raw little-endian arrays:
+#
+#   <dir>/<table>.g<N>.<column>.bin        append-only tail, in arrival order
+#   <dir>/<table>.base.g<N>.<column>.bin   compacted base, sorted by (member, day)
+#   <dir>/<table>.generation               N, the current generation
+#
+# Reads go through np.memmap, so nothing is loaded into Python objects.
+# Range queries binary-search the sorted base and scan only the (small)
+# tail; compact() folds the tail into the base. Member ids and exercise
+# names are mapped to small integer codes kept in append-only text files.
+#
+# compact() writes base N+1 next to generation N and then replaces the
+# generation file, which moves readers and appends to the new base and an
+# empty tail in one rename. Generation N's files are deleted only after
+# that, so a crash at any point leaves one complete generation and no row
+# counted twice. Generation 0 (no generation file yet) has no g<N>. part.
+
+import os
+
+import numpy as np
+
+from gym_arrays import calculate_bmi_array
+
+
+WEIGHIN_COLUMNS = {
+    "member": np.dtype("<u4"),
+    "day": np.dtype("<i4"),        # days since 1970-01-01
+    "weight": np.dtype("<f4"),     # kg
+    "waist": np.dtype("<f4"),      # cm, NaN when not measured
+}
+
+LIFT_COLUMNS = {
+    "member": np.dtype("<u4"),
+    "day": np.dtype("<i4"),
+    "exercise": np.dtype("<u2"),
+    "load": np.dtype("<f4"),       # kg
+    "reps": np.dtype("u1"),
+    "sets": np.dtype("u1"),
+}
+
+
+def to_days(dates):
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int32)
+
+
+def _day_bounds(start, end):
+    lo = np.iinfo(np.int32).min if start is None else int(to_days(start))
+    hi = np.iinfo(np.int32).max if end is None else int(to_days(end))
+    return lo, hi
+
+
+class CodeTable:
+    # string <-> small int mapping persisted as one name per line
+    def __init__(self, path):
+        self.path = path
+        self.names = []
+        self.codes = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    self._add(line.rstrip("\n"))
+
+    def _add(self, name):
+        self.codes[name] = len(self.names)
+        self.names.append(name)
+
+    def get(self, name):
+        return self.codes.get(name)
+
+    def encode(self, names):
+        # one dict lookup per distinct name, not per row
+        uniques, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        new = []
+        codes = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques.tolist()):
+            code = self.codes.get(name)
+            if code is None:
+                self._add(name)
+                code = len(self.names) - 1
+                new.append(name)
+            codes[i] = code
+        if new:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("".join(n + "\n" for n in new))
+        return codes[inverse.reshape(-1)]
+
+
+class ColumnTable:
+    def __init__(self, directory, name, columns):
+        self.directory = directory
+        self.name = name
+        self.columns = columns
+
+    def _generation_path(self):
+        return os.path.join(self.directory, f"{self.name}.generation")
+
+    def _generation(self):
+        try:
+            with open(self._generation_path(), encoding="ascii") as fh:
+                return int(fh.read())
+        except FileNotFoundError:
+            return 0
+
+    def _path(self, column, base=False, generation=None):
+        if generation is None:
+            generation = self._generation()
+        part = ("base." if base else "") + (f"g{generation}." if generation else "")
+        return os.path.join(self.directory, f"{self.name}.{part}{column}.bin")
+
+    def _map(self, base, generation=None):
+        # rows = shortest column, so a torn append is ignored here and cut
+        # off by the next append (see _committed_rows)
+        if generation is None:
+            generation = self._generation()
+        arrays = {}
+        for col, dtype in self.columns.items():
+            path = self._path(col, base, generation)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size < dtype.itemsize:
+                arrays[col] = np.empty(0, dtype=dtype)
+            else:
+                arrays[col] = np.memmap(path, dtype=dtype, mode="r", shape=(size // dtype.itemsize,))
+        rows = min(len(a) for a in arrays.values())
+        return {col: a[:rows] for col, a in arrays.items()}
+
+    def _committed_rows(self, generation):
+        # rows present in every tail column; anything past this in a column
+        # is left over from an append that was interrupted part way
+        paths = {col: self._path(col, generation=generation) for col in self.columns}
+        return min(
+            (os.path.getsize(paths[col]) if os.path.exists(paths[col]) else 0) // dtype.itemsize
+            for col, dtype in self.columns.items()
+        )
+
+    def append(self, **values):
+        rows = len(values["member"])
+        columns = {}
+        for col, dtype in self.columns.items():
+            data = np.asarray(values[col], dtype=dtype)
+            if data.shape != (rows,):
+                raise ValueError(f"column '{col}' has {data.size} values, expected {rows}")
+            columns[col] = data.tobytes()
+        # cut every column back to the common row count before writing, or a
+        # torn append would shift this and all later rows out of line
+        generation = self._generation()
+        committed = self._committed_rows(generation)
+        for col, dtype in self.columns.items():
+            with open(self._path(col, generation=generation), "ab") as fh:
+                fh.truncate(committed * dtype.itemsize)
+                fh.write(columns[col])
+        return rows
+
+    def query(self, member, start_day, end_day):
+        generation = self._generation()
+        base = self._map(True, generation)
+        lo, hi = np.searchsorted(base["member"], [member, member + 1])
+        days = base["day"][lo:hi]
+        a, b = lo + np.searchsorted(days, start_day), lo + np.searchsorted(days, end_day, side="right")
+        parts = [{col: arr[a:b] for col, arr in base.items()}]
+
+        tail = self._map(False, generation)
+        if len(tail["member"]):
+            mask = (tail["member"] == member) & (tail["day"] >= start_day) & (tail["day"] <= end_day)
+            parts.append({col: arr[mask] for col, arr in tail.items()})
+
+        result = {col: np.concatenate([p[col] for p in parts]) for col in self.columns}
+        if len(parts) > 1:
+            order = np.argsort(result["day"], kind="stable")
+            result = {col: arr[order] for col, arr in result.items()}
+        return result
+
+    def __len__(self):
+        generation = self._generation()
+        return len(self._map(True, generation)["member"]) + len(self._map(False, generation)["member"])
+
+    def scan(self, start_day, end_day):
+        # every row in the day range, base and tail together (unsorted)
+        generation = self._generation()
+        base, tail = self._map(True, generation), self._map(False, generation)
+        out = {}
+        for col in self.columns:
+            out[col] = np.concatenate([base[col], tail[col]])
+        mask = (out["day"] >= start_day) & (out["day"] <= end_day)
+        return {col: arr[mask] for col, arr in out.items()}
+
+    def compact(self):
+        old = self._generation()
+        base, tail = self._map(True, old), self._map(False, old)
+        if not len(tail["member"]):
+            return
+        new = old + 1
+        merged = {col: np.concatenate([base[col], tail[col]]) for col in self.columns}
+        order = np.lexsort((merged["day"], merged["member"]))
+        for col in self.columns:
+            # "wb" also clears what a compact() that crashed here left behind
+            with open(self._path(col, True, new), "wb") as fh:
+                merged[col][order].tofile(fh)
+                fh.flush()
+                os.fsync(fh.fileno())
+        del base, tail, merged  # release the old memmaps before deleting their files
+
+        # the switch: one rename moves everyone to the new base and empty tail
+        tmp = self._generation_path() + ".tmp"
+        with open(tmp, "w", encoding="ascii") as fh:
+            fh.write(str(new))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._generation_path())
+
+        for col in self.columns:
+            for part in (True, False):
+                try:
+                    os.remove(self._path(col, part, old))
+                except FileNotFoundError:
+                    pass
+
+
+class ProgressLog:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.members = CodeTable(os.path.join(directory, "members.txt"))
+        self.exercises = CodeTable(os.path.join(directory, "exercises.txt"))
+        self.weighins_table = ColumnTable(directory, "weighins", WEIGHIN_COLUMNS)
+        self.lifts_table = ColumnTable(directory, "lifts", LIFT_COLUMNS)
+
+    # ----- writing -----
+
+    def log_weighins(self, member_ids, dates, weights, waists=None):
+        if waists is None:
+            waists = np.full(len(member_ids), np.nan)
+        return self.weighins_table.append(
+            member=self.members.encode(member_ids), day=to_days(dates),
+            weight=weights, waist=waists,
+        )
+
+    def log_weighin(self, member_id, date, weight, waist=None):
+        return self.log_weighins([member_id], [date], [weight], [np.nan if waist is None else waist])
+
+    def log_lifts(self, member_ids, dates, exercises, loads, reps, sets):
+        return self.lifts_table.append(
+            member=self.members.encode(member_ids), day=to_days(dates),
+            exercise=self.exercises.encode(exercises), load=loads, reps=reps, sets=sets,
+        )
+
+    def log_lift(self, member_id, date, exercise, load, reps, sets=1):
+        return self.log_lifts([member_id], [date], [exercise], [load], [reps], [sets])
+
+    def compact(self):
+        self.weighins_table.compact()
+        self.lifts_table.compact()
+
+    # ----- reading -----
+
+    def _empty(self, columns):
+        return {col: np.empty(0, dtype=dtype) for col, dtype in columns.items()}
+
+    def weighins(self, member_id, start=None, end=None):
+        code = self.members.get(str(member_id))
+        if code is None:
+            return self._empty(WEIGHIN_COLUMNS)
+        return self.weighins_table.query(code, *_day_bounds(start, end))
+
+    def lifts(self, member_id, start=None, end=None, exercise=None):
+        code = self.members.get(str(member_id))
+        if code is None:
+            return self._empty(LIFT_COLUMNS)
+        rows = self.lifts_table.query(code, *_day_bounds(start, end))
+        if exercise is not None:
+            ex = self.exercises.get(exercise)
+            mask = rows["exercise"] == (-1 if ex is None else ex)
+            rows = {col: arr[mask] for col, arr in rows.items()}
+        return rows
+
+    def all_lifts(self, start=None, end=None):
+        return self.lifts_table.scan(*_day_bounds(start, end))
+
+    def weight_trend(self, member_id, height_cm, start=None, end=None, window=7):
+        rows = self.weighins(member_id, start, end)
+        days = rows["day"]
+        weight = rows["weight"].astype(np.float64)
+        rolling = rolling_mean(weight, window)
+        return {
+            "date": days.astype("datetime64[D]"),
+            "weight": weight,
+            "rolling_weight": rolling,
+            "bmi": calculate_bmi_array(height_cm, weight),
+            "rolling_bmi": calculate_bmi_array(height_cm, rolling),
+            "kg_per_week": trend_per_week(days, weight),
+        }
+
+
+# ---------- TREND HELPERS ----------
+
+def rolling_mean(values, window):
+    # mean of the last `window` entries (fewer at the start of the series)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values
+    csum = np.cumsum(values)
+    out = csum.copy()
+    out[window:] = csum[window:] - csum[:-window]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return out / counts
+
+
+def trend_per_week(days, values):
+    # least-squares slope, in value units per 7 days; NaN with fewer than two days
+    days = np.asarray(days, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(days) < 2 or days[0] == days[-1]:
+        return float("nan")
+    x = days - days.mean()
+    return float((x * (values - values.mean())).sum() / (x * x).sum() * 7)
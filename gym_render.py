@@ -0,0 +1,576 @@
+# Smart Gym Planner - streaming plan renderer
+#
+# render_plan() yields the plan as a series of string chunks so callers can
+# write straight to a file or socket. The workout, meal and tips sections
+# only depend on (goal, experience, activity, diet_pref) and the joint
+# restrictions parsed from the notes, so they are rendered once per key and
+# format and reused; only the member header and the protein line are
+# formatted per member.
+#
+# With a locale (gym_locale) the plan records are translated and the static
+# sections rendered once per locale and key, by a copy of the renderer that
+# carries the locale's labels; English output is unchanged.
+
+import json
+from functools import lru_cache
+from html import escape
+
+from gym_injuries import parse_notes
+from gym_locale import CLOSING_NOTE, ENGLISH, get_locale  # noqa: F401  (CLOSING_NOTE re-exported)
+from gym_model import DietPlan
+from gym_planner import (
+    calculate_bmi,
+    get_bmi_status,
+    get_diet_plan,
+    get_general_tips,
+    get_restricted_workout_plan,
+    on_rules_changed,
+)
+from gym_validate import DIET_TEXT, GOAL_TEXT  # noqa: F401  (re-exported for existing callers)
+
+
+class Member:
+    __slots__ = ("age", "gender", "height", "weight", "goal", "activity", "experience",
+                 "diet_pref", "name", "notes", "bmi", "bmi_status", "diet_text", "goal_text")
+
+    def __init__(self, age, gender, height, weight, goal, activity, experience, diet_pref,
+                 name="", notes=""):
+        self.age = age
+        self.gender = gender
+        self.height = height
+        self.weight = weight
+        self.goal = goal
+        self.activity = activity
+        self.experience = experience
+        self.diet_pref = diet_pref
+        self.name = name
+        self.notes = notes
+        self.bmi = calculate_bmi(height, weight)
+        self.bmi_status = get_bmi_status(self.bmi)
+        self.diet_text = DIET_TEXT.get(diet_pref, "Eggetarian")
+        self.goal_text = GOAL_TEXT.get(goal, goal)
+
+
+# ---------- FORMATS ----------
+# A renderer turns the plan pieces into strings. The static_* methods are
+# only called on a cache miss; header() and diet_summary() run per member.
+#
+# Labels come from self.t (a gym_locale.Locale). localised(t) returns a copy
+# for another locale whose header() is header_localised(), filling the
+# pieces of header_template() compiled for that locale. The English header
+# keeps its literals, so the default path does no label lookups.
+
+class _Localisable:
+    t = ENGLISH
+    _escape = staticmethod(str)
+
+    def localised(self, t):
+        import copy  # first localised render only
+
+        other = copy.copy(self)
+        other.t = t
+        if hasattr(other, "header_template"):
+            # labels are baked in once per locale; per member the header is a
+            # single f-string over the literal pieces
+            header, name_line, notes_line = other.header_template(other._label)
+            other._header = _template_pieces(header, _HEADER_FIELDS)
+            other._name_line = _template_pieces(name_line, ("",))
+            other._notes_line = _template_pieces(notes_line, ("",))
+            other._not_available = other._escape(t.not_available)
+            other._values = {}
+            other.header = other.header_localised
+        return other
+
+    def _label(self, attr):
+        # a label of self.t, escaped for this format and for str.format
+        return self._escape(getattr(self.t, attr)).replace("{", "{{").replace("}", "}}")
+
+    def header_localised(self, m):
+        # numbers and unit labels go in as the locale formats them; the input
+        # values come from small sets, so they are translated once per combination
+        t = self.t
+        p = self._header
+        key = (m.gender, m.diet_text, m.goal_text, m.activity, m.experience, m.bmi_status)
+        values = self._values.get(key)
+        if values is None:
+            if len(self._values) >= 4096:
+                self._values.clear()
+            values = self._values[key] = tuple(self._escape(t.value(v)) for v in key)
+        gender, diet, goal, activity, experience, status = values
+        name = f"{self._name_line[0]}{self._escape(m.name)}{self._name_line[1]}" if m.name else ""
+        notes = f"{self._notes_line[0]}{self._escape(m.notes)}{self._notes_line[1]}" if m.notes else ""
+        bmi = self._not_available if m.bmi is None else f"{t.format_number(m.bmi, 1)} ({status})"
+        return (f"{p[0]}{name}{p[1]}{m.age}{p[2]}{gender}{p[3]}{diet}"
+                f"{p[4]}{t.format_height(m.height)}{p[5]}{t.format_weight(m.weight)}{p[6]}{bmi}"
+                f"{p[7]}{goal}{p[8]}{activity}{p[9]}{experience}{p[10]}{notes}{p[11]}")
+
+
+class TextRenderer(_Localisable):
+    separator = "\n\n" + "-" * 60 + "\n\n"
+
+    def header(self, m):
+        lines = ["=== SMART GYM PLANNER ==="]
+        if m.name:
+            lines.append(f"Personalised plan for: {m.name}")
+        lines.append("")
+        lines.append("1. OVERVIEW")
+        lines.append(f"Age: {m.age} yrs | Gender: {m.gender} | Diet: {m.diet_text}")
+        lines.append(f"Height: {m.height} cm | Weight: {m.weight} kg")
+        if m.bmi is not None:
+            lines.append(f"BMI: {m.bmi:.1f} ({m.bmi_status})")
+        else:
+            lines.append("BMI: N/A")
+        lines.append(f"Goal: {m.goal_text}")
+        lines.append(f"Activity: {m.activity} | Experience: {m.experience}")
+        if m.notes:
+            lines.append(f"Notes: {m.notes}")
+        lines.append("")
+        return _lines(lines)
+
+    def header_template(self, label):
+        # (header, name line, notes line) with this locale's labels
+        return (
+            f"=== {label('app_title').upper()} ===\n{{name}}\n"
+            f"1. {label('overview').upper()}\n"
+            f"{label('age')}: {{age}} {label('years')} | {label('gender')}: {{gender}} | {label('diet')}: {{diet}}\n"
+            f"{label('height')}: {{height}} | {label('weight')}: {{weight}}\n"
+            f"{label('bmi')}: {{bmi}}\n"
+            f"{label('goal')}: {{goal}}\n"
+            f"{label('activity')}: {{activity}} | {label('experience')}: {{experience}}\n"
+            f"{{notes}}\n",
+            f"{label('plan_for')}: {{}}\n",
+            f"{label('notes')}: {{}}\n",
+        )
+
+    def static_workout(self, workout):
+        lines = [f"2. {self.t.workout_plan.upper()}", workout.title, workout.summary, ""]
+        for day in workout.days:
+            lines.append(f"- {day.name}")
+            for item in day.items:
+                lines.append(f"    • {item}")
+            lines.append("")
+        lines.append("")
+        return _lines(lines)
+
+    def static_diet_title(self, diet):
+        return _lines([f"3. {self.t.meal_guidance.upper()}", diet.title])
+
+    def diet_summary(self, diet):
+        return diet.summary + "\n"
+
+    def static_diet_body(self, diet):
+        lines = [""]
+        for meal in diet.meals:
+            lines.append(f"- {meal.name}:")
+            for item in meal.items:
+                lines.append(f"    • {item}")
+            lines.append("")
+        lines.append(f"{self.t.extra_rules}:")
+        for ex in diet.extras:
+            lines.append(f"    • {ex}")
+        lines.append("")
+        return _lines(lines)
+
+    def static_tips(self, tips):
+        lines = [f"4. {self.t.extra_tips.upper()}"]
+        for tip in tips:
+            lines.append(f"- {tip}")
+        lines.append("")
+        return _lines(lines) + self.t.closing_note
+
+
+class MarkdownRenderer(_Localisable):
+    separator = "\n\n---\n\n"
+
+    @staticmethod
+    def _escape(text):
+        return _md(text)
+
+    def header(self, m):
+        lines = ["# Smart Gym Planner"]
+        if m.name:
+            lines.append(f"Personalised plan for: **{_md(m.name)}**")
+        lines.append("")
+        lines.append("## 1. Overview")
+        lines.append("")
+        lines.append(f"- **Age:** {m.age} yrs | **Gender:** {_md(m.gender)} | **Diet:** {m.diet_text}")
+        lines.append(f"- **Height:** {m.height} cm | **Weight:** {m.weight} kg")
+        if m.bmi is not None:
+            lines.append(f"- **BMI:** {m.bmi:.1f} ({m.bmi_status})")
+        else:
+            lines.append("- **BMI:** N/A")
+        lines.append(f"- **Goal:** {_md(m.goal_text)}")
+        lines.append(f"- **Activity:** {_md(m.activity)} | **Experience:** {_md(m.experience)}")
+        if m.notes:
+            lines.append(f"- **Notes:** {_md(m.notes)}")
+        lines.append("")
+        return _lines(lines)
+
+    def header_template(self, label):
+        return (
+            f"# {label('app_title')}\n{{name}}\n"
+            f"## 1. {label('overview')}\n\n"
+            f"- **{label('age')}:** {{age}} {label('years')} | **{label('gender')}:** {{gender}} | "
+            f"**{label('diet')}:** {{diet}}\n"
+            f"- **{label('height')}:** {{height}} | **{label('weight')}:** {{weight}}\n"
+            f"- **{label('bmi')}:** {{bmi}}\n"
+            f"- **{label('goal')}:** {{goal}}\n"
+            f"- **{label('activity')}:** {{activity}} | **{label('experience')}:** {{experience}}\n"
+            f"{{notes}}\n",
+            f"{label('plan_for')}: **{{}}**\n",
+            f"- **{label('notes')}:** {{}}\n",
+        )
+
+    def static_workout(self, workout):
+        lines = [f"## 2. {self.t.workout_plan}", "", f"### {workout.title}", "", workout.summary, ""]
+        for day in workout.days:
+            lines.append(f"#### {day.name}")
+            lines.append("")
+            lines.extend(f"- {item}" for item in day.items)
+            lines.append("")
+        return _lines(lines)
+
+    def static_diet_title(self, diet):
+        return _lines([f"## 3. {self.t.meal_guidance}", "", f"### {diet.title}", ""])
+
+    def diet_summary(self, diet):
+        return diet.summary + "\n"
+
+    def static_diet_body(self, diet):
+        lines = [""]
+        for meal in diet.meals:
+            lines.append(f"#### {meal.name}")
+            lines.append("")
+            lines.extend(f"- {item}" for item in meal.items)
+            lines.append("")
+        lines.append(f"#### {self.t.extra_rules}")
+        lines.append("")
+        lines.extend(f"- {ex}" for ex in diet.extras)
+        lines.append("")
+        return _lines(lines)
+
+    def static_tips(self, tips):
+        lines = [f"## 4. {self.t.extra_tips}", ""]
+        lines.extend(f"- {tip}" for tip in tips)
+        lines.append("")
+        return _lines(lines) + f"_{self.t.closing_note}_\n"
+
+
+class JSONRenderer(_Localisable):
+    # One compact JSON object per plan, so batch output is valid JSON Lines.
+    # Member fields stay the raw input codes in every locale.
+    separator = "\n"
+
+    def header(self, m):
+        member = {
+            "name": m.name,
+            "age": m.age,
+            "gender": m.gender,
+            "height": m.height,
+            "weight": m.weight,
+            "bmi": None if m.bmi is None else round(m.bmi, 1),
+            "bmi_status": m.bmi_status,
+            "goal": m.goal,
+            "activity": m.activity,
+            "experience": m.experience,
+            "diet_pref": m.diet_pref,
+            "notes": m.notes,
+        }
+        return '{"member":' + _json(member)
+
+    def static_workout(self, workout):
+        return ',"workout":' + _json(_plain(workout))
+
+    def static_diet_title(self, diet):
+        return ',"diet":{"title":' + _json(diet.title)
+
+    def diet_summary(self, diet):
+        return ',"summary":' + _json(diet.summary)
+
+    def static_diet_body(self, diet):
+        return ',"meals":' + _json(_plain(diet.meals)) + ',"extras":' + _json(list(diet.extras)) + "}"
+
+    def static_tips(self, tips):
+        return ',"tips":' + _json(list(tips)) + "}"
+
+
+class HTMLRenderer(_Localisable):
+    # Same dark card look as index.html / login.html.
+    separator = "\n"
+    _escape = staticmethod(escape)
+
+    _HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8" />
+  <title>Smart Gym Planner – Your Plan</title>
+  <style>
+    body { margin: 0; background: #020617; color: #e5e7eb;
+           font-family: system-ui, -apple-system, "Segoe UI", sans-serif; }
+    .main-card { max-width: 820px; margin: 32px auto; padding: 28px 26px;
+                 background: #020617; border: 1px solid #1f2937; border-radius: 18px;
+                 box-shadow: 0 20px 45px rgba(0, 0, 0, 0.7); }
+    .title { font-size: 1.6rem; margin: 0 0 6px; }
+    .subtitle { font-size: 0.9rem; color: #9ca3af; margin: 0 0 18px; }
+    h2 { font-size: 1.1rem; color: #38bdf8; margin-top: 24px; }
+    h3 { font-size: 1rem; margin-bottom: 4px; }
+    h4 { font-size: 0.9rem; margin: 14px 0 4px; }
+    p, li { font-size: 0.9rem; line-height: 1.45; }
+    .summary, .disclaimer { color: #9ca3af; }
+    .overview { list-style: none; padding: 16px; border-radius: 12px;
+                border: 1px solid #1f2937; background: #0f172a; }
+    .disclaimer { font-size: 0.8rem; text-align: center; margin-top: 24px; }
+  </style>
+</head>
+<body>
+  <main class="main-card">
+"""
+
+    def header(self, m):
+        parts = [self._HEAD, '    <h1 class="title">Smart Gym Planner</h1>\n']
+        if m.name:
+            parts.append(f'    <p class="subtitle">Personalised plan for: {escape(m.name)}</p>\n')
+        bmi = "N/A" if m.bmi is None else f"{m.bmi:.1f} ({m.bmi_status})"
+        rows = [
+            f"Age: {m.age} yrs | Gender: {escape(m.gender)} | Diet: {m.diet_text}",
+            f"Height: {m.height} cm | Weight: {m.weight} kg",
+            f"BMI: {bmi}",
+            f"Goal: {escape(m.goal_text)}",
+            f"Activity: {escape(m.activity)} | Experience: {escape(m.experience)}",
+        ]
+        if m.notes:
+            rows.append(f"Notes: {escape(m.notes)}")
+        parts.append("    <h2>1. Overview</h2>\n")
+        parts.append(_html_list(rows, 'class="overview"', escaped=True))
+        return "".join(parts)
+
+    def header_template(self, label):
+        t = self.t
+        head = self._HEAD.replace('lang="en"', f'lang="{escape(t.code)}"').replace(
+            "<title>Smart Gym Planner – Your Plan</title>",
+            f"<title>{escape(t.app_title)} – {escape(t.your_plan)}</title>")
+        return (
+            head.replace("{", "{{").replace("}", "}}")
+            + f'    <h1 class="title">{label("app_title")}</h1>\n{{name}}'
+            f"    <h2>1. {label('overview')}</h2>\n"
+            '    <ul class="overview">\n'
+            f"      <li>{label('age')}: {{age}} {label('years')} | {label('gender')}: {{gender}} | "
+            f"{label('diet')}: {{diet}}</li>\n"
+            f"      <li>{label('height')}: {{height}} | {label('weight')}: {{weight}}</li>\n"
+            f"      <li>{label('bmi')}: {{bmi}}</li>\n"
+            f"      <li>{label('goal')}: {{goal}}</li>\n"
+            f"      <li>{label('activity')}: {{activity}} | {label('experience')}: {{experience}}</li>\n"
+            "{notes}    </ul>\n",
+            f'    <p class="subtitle">{label("plan_for")}: {{}}</p>\n',
+            f"      <li>{label('notes')}: {{}}</li>\n",
+        )
+
+    def static_workout(self, workout):
+        parts = [
+            f"    <h2>2. {escape(self.t.workout_plan)}</h2>\n",
+            f"    <h3>{escape(workout.title)}</h3>\n",
+            f'    <p class="summary">{escape(workout.summary)}</p>\n',
+        ]
+        for day in workout.days:
+            parts.append(f"    <h4>{escape(day.name)}</h4>\n")
+            parts.append(_html_list(day.items))
+        return "".join(parts)
+
+    def static_diet_title(self, diet):
+        return f"    <h2>3. {escape(self.t.meal_guidance)}</h2>\n    <h3>{escape(diet.title)}</h3>\n"
+
+    def diet_summary(self, diet):
+        return f'    <p class="summary">{escape(diet.summary)}</p>\n'
+
+    def static_diet_body(self, diet):
+        parts = []
+        for meal in diet.meals:
+            parts.append(f"    <h4>{escape(meal.name)}</h4>\n")
+            parts.append(_html_list(meal.items))
+        parts.append(f"    <h4>{escape(self.t.extra_rules)}</h4>\n")
+        parts.append(_html_list(diet.extras))
+        return "".join(parts)
+
+    def static_tips(self, tips):
+        return (
+            f"    <h2>4. {escape(self.t.extra_tips)}</h2>\n"
+            + _html_list(tips)
+            + f'    <p class="disclaimer">{escape(self.t.closing_note)}</p>\n'
+            + "  </main>\n</body>\n</html>\n"
+        )
+
+
+RENDERERS = {
+    "text": TextRenderer(),
+    "markdown": MarkdownRenderer(),
+    "json": JSONRenderer(),
+    "html": HTMLRenderer(),
+}
+
+
+def register_renderer(fmt, renderer):
+    RENDERERS[fmt] = renderer
+    _static_sections.cache_clear()
+    _localised_renderer.cache_clear()
+    _locale_renderer.cache_clear()
+    _localised_sections.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _localised_renderer(fmt, t):
+    renderer = RENDERERS[fmt]
+    # renderers registered without localised() keep their own labels
+    return renderer.localised(t) if hasattr(renderer, "localised") else renderer
+
+
+@lru_cache(maxsize=256)
+def _locale_renderer(fmt, locale):
+    # (renderer, Locale) per format and locale spelling: one lookup per render
+    t = get_locale(locale)
+    return (RENDERERS[fmt] if t is ENGLISH else _localised_renderer(fmt, t)), t
+
+
+# ---------- HELPERS ----------
+
+_HEADER_FIELDS = ("name", "age", "gender", "diet", "height", "weight", "bmi", "goal", "activity",
+                  "experience", "notes")
+
+
+def _template_pieces(template, fields):
+    # the literal text around each {field} of a header template, in order
+    from string import Formatter
+
+    pieces, found, literal = [], [], ""
+    for text, field, _, _ in Formatter().parse(template):
+        literal += text   # "{{" and "}}" split the literal text
+        if field is not None:
+            pieces.append(literal)
+            found.append(field)
+            literal = ""
+    if tuple(found) != fields:
+        raise ValueError(f"header template fields {tuple(found)} != {fields}")
+    return (*pieces, literal)
+
+
+def _lines(lines):
+    return "\n".join(lines) + "\n"
+
+
+def _md(text):
+    return str(text).replace("\\", "\\\\").replace("*", "\\*").replace("_", "\\_")
+
+
+def _json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _plain(obj):
+    # plan records and tuples; json wants dict / list
+    if hasattr(obj, "as_dict"):
+        return {k: _plain(v) for k, v in obj.as_dict().items()}
+    if hasattr(obj, "keys"):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return obj
+
+
+def _html_list(items, attrs="", escaped=False):
+    open_tag = f"    <ul {attrs}>\n" if attrs else "    <ul>\n"
+    rows = "".join(f"      <li>{item if escaped else escape(item)}</li>\n" for item in items)
+    return open_tag + rows + "    </ul>\n"
+
+
+# ---------- RENDERING ----------
+
+@lru_cache(maxsize=1024)
+def _static_sections(fmt, goal, experience, activity, diet_pref, restrictions):
+    renderer = RENDERERS[fmt]
+    workout = get_restricted_workout_plan(goal, experience, activity, restrictions)
+    diet = get_diet_plan(goal, diet_pref, 0)
+    tips = get_general_tips(goal)
+    return (
+        renderer.static_workout(workout),
+        renderer.static_diet_title(diet),
+        renderer.static_diet_body(diet),
+        renderer.static_tips(tips),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _localised_sections(t, fmt, goal, experience, activity, diet_pref, restrictions):
+    renderer = _localised_renderer(fmt, t)
+    workout = t.translate_workout(get_restricted_workout_plan(goal, experience, activity, restrictions))
+    diet = t.translate_diet(get_diet_plan(goal, diet_pref, 0))
+    tips = t.translate_tips(get_general_tips(goal))
+    return (
+        renderer.static_workout(workout),
+        renderer.static_diet_title(diet),
+        renderer.static_diet_body(diet),
+        renderer.static_tips(tips),
+    )
+
+
+_localised_summaries = {}   # (localised renderer, English summary) -> rendered chunk
+
+
+def _localised_summary(renderer, diet):
+    # the summary (protein target) is the only per-member diet text; title
+    # and meals come from _localised_sections
+    key = (renderer, diet.summary)
+    out = _localised_summaries.get(key)
+    if out is None:
+        if len(_localised_summaries) >= 4096:
+            _localised_summaries.clear()
+        translated = DietPlan(diet.title, renderer.t.text(diet.summary), diet.meals, diet.extras)
+        out = _localised_summaries[key] = renderer.diet_summary(translated)
+    return out
+
+
+@on_rules_changed
+def _rules_changed():
+    _static_sections.cache_clear()
+    _localised_sections.cache_clear()
+    _localised_summaries.clear()
+
+
+def render_plan(age, gender, height, weight, goal, activity, experience, diet_pref,
+                name="", notes="", fmt="text", locale=None):
+    # locale: a gym_locale code or Locale; None is English
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"unknown plan format '{fmt}'") from None
+
+    t = ENGLISH
+    if locale is not None:
+        renderer, t = _locale_renderer(fmt, locale)
+    member = Member(age, gender, height, weight, goal, activity, experience, diet_pref,
+                    name=name, notes=notes)
+    diet = get_diet_plan(goal, diet_pref, weight)
+    if t is ENGLISH:
+        workout, diet_title, diet_body, tips = _static_sections(fmt, goal, experience, activity, diet_pref,
+                                                                parse_notes(notes))
+        summary = renderer.diet_summary(diet)
+    else:
+        workout, diet_title, diet_body, tips = _localised_sections(t, fmt, goal, experience, activity,
+                                                                   diet_pref, parse_notes(notes))
+        summary = _localised_summary(renderer, diet)
+
+    yield renderer.header(member)
+    yield workout
+    yield diet_title
+    yield summary
+    yield diet_body
+    yield tips
+
+
+def write_plan(out, *args, **kwargs):
+    for chunk in render_plan(*args, **kwargs):
+        out.write(chunk)
+
+
+def format_plan(age, gender, height, weight, goal, activity, experience, diet_pref,
+                name="", notes="", fmt="text", locale=None):
+    return "".join(render_plan(age, gender, height, weight, goal, activity, experience, diet_pref,
+                               name=name, notes=notes, fmt=fmt, locale=locale))
@@ -0,0 +1,271 @@
+# Smart Gym Planner - coach-editable plan rules
+#
+# Workout templates, meal guidance, tips and the modifiers that tweak them
+# ("beginners get this note", "sedentary fat-loss members get a steps
+# target") live in a rule file (rules/plans.json by default, YAML also
+# accepted when PyYAML is installed). compile_rules() turns the file into a
+# RuleIndex: every plan for the known inputs is built up front and keyed by
+# its input tuple, so the planner answers with one dict lookup.
+#
+# Modifiers are applied in file order. `when` maps an input to one value or
+# a list of values; a modifier applies when every listed input matches.
+#   {"when": {"goal": "fat-loss", "activity": "sedentary"}, "summary": " ..."}
+#   {"when": {"goal": "muscle-gain"}, "tip": "..."}
+# "summary" text is appended to the workout summary and may test goal,
+# experience and activity; "tip" lines are added to the tips and may only
+# test goal, since tips are looked up by goal alone.
+#
+# Set GYM_PLANNER_RULES to load another file. gym_planner.use_rules() swaps
+# a freshly compiled index in; RuleWatcher tells a long-running process when
+# the file changed. RuleIndex.version is a hash of the rule content, so
+# caches of generated plans (gym_plancache) can tell which rules built them.
+
+import json
+import os
+import sys
+
+from gym_model import Day, Meal, WorkoutPlan, parse_exercise
+
+
+DEFAULT_RULES = os.environ.get("GYM_PLANNER_RULES") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "rules", "plans.json")
+RULES_VERSION = 1
+DIET_TITLE = "Daily Meal Guidance ({diet})"
+
+INPUTS = ("goal", "experience", "activity", "diet_pref")
+MODIFIER_INPUTS = {
+    "summary": ("goal", "experience", "activity"),
+    "tip": ("goal",),
+}
+
+
+class RuleError(ValueError):
+    pass
+
+
+class RuleIndex:
+    # Compiled, read-only view of one rule file. Indexes are swapped whole,
+    # never modified, so a lookup sees either the old rules or the new ones.
+    __slots__ = (
+        "source", "mtime", "canonical", "_version",
+        "goals", "experience_levels", "activity_levels", "diet_prefs",
+        "fallback_workout", "fallback_diet", "fallback_extras",
+        "templates", "workout_days", "workouts", "exercises", "summary_rules",
+        "restriction_note",
+        "diet_titles", "diet_sections", "diet_summary", "diet_extras",
+        "base_tips", "tips",
+    )
+
+    def summary_for(self, goal, experience, activity):
+        template = goal if goal in self.templates else self.fallback_workout
+        summary = self.templates[template][1]
+        values = {"goal": goal, "experience": experience, "activity": activity}
+        for when, text in self.summary_rules:
+            if all(values[field] in allowed for field, allowed in when):
+                summary += text
+        return summary
+
+    @property
+    def version(self):
+        # hashed on first use: hashlib is slow to import and most runs never ask
+        if self._version is None:
+            import hashlib
+
+            self._version = hashlib.blake2b(self.canonical.encode(), digest_size=8).hexdigest()
+        return self._version
+
+    def __repr__(self):
+        return f"<RuleIndex {self.source!r}: {len(self.workouts)} workout plans>"
+
+
+# ---------- LOADING ----------
+
+def read_rules(path):
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise RuleError(f"{path}: PyYAML is required for YAML rule files") from None
+            try:
+                return yaml.safe_load(fh)
+            except yaml.YAMLError as exc:
+                raise RuleError(f"{path}: {exc}") from None
+        try:
+            return json.load(fh)
+        except json.JSONDecodeError as exc:
+            raise RuleError(f"{path}: {exc}") from None
+
+
+def load_rules(path=DEFAULT_RULES):
+    mtime = os.stat(path).st_mtime_ns
+    return compile_rules(read_rules(path), source=path, mtime=mtime)
+
+
+# ---------- COMPILING ----------
+
+def _require(data, key, kind, where):
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, kind):
+        raise RuleError(f"{where}: '{key}' must be a {'list' if kind is list else kind.__name__}")
+    return value
+
+
+def _strings(values, where):
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise RuleError(f"{where}: expected a list of strings")
+    return tuple(map(sys.intern, values))
+
+
+def _template(data, key, where, **sample):
+    # a str.format template filled per plan; formatted once here so a typo in
+    # a field name fails the compile (and a reload keeps the old rules)
+    # instead of every plan request
+    text = _require(data, key, str, where)
+    try:
+        text.format(**sample)
+    except (KeyError, IndexError) as exc:
+        field = f"'{exc.args[0]}'" if isinstance(exc, KeyError) else "{} (positional)"
+        raise RuleError(f"{where}: '{key}' uses unknown field {field}; "
+                        f"available: {', '.join(sample)}") from None
+    except ValueError as exc:
+        raise RuleError(f"{where}: '{key}' is not a valid template: {exc}") from None
+    return text
+
+
+def _sections(entries, where):
+    sections = []
+    for i, entry in enumerate(entries):
+        name = _require(entry, "name", str, f"{where}[{i}]")
+        sections.append((name, _strings(entry.get("items"), f"{where}[{i}].items")))
+    return tuple(sections)
+
+
+def _compile_modifiers(modifiers, inputs):
+    summary_rules, tip_rules = [], []
+    for i, modifier in enumerate(modifiers):
+        where = f"modifiers[{i}]"
+        when = _require(modifier, "when", dict, where)
+        kinds = [k for k in MODIFIER_INPUTS if k in modifier]
+        if len(kinds) != 1:
+            raise RuleError(f"{where}: needs exactly one of {', '.join(MODIFIER_INPUTS)}")
+        kind = kinds[0]
+        text = _require(modifier, kind, str, where)
+
+        conditions = []
+        for field, allowed in when.items():
+            if field not in MODIFIER_INPUTS[kind]:
+                raise RuleError(f"{where}: a '{kind}' modifier cannot depend on '{field}'")
+            allowed = frozenset([allowed] if isinstance(allowed, str) else _strings(allowed, f"{where}.when.{field}"))
+            unknown = allowed - set(inputs[field])
+            if unknown:
+                raise RuleError(f"{where}: unknown {field} {', '.join(sorted(unknown))}")
+            conditions.append((field, allowed))
+        (summary_rules if kind == "summary" else tip_rules).append((tuple(conditions), sys.intern(text)))
+    return tuple(summary_rules), tuple(tip_rules)
+
+
+def compile_rules(data, source="<rules>", mtime=0):
+    if not isinstance(data, dict):
+        raise RuleError(f"{source}: expected a mapping at the top level")
+    if data.get("version") != RULES_VERSION:
+        raise RuleError(f"{source}: unsupported rules version {data.get('version')!r}")
+
+    index = RuleIndex()
+    index.source, index.mtime = source, mtime
+    index.canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    index._version = None
+    inputs_data = _require(data, "inputs", dict, source)
+    inputs = {field: _strings(inputs_data.get(field), f"inputs.{field}") for field in INPUTS}
+    index.goals, index.experience_levels = inputs["goal"], inputs["experience"]
+    index.activity_levels, index.diet_prefs = inputs["activity"], inputs["diet_pref"]
+
+    # workouts
+    templates, workout_days = {}, {}
+    for goal, template in _require(data, "workouts", dict, source).items():
+        where = f"workouts.{goal}"
+        templates[goal] = (sys.intern(_require(template, "title", str, where)),
+                           _require(template, "summary", str, where))
+        days = _sections(_require(template, "days", list, where), f"{where}.days")
+        if not days:
+            raise RuleError(f"{where}: 'days' must not be empty")
+        workout_days[goal] = tuple(Day(name, tuple(map(parse_exercise, items))) for name, items in days)
+    missing = set(index.goals) - templates.keys()
+    if missing:
+        raise RuleError(f"{source}: no workout for goal {', '.join(sorted(missing))}")
+    fallback = _require(data, "fallback", dict, source)
+    index.fallback_workout = _require(fallback, "workout", str, "fallback")
+    if index.fallback_workout not in templates:
+        raise RuleError(f"fallback.workout: unknown workout '{index.fallback_workout}'")
+    index.templates, index.workout_days = templates, workout_days
+    index.restriction_note = _template(data, "restriction_note", source, joints="knee", swapped=1, removed=0)
+
+    index.summary_rules, tip_rules = _compile_modifiers(data.get("modifiers", []), inputs)
+    index.workouts = {
+        (goal, experience, activity): WorkoutPlan(templates[goal][0],
+                                                  sys.intern(index.summary_for(goal, experience, activity)),
+                                                  workout_days[goal])
+        for goal in index.goals
+        for experience in index.experience_levels
+        for activity in index.activity_levels
+    }
+
+    # every exercise that appears in a template, by id (first prescription wins)
+    index.exercises = {}
+    for days in workout_days.values():
+        for day in days:
+            for ex in day.exercises:
+                index.exercises.setdefault(ex.exercise_id, ex)
+
+    # diet
+    index.diet_titles, index.diet_sections = {}, {}
+    for pref, diet in _require(data, "diets", dict, source).items():
+        where = f"diets.{pref}"
+        name = _require(diet, "name", str, where)
+        index.diet_titles[pref] = sys.intern(DIET_TITLE.format(diet=name))
+        index.diet_sections[pref] = tuple(
+            Meal(sys.intern(meal), items) for meal, items in _sections(_require(diet, "meals", list, where), f"{where}.meals")
+        )
+    missing = set(index.diet_prefs) - index.diet_sections.keys()
+    if missing:
+        raise RuleError(f"{source}: no diet for diet_pref {', '.join(sorted(missing))}")
+    index.diet_summary = _template(data, "diet_summary", source, protein=100)
+    index.diet_extras = {goal: _strings(extras, f"diet_extras.{goal}")
+                         for goal, extras in _require(data, "diet_extras", dict, source).items()}
+    index.fallback_diet = _require(fallback, "diet", str, "fallback")
+    index.fallback_extras = _require(fallback, "diet_extras", str, "fallback")
+    if index.fallback_diet not in index.diet_sections:
+        raise RuleError(f"fallback.diet: unknown diet '{index.fallback_diet}'")
+    if index.fallback_extras not in index.diet_extras:
+        raise RuleError(f"fallback.diet_extras: unknown goal '{index.fallback_extras}'")
+
+    # tips
+    index.base_tips = _strings(_require(data, "tips", list, source), "tips")
+    if not index.base_tips:
+        raise RuleError(f"{source}: 'tips' must not be empty")
+    index.tips = {
+        goal: index.base_tips + tuple(text for when, text in tip_rules
+                                      if all(goal in allowed for _, allowed in when))
+        for goal in index.goals
+    }
+    return index
+
+
+# ---------- RELOADING ----------
+
+class RuleWatcher:
+    # poll() returns a newly compiled index when the file's mtime moved, else
+    # None. Compiling is the slow part, so callers run poll() off the request
+    # path and only swap the result in.
+    __slots__ = ("path", "mtime")
+
+    def __init__(self, path, mtime=None):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns if mtime is None else mtime
+
+    def poll(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return None
+        self.mtime = mtime  # a broken file is reported once, not on every poll
+        return compile_rules(read_rules(self.path), source=self.path, mtime=mtime)
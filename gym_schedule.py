@@ -0,0 +1,587 @@
+# Smart Gym Planner - weekly schedule optimiser for shared equipment
+#
+# Usage:
+#   python gym_schedule.py roster.csv -o week.csv
+#   python gym_schedule.py roster.csv --format json --equipment equipment.json -o week.ndjson
+#   python gym_schedule.py roster.csv --hours "Mon-Fri 06:00-22:00; Sat,Sun 08:00-18:00" --report load.json
+#
+# Every member trains their plan's days (get_workout_plan) once a week, in
+# plan order and on different days, inside their availability: a roster
+# column such as "Mon,Wed 18:00-21:00; Sat 08:00-12:00" (empty means any
+# time the gym is open). The optimiser picks each session's day, start time
+# and exercise order so that as few members as possible wait for a machine.
+#
+# Equipment index: the equipment of each exercise in
+# gym_injuries.EXERCISE_INFO becomes the stations that can serve it
+# ("barbell / machine" on a squat is a barbell or the leg press); bodyweight
+# items need none. A station has a capacity (units on the floor,
+# DEFAULT_INVENTORY or --equipment) and a load per TICK_MINUTES of the week.
+#
+# One more member on a station tick costs 1 when the station is already
+# full (somebody waits) plus SPREAD_WEIGHT x its utilisation, so quiet times
+# win ties. With prefix sums of that cost per station and day, a session's cost at
+# every candidate start under every exercise order is one vectorised gather.
+# Sessions are placed greedily, least flexible members first, then local
+# search lifts each session out (worst first) and puts it back at its
+# cheapest position until a pass stops improving or the time limit is hit.
+#
+# Exercise order: the first item (main lift or warm-up) and cardio,
+# mobility and core items keep their place; the other lifts may be rotated, the
+# circuit trick that keeps members on the same plan day off the same
+# machine at the same time.
+
+import re
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from gym_injuries import EXERCISE_INFO
+from gym_planner import get_workout_plan
+
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+TICK_MINUTES = 5
+DAY_TICKS = 24 * 60 // TICK_MINUTES
+WEEK_TICKS = 7 * DAY_TICKS
+START_STEP = 3               # ticks; sessions start on the quarter hour
+DEFAULT_HOURS = "daily 06:00-22:00"
+
+# time an item holds its station
+SECONDS_PER_REP = 4
+REST_SECONDS = 90
+SECONDS_PER_SET = 45         # sets without a rep count ("3 sets each")
+DEFAULT_ITEM_MINUTES = 10    # free-form items ("HIIT: 30s fast, 60s slow × 8 rounds")
+
+SPREAD_WEIGHT = 0.05
+REST_DAY_PENALTY = 6.0       # for sessions on consecutive days, in waiting ticks
+LOCAL_SEARCH_PASSES = 4
+FIXED_PATTERNS = ("cardio", "mobility", "core")  # items that keep their place in a session
+DEFAULT_TIME_LIMIT = 2.0     # seconds of local search at most
+
+FREE_EQUIPMENT = frozenset({"bodyweight", "none", "any", "band"})
+EQUIPMENT_ALIASES = {"dumbbell": "dumbbells", "bar": "pull-up bar"}
+# machines and cable stations dedicated to one movement
+STATION_NAMES = {
+    ("machine", "squat"): "leg press",
+    ("machine", "knee-extension"): "leg extension",
+    ("machine", "knee-flexion"): "leg curl",
+    ("machine", "calf"): "calf raise",
+    ("machine", "horizontal-push"): "chest press",
+    ("machine", "chest-fly"): "pec deck",
+    ("machine", "vertical-push"): "shoulder press",
+    ("machine", "horizontal-pull"): "row machine",
+    ("cable", "vertical-pull"): "lat pulldown",
+}
+
+# units on the floor; stations not listed have DEFAULT_CAPACITY
+DEFAULT_INVENTORY = {
+    "barbell": 4, "bench": 6, "dumbbells": 10, "cable": 4, "pull-up bar": 2,
+    "leg press": 2, "leg extension": 1, "leg curl": 1, "calf raise": 1,
+    "chest press": 1, "pec deck": 1, "shoulder press": 1, "row machine": 1, "lat pulldown": 2,
+    "treadmill": 8, "bike": 6, "cross-trainer": 4,
+}
+DEFAULT_CAPACITY = 1
+
+
+# ---------- EQUIPMENT INDEX ----------
+
+def _stations_for(pattern, equipment):
+    stations = []
+    for kind in equipment.split(" / "):
+        kind = EQUIPMENT_ALIASES.get(kind.strip(), kind.strip())
+        if kind in FREE_EQUIPMENT:
+            return ()  # can be done without waiting for anything
+        default = f"{pattern} machine" if kind == "machine" else kind
+        stations.append(STATION_NAMES.get((kind, pattern), default))
+    return tuple(dict.fromkeys(stations))
+
+
+# exercise id -> stations that can serve it (any one will do); () for none
+EQUIPMENT_INDEX = {ex_id: _stations_for(info[1], info[4]) for ex_id, info in EXERCISE_INFO.items()}
+STATIONS = tuple(sorted({s for stations in EQUIPMENT_INDEX.values() for s in stations}))
+_STATION_CODES = {name: i for i, name in enumerate(STATIONS)}
+
+
+def capacities(inventory=None):
+    # station capacity array in STATIONS order; inventory overrides the defaults
+    counts = dict(DEFAULT_INVENTORY)
+    if inventory:
+        unknown = sorted(set(inventory) - set(STATIONS))
+        if unknown:
+            raise ValueError(f"unknown equipment {', '.join(unknown)}; stations are {', '.join(STATIONS)}")
+        counts.update(inventory)
+    out = np.array([counts.get(s, DEFAULT_CAPACITY) for s in STATIONS], dtype=np.float64)
+    if (out < 1).any():
+        raise ValueError("every station needs a capacity of at least 1")
+    return out
+
+
+# ---------- SESSIONS ----------
+
+def item_ticks(exercise):
+    if exercise.unit == "min":
+        seconds = exercise.rep_high * 60
+    elif exercise.unit == "reps":
+        seconds = exercise.sets * (exercise.rep_high * SECONDS_PER_REP + REST_SECONDS)
+    elif exercise.unit == "s":
+        seconds = exercise.sets * (exercise.rep_high + REST_SECONDS)
+    elif exercise.sets:
+        seconds = exercise.sets * (SECONDS_PER_SET + REST_SECONDS)
+    else:
+        seconds = DEFAULT_ITEM_MINUTES * 60
+    return max(1, -(-seconds // (TICK_MINUTES * 60)))
+
+
+def _movable(exercise):
+    info = EXERCISE_INFO.get(exercise.exercise_id)
+    return info is not None and not info[1].startswith(FIXED_PATTERNS)
+
+
+class SessionShape:
+    # One plan day as the optimiser sees it. Rows are (item, station) pairs,
+    # one per station that can serve an item; row_offsets[o] are the rows'
+    # start ticks within the session under exercise order o.
+    __slots__ = ("day", "ticks", "orders", "row_item", "row_station", "row_ticks", "row_offsets",
+                 "item_rows", "alternatives")
+
+    def __init__(self, day):
+        exercises = day.exercises
+        durations = [item_ticks(ex) for ex in exercises]
+        self.day = day
+        self.ticks = sum(durations)
+
+        movable = [p for p in range(1, len(exercises)) if _movable(exercises[p])]
+        self.orders = []
+        for r in range(max(1, len(movable))):
+            order = list(range(len(exercises)))
+            for k, p in enumerate(movable):
+                order[p] = movable[(k + r) % len(movable)]
+            self.orders.append(tuple(order))
+        offsets = np.zeros((len(self.orders), len(exercises)), dtype=np.int64)
+        for o, order in enumerate(self.orders):
+            at = 0
+            for item in order:
+                offsets[o, item] = at
+                at += durations[item]
+
+        rows = [(i, _STATION_CODES[s]) for i, ex in enumerate(exercises)
+                for s in EQUIPMENT_INDEX.get(ex.exercise_id, ())]
+        self.row_item = np.array([i for i, _ in rows], dtype=np.int64)
+        self.row_station = np.array([s for _, s in rows], dtype=np.int64)
+        self.row_ticks = np.array([durations[i] for i, _ in rows], dtype=np.int64)
+        self.row_offsets = offsets[:, self.row_item]
+        # first row of each item that uses equipment, for the min over alternatives
+        self.item_rows = np.flatnonzero(np.r_[True, self.row_item[1:] != self.row_item[:-1]]) if rows else None
+        self.alternatives = len(rows) > len(set(self.row_item.tolist()))
+
+
+@lru_cache(maxsize=1024)
+def session_shape(day):
+    return SessionShape(day)
+
+
+# ---------- AVAILABILITY ----------
+
+_FULL_DAYS = tuple(d.lower() for d in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"))
+_DAY_GROUPS = {"daily": range(7), "weekdays": range(5), "weekends": (5, 6), "weekend": (5, 6)}
+_SLOT = re.compile(r"^(.*?)\s*(\d{1,2})(?::(\d\d))?\s*-\s*(\d{1,2})(?::(\d\d))?$")
+
+
+def _day(token):
+    for i, name in enumerate(_FULL_DAYS):
+        if len(token) >= 3 and name.startswith(token.lower()):
+            return i
+    raise ValueError(f"availability: unknown day {token!r}")
+
+
+def _days(text):
+    days = []
+    for token in filter(None, re.split(r"[,\s]+", text.strip() or "daily")):
+        if token.lower() in _DAY_GROUPS:
+            days.extend(_DAY_GROUPS[token.lower()])
+        elif "-" in token:
+            first, last = map(_day, token.split("-", 1))
+            days.extend(range(first, last + 1) if first <= last else (*range(first, 7), *range(last + 1)))
+        else:
+            days.append(_day(token))
+    return days
+
+
+@lru_cache(maxsize=4096)
+def parse_availability(text):
+    # "Mon,Wed 18:00-21:00; Sat 08:00-12:00" -> read-only bool mask over the
+    # week's ticks; times are rounded inwards to whole ticks
+    mask = np.zeros(WEEK_TICKS, dtype=bool)
+    for part in filter(None, (p.strip() for p in text.split(";"))):
+        m = _SLOT.match(part)
+        if not m:
+            raise ValueError(f"availability {part!r}: expected days and hours like 'Mon,Wed 18:00-21:00'")
+        start = int(m.group(2)) * 60 + int(m.group(3) or 0)
+        end = int(m.group(4)) * 60 + int(m.group(5) or 0)
+        if not 0 <= start < end <= 24 * 60:
+            raise ValueError(f"availability {part!r}: hours must be within one day, start before end")
+        first, last = -(-start // TICK_MINUTES), end // TICK_MINUTES
+        for day in _days(m.group(1)):
+            mask[day * DAY_TICKS + first:day * DAY_TICKS + last] = True
+    mask.setflags(write=False)
+    return mask
+
+
+def format_tick(tick):
+    minutes = (tick % DAY_TICKS) * TICK_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+# ---------- OPTIMISER ----------
+
+class _Session:
+    __slots__ = ("member", "index", "shape", "starts", "latest", "start", "order", "rows", "cost")
+
+    def __init__(self, member, index, shape, starts):
+        self.member = member
+        self.index = index
+        self.shape = shape
+        self.starts = starts     # candidate start ticks
+        self.latest = 6          # latest day that leaves the later sessions room
+        self.start = None        # placed start tick, None while unplaced
+        self.order = 0
+        self.rows = None         # the row used for each item with equipment
+        self.cost = 0.0
+
+
+class WeekScheduler:
+    # Load per station tick for one week, and the sessions placed into it.
+
+    def __init__(self, inventory=None, hours=DEFAULT_HOURS):
+        self.capacity = capacities(inventory)
+        self.hours = parse_availability(hours)
+        self.load = np.zeros((len(STATIONS), WEEK_TICKS), dtype=np.int32)
+        # running cost per station and day; sessions never cross midnight, so
+        # tick t's entry is at t + day in the flat view
+        self.prefix = np.zeros((len(STATIONS), 7, DAY_TICKS + 1))
+        self._flat = self.prefix.reshape(len(STATIONS), -1)
+        self.members = []        # (member_id, [_Session, ...])
+        self.unscheduled = []    # (member_id, plan day name, reason)
+        self._starts = {}
+
+    # ----- members -----
+
+    def _candidate_starts(self, availability, ticks):
+        key = (availability, ticks)
+        starts = self._starts.get(key)
+        if starts is None:
+            mask = self.hours & parse_availability(availability) if availability else self.hours
+            counts = np.r_[0, np.cumsum(mask)]
+            first = np.arange(0, WEEK_TICKS - ticks + 1, START_STEP)
+            fits = (counts[first + ticks] - counts[first] == ticks) & (first // DAY_TICKS == (first + ticks - 1) // DAY_TICKS)
+            starts = self._starts[key] = first[fits]
+        return starts
+
+    def add_member(self, member_id, days, availability=""):
+        # days: the member's plan days (Day records), trained in this order.
+        # Raises ValueError for availability it cannot read.
+        member = len(self.members)
+        sessions = [_Session(member, i, shape, self._candidate_starts(availability, shape.ticks))
+                    for i, shape in enumerate(map(session_shape, days))]
+        # the latest day each session can take and still leave the later
+        # sessions a day each; sessions that cannot all fit drop from the end
+        latest, dropped = _latest_days(sessions), []
+        while sessions and latest is None:
+            s = sessions.pop()
+            reason = "no available time long enough" if not len(s.starts) else "not enough available days"
+            dropped.append((member_id, s.shape.day.name, reason))
+            latest = _latest_days(sessions)
+        self.unscheduled.extend(reversed(dropped))
+        for s in sessions:
+            s.latest = latest[s.index]
+        self.members.append((member_id, sessions))
+
+    # ----- cost -----
+
+    def _refresh(self, stations, day):
+        load = self.load[stations, day * DAY_TICKS:(day + 1) * DAY_TICKS]
+        capacity = self.capacity[stations, None]
+        self.prefix[stations, day, 1:] = np.cumsum((load >= capacity) + (SPREAD_WEIGHT / capacity) * load, axis=1)
+
+    def _costs(self, shape, starts):
+        # (orders, starts) cost of adding the session at each candidate start
+        if shape.item_rows is None:
+            return np.zeros((len(shape.orders), len(starts)))
+        a = (starts + starts // DAY_TICKS)[None, :, None] + shape.row_offsets[:, None, :]
+        cost = self._flat[shape.row_station, a + shape.row_ticks] - self._flat[shape.row_station, a]
+        if shape.alternatives:
+            cost = np.minimum.reduceat(cost, shape.item_rows, axis=2)
+        return cost.sum(axis=2)
+
+    def _apply(self, s, sign):
+        shape = s.shape
+        offsets = shape.row_offsets[s.order]
+        for row in s.rows:
+            a = s.start + offsets[row]
+            self.load[shape.row_station[row], a:a + shape.row_ticks[row]] += sign
+        if len(s.rows):
+            self._refresh(np.unique(shape.row_station[s.rows]), s.start // DAY_TICKS)
+
+    def _place(self, s, start, order):
+        shape = s.shape
+        s.start, s.order = int(start), int(order)
+        if shape.item_rows is None:
+            s.rows = np.zeros(0, dtype=np.int64)
+            return
+        a = s.start + s.start // DAY_TICKS + shape.row_offsets[s.order]
+        cost = self._flat[shape.row_station, a + shape.row_ticks] - self._flat[shape.row_station, a]
+        # the cheapest station for each item
+        ends = np.r_[shape.item_rows[1:], len(cost)]
+        s.rows = np.array([first + int(np.argmin(cost[first:end])) for first, end in zip(shape.item_rows, ends)])
+        self._apply(s, 1)
+
+    def _options(self, s, low, high, last):
+        # s's candidate starts on a day after `low`, before `high` and at most
+        # `last`, and their (orders, starts) costs including rest days
+        days = s.starts // DAY_TICKS
+        pick = (days > low) & (days < high) & (days <= last)
+        starts, days = s.starts[pick], days[pick]
+        costs = self._costs(s.shape, starts)
+        costs += REST_DAY_PENALTY * ((days == low + 1).astype(np.float64) + (days == high - 1))
+        return starts, costs
+
+    def _neighbours(self, s):
+        sessions = self.members[s.member][1]
+        low = sessions[s.index - 1].start // DAY_TICKS if s.index else -1
+        nxt = sessions[s.index + 1] if s.index + 1 < len(sessions) else None
+        high = nxt.start // DAY_TICKS if nxt is not None and nxt.start is not None else 7
+        return low, high
+
+    # ----- search -----
+
+    def place_greedy(self):
+        # members with the fewest candidate starts first, each member's
+        # sessions in plan order, each at its cheapest start
+        order = sorted(range(len(self.members)), key=lambda m: sum(len(s.starts) for s in self.members[m][1]))
+        for m in order:
+            for s in self.members[m][1]:
+                low, high = self._neighbours(s)
+                starts, costs = self._options(s, low, high, s.latest)  # never empty, see _latest_days
+                o, i = np.unravel_index(int(np.argmin(costs)), costs.shape)
+                s.cost = float(costs[o, i])
+                self._place(s, starts[i], o)
+
+    def place_naive(self):
+        # baseline for reports: earliest possible start, plan order
+        for _, sessions in self.members:
+            for s in sessions:
+                low = sessions[s.index - 1].start // DAY_TICKS if s.index else -1
+                start = s.starts[s.starts // DAY_TICKS > low][0]
+                self._place(s, start, 0)
+
+    def improve(self, passes=LOCAL_SEARCH_PASSES, deadline=None):
+        # Lift each session out, worst first, and put it back where it is
+        # cheapest now. Returns the number of sessions moved.
+        moved = 0
+        for _ in range(passes):
+            gained = 0.0
+            for s in sorted((s for _, sessions in self.members for s in sessions), key=lambda s: -s.cost):
+                if deadline is not None and time.perf_counter() > deadline:
+                    return moved
+                self._apply(s, -1)
+                low, high = self._neighbours(s)
+                starts, costs = self._options(s, low, high, 6)  # the neighbours bound the day
+                o, i = np.unravel_index(int(np.argmin(costs)), costs.shape)
+                cost, now = float(costs[o, i]), float(costs[s.order, np.searchsorted(starts, s.start)])
+                if cost < now - 1e-9:
+                    gained += now - cost
+                    moved += 1
+                    s.cost = cost
+                    self._place(s, starts[i], o)
+                else:
+                    s.cost = now
+                    self._apply(s, 1)
+            if gained < 1e-9:
+                break
+        return moved
+
+    def schedule(self, passes=LOCAL_SEARCH_PASSES, time_limit=DEFAULT_TIME_LIMIT):
+        self.place_greedy()
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        return self.improve(passes, deadline)
+
+    # ----- results -----
+
+    def waiting_minutes(self):
+        # station-minutes above capacity: roughly, minutes members spend waiting
+        return int(np.maximum(self.load - self.capacity[:, None], 0).sum()) * TICK_MINUTES
+
+    def station_report(self):
+        busy = (self.load > 0).sum(axis=1) * TICK_MINUTES
+        over = np.maximum(self.load - self.capacity[:, None], 0).sum(axis=1) * TICK_MINUTES
+        peak = self.load.max(axis=1)
+        return [{"station": name, "capacity": int(self.capacity[i]), "peak": int(peak[i]),
+                 "busy_minutes": int(busy[i]), "waiting_minutes": int(over[i])}
+                for i, name in enumerate(STATIONS)]
+
+    def sessions(self):
+        # per member: (member_id, [session dict, ...]) with the items in the
+        # order they are done, each with its start time and station
+        for member_id, sessions in self.members:
+            out = []
+            for s in sessions:
+                shape = s.shape
+                stations = dict(zip(shape.row_item[s.rows].tolist(), shape.row_station[s.rows].tolist()))
+                order = shape.orders[s.order]
+                at, items = s.start, []
+                for item in order:
+                    exercise = shape.day.exercises[item]
+                    station = stations.get(item)
+                    items.append({"time": format_tick(at), "item": exercise.text,
+                                  "station": None if station is None else STATIONS[station]})
+                    at += item_ticks(exercise)
+                out.append({"day": WEEKDAYS[s.start // DAY_TICKS], "start": format_tick(s.start),
+                            "end": format_tick(s.start + shape.ticks), "plan_day": shape.day.name, "items": items})
+            yield member_id, out
+
+
+def _latest_days(sessions):
+    # per session, the latest day it may take so that every later session
+    # still has a later day; None when the sessions cannot all fit
+    latest, limit = [0] * len(sessions), 7
+    for s in reversed(sessions):
+        days = s.starts[s.starts // DAY_TICKS < limit] // DAY_TICKS
+        if not len(days):
+            return None
+        latest[s.index] = limit = int(days[-1])
+    return latest
+
+
+# ---------- ROSTERS ----------
+
+AVAILABILITY_FIELD = "availability"
+
+
+def _availability(row):
+    for key, value in row.items():
+        if key and key.strip().lower() == AVAILABILITY_FIELD:
+            return (value or "").strip()
+    return ""
+
+
+def schedule_roster(rows, inventory=None, hours=DEFAULT_HOURS, units="metric",
+                    passes=LOCAL_SEARCH_PASSES, time_limit=DEFAULT_TIME_LIMIT):
+    # -> (WeekScheduler, [(member_id, error), ...]) for roster rows with an
+    # availability column next to the usual member fields
+    from gym_validate import validate_rows
+
+    rows = list(rows)
+    scheduler = WeekScheduler(inventory, hours)
+    errors = []
+    for row, (member_id, member, issues) in zip(rows, validate_rows(rows, units)):
+        if issues:
+            errors.append((member_id, "; ".join(issue.message for issue in issues)))
+            continue
+        plan = get_workout_plan(member["goal"], member["experience"], member["activity"], member["notes"])
+        try:
+            scheduler.add_member(member_id, plan.days, _availability(row))
+        except ValueError as exc:
+            errors.append((member_id, str(exc)))
+    scheduler.schedule(passes, time_limit)
+    return scheduler, errors
+
+
+# ---------- OUTPUT ----------
+
+CSV_FIELDS = ("member_id", "day", "start", "end", "plan_day", "order", "time", "item", "station")
+
+
+def write_schedule(scheduler, out, fmt="csv"):
+    if fmt == "csv":
+        import csv
+
+        writer = csv.writer(out)
+        writer.writerow(CSV_FIELDS)
+        for member_id, sessions in scheduler.sessions():
+            for s in sessions:
+                for n, item in enumerate(s["items"], start=1):
+                    writer.writerow((member_id, s["day"], s["start"], s["end"], s["plan_day"], n,
+                                     item["time"], item["item"], item["station"] or ""))
+    elif fmt == "json":
+        import json
+
+        for member_id, sessions in scheduler.sessions():
+            out.write(json.dumps({"member_id": member_id, "sessions": sessions}, ensure_ascii=False) + "\n")
+    else:
+        for member_id, sessions in scheduler.sessions():
+            out.write(f"=== member {member_id} ===\n")
+            for s in sessions:
+                out.write(f"{s['day']} {s['start']}–{s['end']}  {s['plan_day']}\n")
+                for item in s["items"]:
+                    station = f"  [{item['station']}]" if item["station"] else ""
+                    out.write(f"    {item['time']}  {item['item']}{station}\n")
+            out.write("\n")
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    from gym_batch import read_roster
+    from gym_validate import DEFAULT_UNITS
+
+    parser = argparse.ArgumentParser(description="Schedule a week of sessions around shared gym equipment.")
+    parser.add_argument("roster", help="CSV or JSONL roster with an availability column ('-' for CSV on stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "json", "text"], default="csv")
+    parser.add_argument("--equipment", metavar="FILE", help='JSON station counts, e.g. {"treadmill": 12}')
+    parser.add_argument("--hours", default=DEFAULT_HOURS, help=f"opening hours (default: {DEFAULT_HOURS!r})")
+    parser.add_argument("--units", choices=sorted(DEFAULT_UNITS), default="metric")
+    parser.add_argument("--passes", type=int, default=LOCAL_SEARCH_PASSES, help="local search passes at most")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                        help="seconds of local search at most")
+    parser.add_argument("--report", metavar="FILE", help="write per-station load as JSON")
+    parser.add_argument("--baseline", action="store_true",
+                        help="also report waiting for the earliest-slot schedule, for comparison")
+    args = parser.parse_args(argv)
+
+    inventory = None
+    if args.equipment:
+        with open(args.equipment, encoding="utf-8") as fh:
+            inventory = json.load(fh)
+    start = time.perf_counter()
+    try:
+        scheduler, errors = schedule_roster(read_roster(args.roster), inventory, args.hours, args.units,
+                                            args.passes, args.time_limit)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    for member_id, error in errors:
+        print(f"member {member_id}: {error}", file=sys.stderr)
+    for member_id, day, reason in scheduler.unscheduled:
+        print(f"member {member_id}: {day} not scheduled: {reason}", file=sys.stderr)
+
+    if args.output == "-":
+        write_schedule(scheduler, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as fh:
+            write_schedule(scheduler, fh, args.format)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(scheduler.station_report(), fh, indent=2)
+            fh.write("\n")
+
+    placed = sum(len(sessions) for _, sessions in scheduler.members)
+    summary = (f"{placed} sessions for {len(scheduler.members)} members in {elapsed:.2f} s; "
+               f"{scheduler.waiting_minutes()} station-minutes over capacity")
+    if args.baseline:
+        naive = WeekScheduler(inventory, args.hours)
+        naive.members = [(member_id, [_Session(s.member, s.index, s.shape, s.starts) for s in sessions])
+                         for member_id, sessions in scheduler.members]
+        naive.place_naive()
+        summary += f" (earliest-slot schedule: {naive.waiting_minutes()})"
+    print(summary, file=sys.stderr)
+    return 1 if errors or scheduler.unscheduled else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,448 @@
+# Smart Gym Planner - HTTP plan service (stdlib asyncio, no framework)
+#
+# Usage:
+#   python gym_service.py --port 8080
+#   curl 'http://127.0.0.1:8080/plan?age=30&gender=Male&height=175&weight=77&goal=fitness&activity=light&experience=beginner&diet_pref=veg'
+#   python gym_service.py loadgen --port 8080 -n 20000 -c 64
+#
+# Query values go through gym_validate: "goal=Fat Loss" or "height=5'11\""
+# are accepted (units=imperial makes bare numbers lb / in), and bad values
+# get a 400 naming every problem.
+#
+# Plans come in the locale named by `lang=de` (gym_locale), else the best
+# match for the Accept-Language header, else --locale (default:
+# GYM_PLANNER_LOCALE or English). The catalogs are compiled at startup.
+#
+# GET /plan returns the JSON plan for one member. Responses are cached in an
+# LRU keyed on the normalised inputs and carry an ETag, so repeat requests
+# with If-None-Match get a bodiless 304.
+#
+# The plan rule file is watched while serving: when it changes, the new
+# rules are compiled in a worker thread and swapped in between requests,
+# together with a clear of the response cache.
+#
+# `--plan-cache plans.db` puts the shared on-disk plan cache (see
+# gym_plancache) behind the response LRU, so plans generated by batch runs or
+# by other service processes are not generated again.
+#
+# `--sync-db members.db` also accepts gym_sync round trips at POST /sync.
+#
+# Work that blocks on SQLite (sync exchanges, disk plan cache reads) runs off
+# the event loop, so one slow request does not hold up the others. Sync
+# exchanges go through a single thread of their own, the one that opened the
+# member store. A request that fails unexpectedly gets a 500.
+#
+# `--metrics` times the generation stages (see gym_instrument) and serves
+# them in Prometheus text format at GET /metrics.
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from gym_batch import parse_member
+from gym_locale import DEFAULT_LOCALE, ENGLISH, LocaleError, available_locales, get_locale, match_locale
+from gym_planner import current_rules, load_rules, use_rules
+from gym_rules import RuleError, RuleWatcher
+from gym_render import format_plan
+
+
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+# ---------- RESPONSE CACHE ----------
+
+class PlanCache:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses}
+
+
+def normalise_query(query):
+    # enum spellings and units are canonicalised, so "Fat Loss" and
+    # "fat-loss" share one cache entry
+    params = dict(parse_qsl(query))
+    params.pop("lang", None)
+    member = parse_member(params, params.pop("units", "metric"))
+    return (member["age"], member["gender"], member["height"], member["weight"],
+            member["goal"], member["activity"], member["experience"], member["diet_pref"],
+            member["name"], member["notes"])
+
+
+def request_locale(query, accept_language=None, default=ENGLISH):
+    # lang= beats Accept-Language; an unknown lang= is a LocaleError (a ValueError)
+    if "lang=" in query:
+        lang = dict(parse_qsl(query)).get("lang")
+        if lang:
+            return get_locale(lang)
+    if accept_language:
+        return match_locale(accept_language) or default
+    return default
+
+
+def build_plan_response(key, plans=None, locale=None):
+    # key is in gym_validate.MEMBER_FIELDS order, i.e. gym_plancache.member_values()
+    if plans is not None:
+        body = "".join(plans.sections(key, "json", locale)).encode()
+    else:
+        age, gender, height, weight, goal, activity, experience, diet_pref, name, notes = key
+        body = format_plan(age, gender, height, weight, goal, activity, experience, diet_pref,
+                           name=name, notes=notes, fmt="json", locale=locale).encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    return body, etag
+
+
+# ---------- HTTP ----------
+
+class PlanService:
+    def __init__(self, cache_size=10000, metrics=False, sync=None, plans=None, locale=ENGLISH,
+                 sync_executor=None):
+        self.cache = PlanCache(cache_size)
+        self.metrics = metrics
+        self.sync = sync  # gym_sync.SyncServer, or None when sync is off
+        self.sync_executor = sync_executor  # the thread that owns sync's store (None: the caller's)
+        self.plans = plans  # gym_plancache.PlanCache with a disk tier, or None
+        self.locale = get_locale(locale)  # when neither lang= nor Accept-Language picks one
+        self.rules_task = None  # watch_rules() while serving with hot reload
+
+    async def handle(self, method, target, headers, body=b""):
+        try:
+            return await self._route(method, target, headers, body)
+        except Exception:
+            traceback.print_exc()
+            return 500, _json_body({"error": "internal server error"}), {}
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == "/sync" and self.sync is not None:
+            if self.sync_executor is None:
+                return self.handle_sync(method, body)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.sync_executor, self.handle_sync, method, body)
+        if method not in ("GET", "HEAD"):
+            return 405, _json_body({"error": "method not allowed"}), {"Allow": "GET, HEAD"}
+
+        if url.path == "/health":
+            health = {"status": "ok", "cache": self.cache.stats()}
+            if self.plans is not None:
+                health["plan_cache"] = self.plans.stats()
+            return 200, _json_body(health), {}
+        if url.path == "/metrics" and self.metrics:
+            return 200, self._metrics_body(), {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        if url.path != "/plan":
+            return 404, _json_body({"error": "not found"}), {}
+
+        try:
+            key = normalise_query(url.query)
+            locale = request_locale(url.query, headers.get("accept-language"), self.locale)
+        except ValueError as exc:
+            return 400, _json_body({"error": str(exc)}), {}
+
+        entry = self.cache.get((key, locale))
+        if entry is None:
+            if self.plans is None:
+                entry = build_plan_response(key, None, locale)
+                self.cache.put((key, locale), entry)
+            else:
+                rules = current_rules()
+                entry = await asyncio.get_running_loop().run_in_executor(
+                    None, build_plan_response, key, self.plans, locale)
+                if current_rules() is rules:  # not built across a rule reload
+                    self.cache.put((key, locale), entry)
+        body, etag = entry
+
+        extra = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate",
+                 "Content-Language": locale.code, "Vary": "Accept-Language"}
+        if _etag_matches(headers.get("if-none-match", ""), etag):
+            return 304, b"", extra
+        return 200, body, extra
+
+    def handle_sync(self, method, body):
+        from gym_sync import CONTENT_TYPE, SyncError
+
+        if method != "POST":
+            return 405, _json_body({"error": "method not allowed"}), {"Allow": "POST"}
+        try:
+            reply = self.sync.exchange(body)
+        except SyncError as exc:
+            return 400, _json_body({"error": str(exc)}), {}
+        return 200, reply, {"Content-Type": CONTENT_TYPE}
+
+    def _metrics_body(self):
+        import gym_instrument
+
+        stats = self.cache.stats()
+        lines = ["# TYPE gym_planner_response_cache_entries gauge",
+                 f"gym_planner_response_cache_entries {stats['size']}",
+                 "# TYPE gym_planner_response_cache_requests_total counter",
+                 f'gym_planner_response_cache_requests_total{{result="hit"}} {stats["hits"]}',
+                 f'gym_planner_response_cache_requests_total{{result="miss"}} {stats["misses"]}']
+        return (gym_instrument.to_prometheus() + "\n".join(lines) + "\n").encode()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, 400, _json_body({"error": "bad request line"}), {}, False)
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = _content_length(headers)
+                if length is None:
+                    await self._send(writer, 400, _json_body({"error": "bad Content-Length"}), {}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, _json_body({"error": "request body too large"}), {}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+                status, body, extra = await self.handle(method, target, headers, body)
+                await self._send(writer, status, b"" if method == "HEAD" else body, extra, keep_alive,
+                                 content_length=len(body))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, body, extra, keep_alive, content_length=None):
+        head = [f"HTTP/1.1 {status} {_REASONS[status]}"]
+        if status != 304:
+            if "Content-Type" not in extra:
+                head.append("Content-Type: application/json; charset=utf-8")
+            head.append(f"Content-Length: {len(body) if content_length is None else content_length}")
+        head.append("Access-Control-Allow-Origin: *")
+        head.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        head.extend(f"{k}: {v}" for k, v in extra.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def _json_body(obj):
+    return json.dumps(obj).encode()
+
+
+def _etag_matches(if_none_match, etag):
+    # "*" or a comma-separated list of tags, weak (W/"...") ones included:
+    # If-None-Match compares weakly, and only whole tags count
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _content_length(headers):
+    # None unless the header is absent or a plain non-negative integer
+    value = headers.get("content-length", "").strip() or "0"
+    return int(value) if value.isascii() and value.isdigit() else None
+
+
+async def watch_rules(service, path, interval):
+    # Compiling runs in the default executor; the swap and the cache clear
+    # happen here on the event loop, so no request sees one without the other.
+    loop = asyncio.get_running_loop()
+    watcher = RuleWatcher(path, current_rules().mtime)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            index = await loop.run_in_executor(None, watcher.poll)
+        except (OSError, RuleError) as exc:
+            print(f"rules not reloaded, keeping the previous ones: {exc}", file=sys.stderr)
+            continue
+        if index is not None:
+            use_rules(index)
+            service.cache.clear()
+            print(f"rules reloaded from {path}", file=sys.stderr)
+
+
+def _open_sync_server(path):
+    # runs on the sync thread: the store's connection may only be used there
+    from gym_store import ProfileStore
+    from gym_sync import SyncServer
+
+    return SyncServer(ProfileStore(path))
+
+
+async def serve(host="127.0.0.1", port=8080, cache_size=10000, reuse_port=False, metrics=False,
+                rules=None, reload_interval=2.0, sync_db=None, plan_cache=None, locale=DEFAULT_LOCALE):
+    if rules:
+        use_rules(load_rules(rules))
+    for code in available_locales():
+        get_locale(code)  # compile every catalog now: a bad one fails here, not on a request
+    if metrics:
+        import gym_instrument
+        gym_instrument.enable()
+    sync = sync_executor = None
+    if sync_db:
+        sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync")
+        sync = await asyncio.get_running_loop().run_in_executor(sync_executor, _open_sync_server, sync_db)
+    plans = None
+    if plan_cache and plan_cache != "off":
+        from gym_plancache import open_cache
+        plans = open_cache(plan_cache, memory_entries=0)  # the response LRU is the memory tier
+    service = PlanService(cache_size, metrics, sync, plans, locale, sync_executor)
+    server = await asyncio.start_server(service.handle_connection, host, port,
+                                        reuse_port=reuse_port or None)
+    print(f"Smart Gym Planner service on http://{host}:{port}/plan", file=sys.stderr)
+    if reload_interval > 0:
+        service.rules_task = asyncio.create_task(watch_rules(service, current_rules().source, reload_interval))
+    async with server:
+        await server.serve_forever()
+
+
+# ---------- LOAD GENERATOR ----------
+
+SAMPLE_MEMBERS = [
+    {"age": age, "gender": gender, "height": height, "weight": weight, "goal": goal,
+     "activity": activity, "experience": experience, "diet_pref": diet_pref}
+    for age, gender, height, weight in ((24, "Male", 178, 72), (35, "Female", 162, 64), (51, "Other", 170, 88))
+    for goal in ("fat-loss", "muscle-gain", "fitness")
+    for activity in ("sedentary", "moderate")
+    for experience in ("beginner", "advanced")
+    for diet_pref in ("veg", "non-veg", "egg")
+]
+
+
+async def _load_worker(host, port, paths, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path in paths:
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host="127.0.0.1", port=8080, requests=20000, concurrency=64):
+    paths = ["/plan?" + urlencode(SAMPLE_MEMBERS[i % len(SAMPLE_MEMBERS)]) for i in range(requests)]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _load_worker(host, port, paths[i::concurrency], latencies) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed),
+        "p50_ms": round(pct(0.50), 3),
+        "p99_ms": round(pct(0.99), 3),
+    }
+
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart Gym Planner HTTP service.")
+    parser.add_argument("command", nargs="?", choices=["serve", "loadgen"], default="serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--reuse-port", action="store_true",
+                        help="allow several service processes to share the port")
+    parser.add_argument("--metrics", action="store_true",
+                        help="time plan generation and expose the counters at /metrics")
+    parser.add_argument("--rules", help="plan rule file (default: rules/plans.json or $GYM_PLANNER_RULES)")
+    parser.add_argument("--reload-interval", type=float, default=2.0,
+                        help="seconds between rule file checks; 0 disables hot reload")
+    parser.add_argument("--sync-db", metavar="DB",
+                        help="member store that desktop apps sync with at POST /sync (see gym_sync)")
+    parser.add_argument("--plan-cache", metavar="FILE", default=os.environ.get("GYM_PLANNER_CACHE"),
+                        help="shared on-disk plan cache (default: $GYM_PLANNER_CACHE, off when unset)")
+    parser.add_argument("--locale", default=DEFAULT_LOCALE,
+                        help="plan locale for requests without lang= or a matching Accept-Language "
+                             f"(default: $GYM_PLANNER_LOCALE or en; available: {', '.join(available_locales())})")
+    parser.add_argument("-n", "--requests", type=int, default=20000, help="loadgen: total requests")
+    parser.add_argument("-c", "--concurrency", type=int, default=64, help="loadgen: open connections")
+    args = parser.parse_args(argv)
+
+    if args.command == "loadgen":
+        print(json.dumps(asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency))))
+        return 0
+
+    try:
+        get_locale(args.locale)
+    except LocaleError as exc:
+        parser.error(str(exc))
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size, args.reuse_port, args.metrics,
+                          args.rules, args.reload_interval, args.sync_db, args.plan_cache, args.locale))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
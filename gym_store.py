@@ -0,0 +1,253 @@
+# Smart Gym Planner - local member profile store (SQLite)
+#
+# Profiles are keyed by member id and carry a content hash of the plan
+# inputs. Generated plans are stored with that hash plus the version of the
+# rules that built them (plan_hash), so an incremental run only regenerates
+# members whose inputs changed, or everyone after a rule edit.
+# Triggers record every profile change in change_log for gym_sync.
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from gym_batch import iter_plans
+from gym_locale import ENGLISH, get_locale
+from gym_planner import current_rules
+from gym_validate import validate_rows
+
+
+DEFAULT_DB_PATH = os.environ.get("GYM_PLANNER_DB", "gym_members.db")
+
+PROFILE_FIELDS = (
+    "name", "age", "gender", "height", "weight", "goal",
+    "activity", "experience", "diet_pref", "notes",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    member_id   TEXT PRIMARY KEY,
+    name        TEXT NOT NULL DEFAULT '',
+    age         INTEGER NOT NULL,
+    gender      TEXT NOT NULL,
+    height      REAL NOT NULL,
+    weight      REAL NOT NULL,
+    goal        TEXT NOT NULL,
+    activity    TEXT NOT NULL,
+    experience  TEXT NOT NULL,
+    diet_pref   TEXT NOT NULL,
+    notes       TEXT NOT NULL DEFAULT '',
+    input_hash  TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_members_goal ON members (goal);
+CREATE INDEX IF NOT EXISTS idx_members_updated_at ON members (updated_at);
+
+CREATE TABLE IF NOT EXISTS plans (
+    member_id     TEXT NOT NULL REFERENCES members (member_id) ON DELETE CASCADE,
+    format        TEXT NOT NULL,
+    input_hash    TEXT NOT NULL,
+    plan          TEXT NOT NULL,
+    generated_at  REAL NOT NULL,
+    PRIMARY KEY (member_id, format)
+);
+
+-- every real change to a member, for gym_sync; upserts that leave the
+-- inputs unchanged touch no row and so log nothing. changed_at (epoch
+-- seconds) is when it happened: a deleted member has no updated_at left.
+CREATE TABLE IF NOT EXISTS change_log (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id   TEXT NOT NULL,
+    deleted     INTEGER NOT NULL DEFAULT 0,
+    changed_at  REAL
+);
+CREATE TRIGGER IF NOT EXISTS log_member_insert AFTER INSERT ON members BEGIN
+    INSERT INTO change_log (member_id, changed_at) VALUES (new.member_id, {now});
+END;
+CREATE TRIGGER IF NOT EXISTS log_member_update AFTER UPDATE OF input_hash ON members BEGIN
+    INSERT INTO change_log (member_id, changed_at) VALUES (new.member_id, {now});
+END;
+CREATE TRIGGER IF NOT EXISTS log_member_delete AFTER DELETE ON members BEGIN
+    INSERT INTO change_log (member_id, deleted, changed_at) VALUES (old.member_id, 1, {now});
+END;
+""".replace("{now}", "(julianday('now') - 2440587.5) * 86400.0")
+
+_COLUMNS = ", ".join(PROFILE_FIELDS)
+_PLACEHOLDERS = ", ".join(f":{f}" for f in PROFILE_FIELDS)
+_UPDATES = ", ".join(f"{f} = excluded.{f}" for f in PROFILE_FIELDS)
+
+# Only touch the row (and updated_at) when the inputs actually changed.
+_UPSERT = f"""
+INSERT INTO members (member_id, {_COLUMNS}, input_hash, updated_at)
+VALUES (:member_id, {_PLACEHOLDERS}, :input_hash, :updated_at)
+ON CONFLICT (member_id) DO UPDATE SET
+    {_UPDATES}, input_hash = excluded.input_hash, updated_at = excluded.updated_at
+WHERE members.input_hash != excluded.input_hash
+"""
+
+
+def input_hash(profile):
+    values = [profile.get(f, "") for f in PROFILE_FIELDS]
+    return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode()).hexdigest()
+
+
+def plan_hash(member_hash, rules_version=None):
+    # The member hash stays profile-only: it also decides which upserts are
+    # real changes for change_log (gym_sync). Plans add the rules version.
+    return f"{member_hash}:{rules_version or current_rules().version}"
+
+
+class ProfileStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ----- profiles -----
+
+    def _params(self, member_id, profile, now):
+        params = {f: profile.get(f, "") for f in PROFILE_FIELDS}
+        params["member_id"] = str(member_id)
+        params["input_hash"] = input_hash(profile)
+        params["updated_at"] = now
+        return params
+
+    def upsert(self, member_id, profile):
+        with self.conn:
+            cur = self.conn.execute(_UPSERT, self._params(member_id, profile, time.time()))
+        return cur.rowcount > 0
+
+    def upsert_many(self, members):
+        now = time.time()
+        with self.conn:
+            cur = self.conn.executemany(_UPSERT, (self._params(mid, p, now) for mid, p in members))
+        return cur.rowcount
+
+    def write_profile(self, member_id, profile, updated_at):
+        # upsert stamped with a given time, inside the caller's transaction
+        # (gym_sync applying a remote change); does not commit
+        cur = self.conn.execute(_UPSERT, self._params(member_id, profile, updated_at))
+        return cur.rowcount > 0
+
+    def import_rows(self, rows, units="metric"):
+        # Roster rows as read by gym_batch.read_roster; returns rejected (member_id, error) pairs.
+        # Rows are validated a chunk of columns at a time (gym_validate.validate_rows).
+        rejected = []
+
+        def valid():
+            for member_id, member, issues in validate_rows(rows, units):
+                if member is None:
+                    rejected.append((member_id, "; ".join(issue.message for issue in issues)))
+                else:
+                    yield member_id, member
+
+        changed = self.upsert_many(valid())
+        return changed, rejected
+
+    def get(self, member_id):
+        row = self.conn.execute("SELECT * FROM members WHERE member_id = ?", (str(member_id),)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_goal(self, goal):
+        return [dict(r) for r in self.conn.execute(
+            "SELECT * FROM members WHERE goal = ? ORDER BY member_id", (goal,))]
+
+    def updated_since(self, timestamp):
+        return [dict(r) for r in self.conn.execute(
+            "SELECT * FROM members WHERE updated_at > ? ORDER BY updated_at", (timestamp,))]
+
+    def delete(self, member_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM members WHERE member_id = ?", (str(member_id),))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM members").fetchone()[0]
+
+    def iter_columns(self, fields):
+        # plain tuples of the given columns for every member, for bulk readers
+        unknown = set(fields) - set(PROFILE_FIELDS) - {"member_id", "updated_at"}
+        if unknown:
+            raise ValueError(f"unknown member fields: {', '.join(sorted(unknown))}")
+        cur = self.conn.cursor()
+        cur.row_factory = None
+        return cur.execute(f"SELECT {', '.join(fields)} FROM members")
+
+    # ----- plans -----
+
+    def iter_members(self, fmt="text", stale_only=False):
+        query = "SELECT m.* FROM members m"
+        if stale_only:
+            query += (" LEFT JOIN plans p ON p.member_id = m.member_id AND p.format = ?"
+                      " WHERE p.input_hash IS NULL OR p.input_hash != m.input_hash || ':' || ?")
+            cur = self.conn.execute(query, (fmt, current_rules().version))
+        else:
+            cur = self.conn.execute(query)
+        for row in cur:
+            yield dict(row)
+
+    def save_plans(self, plans, fmt="text"):
+        # plans: iterable of (member_id, input_hash, plan_text)
+        now = time.time()
+        version = current_rules().version
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO plans (member_id, format, input_hash, plan, generated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                ((mid, fmt, plan_hash(h, version), plan, now) for mid, h, plan in plans),
+            )
+
+    def save_plan(self, member_id, profile, plan, fmt="text"):
+        self.save_plans([(str(member_id), input_hash(profile), plan)], fmt)
+
+    def get_plan(self, member_id, fmt="text"):
+        row = self.conn.execute(
+            "SELECT p.plan FROM plans p JOIN members m ON m.member_id = p.member_id"
+            " WHERE p.member_id = ? AND p.format = ? AND p.input_hash = m.input_hash || ':' || ?",
+            (str(member_id), fmt, current_rules().version),
+        ).fetchone()
+        return row[0] if row else None
+
+
+def regenerate(store, fmt="text", incremental=True, workers=None, chunksize=256, batch_size=1000, cache=None,
+               locale=None):
+    # Streams (member_id, plan, error) like gym_batch.iter_plans and saves plans
+    # back to the store in batches as they come out of the pool. Localised
+    # plans are stored under "<fmt>:<locale>".
+    t = get_locale(locale)
+    stored = fmt if t is ENGLISH else f"{fmt}:{t.code}"
+
+    # Read the selection here, in the calling thread: the pool's feeder thread
+    # consumes the rows iterable and sqlite connections are bound to their
+    # thread. Materialising also lets the plans table be written as we go.
+    rows = list(store.iter_members(stored, stale_only=incremental))
+    hashes = {}
+    for row in rows:
+        row["id"] = row["member_id"]
+        hashes[row["member_id"]] = row["input_hash"]
+
+    pending = []
+    for member_id, text, error in iter_plans(rows, workers=workers, chunksize=chunksize, fmt=fmt,
+                                             cache=cache, locale=locale):
+        h = hashes.pop(member_id)
+        if error is None:
+            pending.append((member_id, h, text))
+            if len(pending) >= batch_size:
+                store.save_plans(pending, stored)
+                pending = []
+        yield member_id, text, error
+    if pending:
+        store.save_plans(pending, stored)
@@ -0,0 +1,287 @@
+# Smart Gym Planner - offline member sync between stores
+#
+# Usage:
+#   python gym_sync.py --store gym_members.db --url http://127.0.0.1:8080/sync
+#   python gym_service.py --sync-db server.db        # the other end
+#
+# Every ProfileStore logs its profile changes (gym_store's change_log
+# triggers), so a desktop or tablet can keep editing offline and sync later.
+# A sync is one POST: the client sends the members it changed since its last
+# push and the server answers with everything changed since the client's last
+# pull, both as zlib-compressed JSON. Plans are never sent: they follow from
+# the profile, and each side regenerates the ones whose input hash moved
+# (gym_store.regenerate), so a day's changes for a gym fit in a few KB.
+#
+# Each member carries a version vector {node id: counter}. An incoming
+# version that dominates the local one is applied; one that is dominated is
+# ignored; concurrent versions are a conflict, settled the same way on every
+# node (newer updated_at wins, then the larger node id) and reported back.
+# SyncServer.exchange() is the whole server side and runs in-process too,
+# which is how LocalTransport stands in for the HTTP service.
+
+import argparse
+import json
+import sys
+import uuid
+import zlib
+
+from gym_store import PROFILE_FIELDS, ProfileStore
+
+
+PROTOCOL_VERSION = 1
+COMPRESSION_LEVEL = 9
+CONTENT_TYPE = "application/vnd.gym-planner.sync+json"
+
+SYNC_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS member_versions (
+    member_id   TEXT PRIMARY KEY,
+    vv          TEXT NOT NULL,      -- version vector, JSON {node: counter}
+    seq         INTEGER NOT NULL,   -- this store's sequence at the last change
+    origin      TEXT NOT NULL,      -- node whose edit this version is
+    deleted     INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_member_versions_seq ON member_versions (seq);
+"""
+
+
+class SyncError(Exception):
+    pass
+
+
+# ---------- VERSION VECTORS ----------
+
+def compare(a, b):
+    # "equal", "newer" (a dominates b), "older" or "concurrent"
+    a_ahead = any(n > b.get(node, 0) for node, n in a.items())
+    b_ahead = any(n > a.get(node, 0) for node, n in b.items())
+    if a_ahead and b_ahead:
+        return "concurrent"
+    if a_ahead:
+        return "newer"
+    return "older" if b_ahead else "equal"
+
+
+def merge(a, b):
+    return {node: max(a.get(node, 0), b.get(node, 0)) for node in a.keys() | b.keys()}
+
+
+def encode(message):
+    return zlib.compress(json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode(), COMPRESSION_LEVEL)
+
+
+def decode(data):
+    try:
+        message = json.loads(zlib.decompress(data))
+    except (zlib.error, ValueError) as exc:
+        raise SyncError(f"unreadable sync message: {exc}") from None
+    if not isinstance(message, dict) or message.get("protocol") != PROTOCOL_VERSION:
+        raise SyncError("unsupported sync protocol version")
+    return message
+
+
+# ---------- NODE STATE ----------
+
+class SyncNode:
+    # Version bookkeeping on top of one ProfileStore. Client and server are
+    # the same kind of node; they differ only in who sends first.
+
+    def __init__(self, store):
+        self.store = store
+        self.conn = store.conn
+        with self.conn:
+            self.conn.executescript(SYNC_SCHEMA)
+            self.node_id = self._meta("node_id")
+            if self.node_id is None:
+                self.node_id = uuid.uuid4().hex[:12]
+                self._set_meta("node_id", self.node_id)
+                # members saved before sync was set up have no log entries yet
+                self.conn.execute(
+                    "INSERT INTO change_log (member_id) SELECT member_id FROM members"
+                    " WHERE member_id NOT IN (SELECT member_id FROM member_versions)"
+                )
+
+    def _meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM sync_meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _next_seq(self):
+        seq = int(self._meta("seq", 0)) + 1
+        self._set_meta("seq", seq)
+        return seq
+
+    def current_seq(self):
+        return int(self._meta("seq", 0))
+
+    def _version(self, member_id):
+        row = self.conn.execute("SELECT vv, updated_at, origin FROM member_versions WHERE member_id = ?",
+                                (member_id,)).fetchone()
+        return (json.loads(row[0]), row[1], row[2]) if row else ({}, 0.0, "")
+
+    def _save_version(self, member_id, vv, origin, deleted, updated_at):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO member_versions (member_id, vv, seq, origin, deleted, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (member_id, json.dumps(vv, sort_keys=True), self._next_seq(), origin, int(deleted), updated_at),
+        )
+
+    def claim_local_changes(self):
+        # Turn logged local edits into new versions of this node. Several
+        # edits between syncs become one version.
+        # A delete is stamped with the time it was logged, not the claim time,
+        # or a delete would win conflicts against later edits elsewhere.
+        rows = self.conn.execute(
+            "SELECT member_id, deleted, changed_at FROM change_log WHERE seq IN"
+            " (SELECT MAX(seq) FROM change_log GROUP BY member_id) ORDER BY seq"
+        ).fetchall()
+        for member_id, deleted, changed_at in rows:
+            vv, _, _ = self._version(member_id)
+            vv[self.node_id] = vv.get(self.node_id, 0) + 1
+            updated = self.conn.execute("SELECT updated_at FROM members WHERE member_id = ?",
+                                        (member_id,)).fetchone()
+            self._save_version(member_id, vv, self.node_id, deleted, updated[0] if updated else changed_at)
+        self.conn.execute("DELETE FROM change_log")
+        return len(rows)
+
+    def changes_since(self, seq, exclude_origin=None):
+        rows = self.conn.execute(
+            f"SELECT v.member_id, v.vv, v.origin, v.deleted, v.updated_at, v.seq,"
+            f" {', '.join('m.' + f for f in PROFILE_FIELDS)}"
+            " FROM member_versions v LEFT JOIN members m ON m.member_id = v.member_id"
+            " WHERE v.seq > ? AND v.origin != ? ORDER BY v.seq",
+            (seq, exclude_origin or ""),
+        ).fetchall()
+        return [[member_id, json.loads(vv), origin, updated_at, None if deleted else list(values)]
+                for member_id, vv, origin, deleted, updated_at, _, *values in map(tuple, rows)]
+
+    def apply(self, changes):
+        # Apply remote changes; returns the member ids that were in conflict.
+        # Rows written here must not look like local edits, so their
+        # change_log entries are dropped again.
+        conflicts = []
+        log_mark = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        for member_id, vv, origin, updated_at, values in changes:
+            local_vv, local_updated, local_origin = self._version(member_id)
+            order = compare(vv, local_vv)
+            if order in ("equal", "older"):
+                continue
+            if order == "concurrent":
+                conflicts.append(member_id)
+                merged = merge(vv, local_vv)
+                if (updated_at, origin) <= (local_updated, local_origin):
+                    # ours wins, under a version that now covers both; it is
+                    # ours to send on, so it carries this node as origin
+                    self._save_version(member_id, merged, self.node_id, self._is_deleted(member_id), local_updated)
+                    continue
+                vv = merged
+            self._write(member_id, values, updated_at)
+            self._save_version(member_id, vv, origin if order == "newer" else self.node_id,
+                               values is None, updated_at)
+        self.conn.execute("DELETE FROM change_log WHERE seq > ?", (log_mark,))
+        return conflicts
+
+    def _is_deleted(self, member_id):
+        return self.conn.execute("SELECT 1 FROM members WHERE member_id = ?", (member_id,)).fetchone() is None
+
+    def _write(self, member_id, values, updated_at):
+        if values is None:
+            self.conn.execute("DELETE FROM members WHERE member_id = ?", (member_id,))
+            return
+        self.store.write_profile(member_id, dict(zip(PROFILE_FIELDS, values)), updated_at)
+
+
+# ---------- SERVER ----------
+
+class SyncServer:
+    def __init__(self, store):
+        self.node = SyncNode(store)
+
+    def exchange(self, body):
+        request = decode(body)
+        node = self.node
+        with node.conn:
+            node.claim_local_changes()  # edits made directly on the server store
+            conflicts = node.apply(request.get("changes", []))
+            changes = node.changes_since(int(request.get("since", 0)), exclude_origin=request.get("node"))
+        return encode({"protocol": PROTOCOL_VERSION, "node": node.node_id, "cursor": node.current_seq(),
+                       "changes": changes, "conflicts": conflicts})
+
+
+# ---------- CLIENT ----------
+
+class LocalTransport:
+    # in-process stand-in for the service, for tests and single-machine setups
+    def __init__(self, server):
+        self.server = server
+
+    def __call__(self, body):
+        return self.server.exchange(body)
+
+
+class HTTPTransport:
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, body):
+        from urllib.error import URLError
+        from urllib.request import Request, urlopen
+
+        request = Request(self.url, data=body, method="POST", headers={"Content-Type": CONTENT_TYPE})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except (URLError, OSError) as exc:
+            raise SyncError(f"sync server unreachable: {exc}") from None
+
+
+def sync(store, transport):
+    # One round trip. Returns {"sent", "received", "conflicts", "bytes_sent",
+    # "bytes_received"}. Nothing is marked as pushed unless the server
+    # answered, so an offline attempt simply sends the same changes next time.
+    node = SyncNode(store)
+    with node.conn:
+        node.claim_local_changes()
+    pushed, push_mark = int(node._meta("pushed_seq", 0)), node.current_seq()
+    changes = [c for c in node.changes_since(pushed) if c[2] == node.node_id]
+    body = encode({"protocol": PROTOCOL_VERSION, "node": node.node_id,
+                   "since": int(node._meta("server_cursor", 0)), "changes": changes})
+
+    reply_body = transport(body)
+    reply = decode(reply_body)
+    with node.conn:
+        conflicts = node.apply(reply["changes"])
+        node._set_meta("server_cursor", reply["cursor"])
+        node._set_meta("pushed_seq", push_mark)
+    return {"sent": len(changes), "received": len(reply["changes"]),
+            "conflicts": sorted(set(conflicts) | set(reply["conflicts"])),
+            "bytes_sent": len(body), "bytes_received": len(reply_body)}
+
+
+def main(argv=None):
+    from gym_store import DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(description="Sync the local member store with the plan service.")
+    parser.add_argument("--store", default=DEFAULT_DB_PATH, help="local SQLite profile store")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/sync", help="service sync endpoint")
+    args = parser.parse_args(argv)
+
+    with ProfileStore(args.store) as store:
+        try:
+            result = sync(store, HTTPTransport(args.url))
+        except SyncError as exc:
+            print(f"sync failed: {exc}", file=sys.stderr)
+            return 1
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
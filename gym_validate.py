@@ -0,0 +1,483 @@
+# Smart Gym Planner - member input validation and normalisation
+#
+# Usage:
+#   python gym_validate.py roster.csv                      # error report on stderr
+#   python gym_validate.py roster.csv --units imperial --report errors.jsonl -o clean.csv
+#
+# Every way a profile gets in (the desktop form, gym_batch rosters, store
+# imports, the service query string) goes through the same steps:
+#
+#   header   "Height (in)", "Diet Preference", "sex"  -> height [in], diet_pref, gender
+#   numbers  "80,5 kg", "176 lbs", "5'11\"", "1.80 m" -> kg / cm, range-checked
+#   enums    "Fat Loss", "fat_loss", "weight loss"   -> fat-loss
+#   text     name and notes are stripped
+#
+# The enum values come from the loaded rule file; display labels and common
+# spellings map onto them. Bare numbers are cm / kg (lb / in with
+# units="imperial") unless the column header names a unit.
+#
+# normalise_member() checks one record and raises ValidationError listing
+# every problem. validate_columns() checks whole columns: each distinct raw
+# value is normalised once and the column is then a dict lookup per row, so
+# a million-row roster validates in a few seconds. Problems come back as
+# Issue(row, field, value, message) records rather than exceptions.
+
+import gc
+import json
+import math
+import re
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+
+from gym_planner import current_rules
+
+
+GENDERS = ("Male", "Female", "Other")
+REQUIRED_FIELDS = ("age", "gender", "height", "weight", "goal", "activity", "experience", "diet_pref")
+TEXT_FIELDS = ("name", "notes")
+MEMBER_FIELDS = REQUIRED_FIELDS + TEXT_FIELDS
+
+RANGES = {
+    "age": (10, 100),        # years
+    "height": (100, 250),    # cm
+    "weight": (25, 350),     # kg
+}
+DEFAULT_UNITS = {
+    "metric": {"height": "cm", "weight": "kg"},
+    "imperial": {"height": "in", "weight": "lb"},
+}
+
+GOAL_TEXT = {
+    "fat-loss": "Fat Loss",
+    "muscle-gain": "Muscle Gain",
+    "fitness": "Fitness / Toning",
+}
+DIET_TEXT = {
+    "veg": "Vegetarian",
+    "non-veg": "Non-Veg",
+    "egg": "Eggetarian",
+}
+
+# spellings seen in gym rosters, on top of the values and display labels
+ENUM_ALIASES = {
+    "gender": {"m": "Male", "man": "Male", "f": "Female", "woman": "Female",
+               "o": "Other", "x": "Other", "nb": "Other", "non binary": "Other", "nonbinary": "Other"},
+    "goal": {"weight loss": "fat-loss", "lose weight": "fat-loss", "cut": "fat-loss", "fatloss": "fat-loss",
+             "bulk": "muscle-gain", "build muscle": "muscle-gain", "muscle": "muscle-gain",
+             "toning": "fitness", "tone": "fitness", "general fitness": "fitness"},
+    "activity": {"none": "sedentary", "inactive": "sedentary", "low": "light", "lightly active": "light",
+                 "medium": "moderate", "moderately active": "moderate", "active": "high", "very active": "high"},
+    "experience": {"novice": "beginner", "new": "beginner", "intermediate level": "intermediate",
+                   "expert": "advanced", "experienced": "advanced"},
+    "diet_pref": {"vegetarian": "veg", "nonveg": "non-veg", "non vegetarian": "non-veg",
+                  "nonvegetarian": "non-veg", "omnivore": "non-veg", "eggetarian": "egg",
+                  "ovo vegetarian": "egg", "eggs": "egg"},
+}
+
+HEADER_ALIASES = {
+    "id": "id", "member id": "id", "member": "id",
+    "sex": "gender",
+    "height": "height", "weight": "weight", "body weight": "weight",
+    "goal": "goal", "fitness goal": "goal",
+    "activity": "activity", "activity level": "activity",
+    "experience": "experience", "experience level": "experience", "level": "experience",
+    "diet": "diet_pref", "diet pref": "diet_pref", "diet preference": "diet_pref",
+    "dietary preference": "diet_pref",
+    "full name": "name", "member name": "name",
+    "injuries": "notes", "comments": "notes", "note": "notes",
+}
+
+UNIT_ALIASES = {
+    "cm": "cm", "cms": "cm", "centimetres": "cm", "centimeters": "cm",
+    "m": "m", "metre": "m", "metres": "m", "meter": "m", "meters": "m",
+    "in": "in", "inch": "in", "inches": "in", '"': "in",
+    "ft": "ft", "feet": "ft", "foot": "ft", "'": "ft",
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilograms": "kg",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "y": "y", "yr": "y", "yrs": "y", "year": "y", "years": "y",
+}
+TO_CANONICAL = {
+    "height": {"cm": 1.0, "m": 100.0, "in": 2.54, "ft": 30.48},
+    "weight": {"kg": 1.0, "lb": 0.45359237},
+    "age": {"y": 1},
+}
+
+_SEPARATORS = re.compile(r"[\s_\-/]+")
+_HEADER_UNIT = re.compile(r"^(.*?)[\s_]*[(\[]?\b(cm|m|in|inches|ft|kg|kgs|lb|lbs)\b[)\]]?$")
+_QUANTITY = re.compile(r"^([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*([a-z'\"]*)\.?$")
+_FEET_INCHES = re.compile(r"""^(\d+(?:\.\d+)?)\s*(?:'|ft|feet|foot)\s*(?:(\d+(?:\.\d+)?)\s*(?:"|''|in|inch|inches)?)?$""")
+
+
+class Issue:
+    __slots__ = ("row", "field", "value", "message")
+
+    def __init__(self, row, field, value, message):
+        self.row = row          # 1-based data row, None for the whole input
+        self.field = field
+        self.value = value
+        self.message = message
+
+    def to_dict(self):
+        return {"row": self.row, "field": self.field, "value": self.value, "message": self.message}
+
+    def __str__(self):
+        return self.message if self.row is None else f"row {self.row}: {self.message}"
+
+    def __repr__(self):
+        return f"Issue({self.row!r}, {self.field!r}, {self.value!r}, {self.message!r})"
+
+
+class ValidationError(ValueError):
+    def __init__(self, issues):
+        self.issues = list(issues)
+        super().__init__("; ".join(issue.message for issue in self.issues))
+
+
+def _key(text):
+    return _SEPARATORS.sub(" ", text.strip().lower()).strip()
+
+
+# ---------- HEADERS ----------
+
+@lru_cache(maxsize=256)
+def parse_header(header):
+    # "Height (in)" -> ("height", "in"); unknown headers keep their own name
+    text = _key(str(header))
+    unit = None
+    m = _HEADER_UNIT.match(text)
+    if m and m.group(1):
+        text, unit = m.group(1).strip(), UNIT_ALIASES[m.group(2)]
+    field = HEADER_ALIASES.get(text, text.replace(" ", "_"))
+    if unit is not None and unit not in TO_CANONICAL.get(field, ()):
+        return _key(str(header)).replace(" ", "_"), None
+    return field, unit
+
+
+def row_id(row, index):
+    # the member id of a raw row under any id header, else its row number
+    for header, value in row.items():
+        if value and parse_header(header)[0] == "id":
+            return str(value).strip()
+    return str(index)
+
+
+# ---------- FIELDS ----------
+
+@lru_cache(maxsize=4)
+def _enum_tables(rules):
+    inputs = {
+        "gender": GENDERS,
+        "goal": rules.goals,
+        "activity": rules.activity_levels,
+        "experience": rules.experience_levels,
+        "diet_pref": rules.diet_prefs,
+    }
+    labels = {"goal": GOAL_TEXT, "diet_pref": DIET_TEXT}
+    tables = {}
+    for field, values in inputs.items():
+        table = {}
+        for spelling, value in ENUM_ALIASES[field].items():
+            if value in values:
+                table[_key(spelling)] = value
+        for value, label in labels.get(field, {}).items():
+            if value in values:
+                table[_key(label)] = value
+        for value in values:
+            table[_key(value)] = value
+        tables[field] = (table, ", ".join(values))
+    return tables
+
+
+def _quantity(field, raw, unit):
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        number, given = float(raw), ""
+    else:
+        text = str(raw).strip().lower()
+        if "," in text and "." not in text:
+            text = text.replace(",", ".")  # decimal comma
+        if field == "height":
+            m = _FEET_INCHES.match(text)
+            if m:
+                inches = float(m.group(1)) * 12 + float(m.group(2) or 0)
+                return round(inches * 2.54, 1), None, "ft"
+        m = _QUANTITY.match(text)
+        if not m:
+            return None, f"{field}: {raw!r} is not a number", unit
+        number, given = float(m.group(1)), m.group(2)
+        if given:
+            if UNIT_ALIASES.get(given) not in TO_CANONICAL[field]:
+                return None, f"{field}: unknown unit {given!r} in {raw!r}", unit
+            unit = UNIT_ALIASES[given]
+    if not math.isfinite(number):
+        return None, f"{field}: {raw!r} is not a number", unit
+    factor = TO_CANONICAL[field][unit]
+    if factor != 1:
+        number = round(number * factor, 1)
+    return number, None, unit
+
+
+def _normalise(rules, field, unit, raw):
+    # -> (value, None) or (None, error message)
+    if raw is None or (isinstance(raw, str) and not raw.strip()):
+        return None, f"missing required field '{field}'"
+    if field in RANGES:
+        value, error, unit = _quantity(field, raw, unit)
+        if error:
+            return None, error
+        if field == "age":
+            if value != int(value):
+                return None, f"age: {raw!r} is not a whole number of years"
+            value = int(value)
+        low, high = RANGES[field]
+        if not low <= value <= high:
+            units = {"age": "years", "height": "cm", "weight": "kg"}[field]
+            read_as = "" if TO_CANONICAL[field][unit] == 1 else f" (read as {value:g} {units})"
+            return None, f"{field}: {raw!r}{read_as} is outside {low}–{high} {units}"
+        return value, None
+    table, expected = _enum_tables(rules)[field]
+    value = table.get(_key(str(raw)))
+    if value is None:
+        return None, f"{field}: unknown value {raw!r} (expected {expected})"
+    return value, None
+
+
+_normalise_cached = lru_cache(maxsize=8192)(_normalise)
+
+
+def _units_for(units):
+    try:
+        return DEFAULT_UNITS[units]
+    except KeyError:
+        raise ValueError(f"unknown unit system '{units}'") from None
+
+
+# ---------- RECORDS ----------
+
+def normalise_member(row, units="metric"):
+    # One raw mapping (any header spelling) -> member dict with the
+    # MEMBER_FIELDS keys, or ValidationError listing every bad field.
+    rules = current_rules()
+    default_units = _units_for(units)
+    raw, field_units = {}, {}
+    for header, value in row.items():
+        field, unit = parse_header(header)
+        if field not in raw or raw[field] in (None, ""):
+            raw[field] = value
+            field_units[field] = unit
+
+    member, issues = {}, []
+    for field in REQUIRED_FIELDS:
+        value = raw.get(field)
+        unit = field_units.get(field) or default_units.get(field) or ("y" if field == "age" else None)
+        try:
+            member[field], error = _normalise_cached(rules, field, unit, value)
+        except TypeError:  # unhashable raw value
+            member[field], error = _normalise(rules, field, unit, value)
+        if error:
+            issues.append(Issue(None, field, value, error))
+    if issues:
+        raise ValidationError(issues)
+    for field in TEXT_FIELDS:
+        member[field] = str(raw.get(field) or "").strip()
+    return member
+
+
+# ---------- COLUMNS ----------
+# Building millions of small objects triggers the cyclic collector over and
+# over for nothing (none of them form cycles); pausing it halves bulk times.
+
+@contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def validate_columns(columns, units="metric", first_row=1):
+    with _gc_paused():
+        return _validate_columns(columns, units, first_row)
+
+
+_UNHASHABLE = object()
+
+
+def _cell_key(raw):
+    # a dict key standing for raw, which need not be hashable
+    try:
+        hash(raw)
+    except TypeError:
+        return _UNHASHABLE, repr(raw)
+    return raw
+
+
+def _validate_columns(columns, units, first_row):
+    # columns: {header: sequence of raw values}, all the same length.
+    # Returns ({field: list of values}, issues); a row with any issue has
+    # None in every required field, so one pass over issues finds the
+    # rejected rows.
+    rules = current_rules()
+    default_units = _units_for(units)
+    fields = {}
+    for header, values in columns.items():
+        field, unit = parse_header(header)
+        fields.setdefault(field, (values, unit))
+    missing = [f for f in REQUIRED_FIELDS if f not in fields]
+    if missing:
+        raise ValidationError([Issue(None, f, None, f"missing required column '{f}'") for f in missing])
+    rows = len(fields[REQUIRED_FIELDS[0]][0])
+
+    out, issues = {}, []
+    for field in REQUIRED_FIELDS:
+        values, unit = fields[field]
+        if len(values) != rows:
+            raise ValidationError([Issue(None, field, None, f"column '{field}' has {len(values)} values, expected {rows}")])
+        unit = unit or default_units.get(field) or ("y" if field == "age" else None)
+        try:
+            keys, distinct = values, ((raw, raw) for raw in dict.fromkeys(values))
+        except TypeError:  # JSONL objects / arrays: looked up by their repr
+            keys = [_cell_key(raw) for raw in values]
+            distinct = dict(zip(keys, values)).items()
+        table, bad = {}, {}
+        for key, raw in distinct:
+            table[key], error = _normalise(rules, field, unit, raw)
+            if error:
+                bad[key] = error
+        out[field] = list(map(table.__getitem__, keys))
+        if bad:
+            issues.extend(Issue(first_row + i, field, values[i], bad[key])
+                          for i, key in enumerate(keys) if key in bad)
+    for field in TEXT_FIELDS + ("id",):
+        values = fields.get(field, (None,))[0]
+        if values is None:
+            out[field] = [""] * rows
+            continue
+        try:
+            out[field] = list(map(str.strip, values))  # CSV columns are all str
+        except TypeError:
+            out[field] = ["" if v is None else str(v).strip() for v in values]
+
+    if issues:
+        issues.sort(key=lambda issue: issue.row)
+        rejected = {issue.row - first_row for issue in issues}
+        for field in REQUIRED_FIELDS:
+            column = out[field]
+            for i in rejected:
+                column[i] = None
+    return out, issues
+
+
+def iter_valid(columns):
+    # (member_id, member) for the accepted rows of validate_columns() output;
+    # rows without an id are numbered like gym_batch numbers them
+    ids = columns["id"]
+    for i, age in enumerate(columns["age"]):
+        if age is not None:
+            yield ids[i] or str(i + 1), {field: columns[field][i] for field in MEMBER_FIELDS}
+
+
+def validate_rows(rows, units="metric", chunk_size=65536):
+    # Stream mapping rows (e.g. gym_batch.read_roster) through
+    # validate_columns() a chunk at a time. Yields (member_id, member, issues)
+    # per row; member is None when issues is non-empty.
+    chunk, first = [], 1
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield from _validate_chunk(chunk, units, first)
+            first += len(chunk)
+            chunk = []
+    if chunk:
+        yield from _validate_chunk(chunk, units, first)
+
+
+def _validate_chunk(rows, units, first):
+    headers = dict.fromkeys(h for row in rows for h in row)
+    columns = {h: [row.get(h) for row in rows] for h in headers}
+    present = {parse_header(h)[0] for h in headers}
+    for field in REQUIRED_FIELDS:
+        if field not in present:
+            columns[field] = [None] * len(rows)  # reported per row as a missing field
+    with _gc_paused():
+        out, issues = _validate_columns(columns, units, first)
+    by_row = {}
+    for issue in issues:
+        by_row.setdefault(issue.row, []).append(issue)
+    ids = out["id"]
+    for i in range(len(rows)):
+        member_id = ids[i] or str(first + i)
+        row_issues = by_row.get(first + i)
+        if row_issues:
+            yield member_id, None, row_issues
+        else:
+            yield member_id, {field: out[field][i] for field in MEMBER_FIELDS}, []
+
+
+# ---------- CLI ----------
+
+def read_columns(path):
+    # whole CSV as {header: column}; much cheaper than one dict per row
+    import csv  # the CLI only; gym_render imports this module
+
+    with (sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")) as fh:
+        reader = csv.reader(fh)
+        headers = next(reader, [])
+        with _gc_paused():
+            columns = list(zip(*reader)) or [()] * len(headers)
+    return dict(zip(headers, columns))
+
+
+def write_report(issues, fh):
+    for issue in issues:
+        fh.write(json.dumps(issue.to_dict(), ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(description="Validate and normalise a member roster CSV.")
+    parser.add_argument("roster", help="CSV roster ('-' for stdin)")
+    parser.add_argument("--units", choices=sorted(DEFAULT_UNITS), default="metric",
+                        help="units of bare height / weight numbers (default: metric)")
+    parser.add_argument("--report", metavar="FILE", help="write one JSON issue per line to FILE")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write the accepted rows, normalised, as CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        columns, issues = validate_columns(read_columns(args.roster), args.units)
+    except ValidationError as exc:
+        print(f"{args.roster}: {exc}", file=sys.stderr)
+        return 2
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            write_report(issues, fh)
+    else:
+        for issue in issues[:50]:
+            print(issue, file=sys.stderr)
+        if len(issues) > 50:
+            print(f"... {len(issues) - 50} more", file=sys.stderr)
+
+    accepted = 0
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("id",) + MEMBER_FIELDS)
+            for member_id, member in iter_valid(columns):
+                writer.writerow((member_id, *member.values()))
+                accepted += 1
+    else:
+        accepted = sum(age is not None for age in columns["age"])
+
+    rows = len(columns["age"])
+    print(f"{rows} rows, {accepted} accepted, {rows - accepted} rejected, {len(issues)} issues", file=sys.stderr)
+    return 1 if issues else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# Smart Gym Planner - shared test fixtures
+#
+# The gym_* modules live at the repository root, next to this directory.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def roster_row(member_id, **overrides):
+    # one roster row as read from a CSV file (all values are strings)
+    row = {
+        "id": str(member_id), "name": f"Member {member_id}", "age": "30", "gender": "Female",
+        "height": "165", "weight": "60", "goal": "fat-loss", "activity": "moderate",
+        "experience": "beginner", "diet_pref": "veg", "notes": "",
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def store(tmp_path):
+    from gym_store import ProfileStore
+
+    with ProfileStore(str(tmp_path / "members.db")) as s:
+        yield s
+
+
+@pytest.fixture
+def rules_data():
+    # a fresh copy of the default rule file's data
+    from gym_rules import DEFAULT_RULES, read_rules
+
+    return read_rules(DEFAULT_RULES)
+
+
+@pytest.fixture
+def restore_rules():
+    # for tests that swap rules in with gym_planner.use_rules
+    from gym_planner import current_rules, use_rules
+
+    previous = current_rules()
+    yield
+    use_rules(previous)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from gym_arrays import (BMI_NA, calculate_bmi_array, classify_members, get_bmi_status_codes,
+                        get_bmi_status_labels, get_protein_targets)
+from gym_planner import calculate_bmi, get_bmi_status
+
+HEIGHTS = [165, 180, 150, 190, 0, 170, -5, 170, 160, 172.5, 100, 200]
+WEIGHTS = [60, 95, 41.625, 108.3, 70, 0, 60, -1, 64, 55.3, 25, 119.99]
+
+
+def _scalar_bmi(height, weight):
+    return np.nan if (bmi := calculate_bmi(height, weight)) is None else bmi
+
+
+def test_bmi_matches_the_scalar_version():
+    expected = [_scalar_bmi(h, w) for h, w in zip(HEIGHTS, WEIGHTS)]
+    np.testing.assert_array_equal(calculate_bmi_array(HEIGHTS, WEIGHTS), expected)
+
+
+def test_nan_inputs_give_na():
+    bmi = calculate_bmi_array([np.nan, 170], [60, np.nan])
+    assert np.isnan(bmi).all()
+    assert get_bmi_status_codes(bmi).tolist() == [BMI_NA, BMI_NA]
+
+
+def test_status_matches_the_scalar_version_at_the_cut_points():
+    bmi = [np.nan, 10, 18.4999, 18.5, 24.999, 25, 29.999, 30, 45]
+    expected = [get_bmi_status(None if np.isnan(b) else b) for b in bmi]
+    assert get_bmi_status_labels(get_bmi_status_codes(bmi)).tolist() == expected
+
+
+def test_protein_rounds_like_get_diet_plan():
+    # 0.3125 * 1.6 == 0.5 and 1.5625 * 1.6 == 2.5: half to even, as round() does
+    weights = [60, 72.4, 0.3125, 1.5625, 80.9, 55.3]
+    assert get_protein_targets(weights).tolist() == [round(w * 1.6) for w in weights]
+
+
+def test_classify_members_agrees_with_the_scalar_pipeline():
+    bmi, codes, protein = classify_members(HEIGHTS, WEIGHTS)
+    for i, (h, w) in enumerate(zip(HEIGHTS, WEIGHTS)):
+        assert get_bmi_status_labels(codes[i]) == get_bmi_status(calculate_bmi(h, w))
+        assert protein[i] == round(w * 1.6)
+    assert bmi.dtype == np.float64 and codes.dtype == np.int8
@@ -0,0 +1,72 @@
+import csv
+import json
+
+import pytest
+
+from conftest import roster_row
+from gym_batch import main
+
+
+def _write_roster(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def roster(tmp_path):
+    rows = [roster_row(1), roster_row(2, age="-4", height="tall"), roster_row(3, weight="72"),
+            roster_row(4, goal="world domination")]
+    return _write_roster(tmp_path / "roster.csv", rows)
+
+
+def _run(*argv):
+    return main([*argv, "-j", "1", "--cache", "off"])
+
+
+def test_bad_rows_are_rejected_with_status_1(roster, tmp_path, capsys):
+    out = tmp_path / "plans.txt"
+    assert _run(roster, "-o", str(out)) == 1
+
+    err = capsys.readouterr().err
+    assert "member 2: " in err and "age" in err and "height" in err
+    assert "member 4: " in err and "goal" in err
+    assert "2 plans written, 2 rows rejected" in err
+    text = out.read_text(encoding="utf-8")
+    assert text.count("Weight: 60.0 kg") == 1 and text.count("Weight: 72.0 kg") == 1
+
+
+def test_jsonl_output_keeps_the_rejected_rows(roster, tmp_path, capsys):
+    out = tmp_path / "plans.jsonl"
+    assert _run(roster, "--format", "jsonl", "-o", str(out)) == 1
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["id"] for r in records] == ["1", "2", "3", "4"]
+    assert ["error" in r for r in records] == [False, True, False, True]
+
+
+def test_clean_roster_exits_0(tmp_path, capsys):
+    roster = _write_roster(tmp_path / "roster.csv", [roster_row(1), roster_row(2, gender="Male")])
+    assert _run(roster, "-o", str(tmp_path / "plans.txt")) == 0
+    assert "2 plans written, 0 rows rejected" in capsys.readouterr().err
+
+
+def test_store_import_rejects_bad_rows_with_status_1(roster, tmp_path, capsys):
+    out = tmp_path / "plans.txt"
+    assert _run(roster, "--store", str(tmp_path / "members.db"), "-o", str(out)) == 1
+    err = capsys.readouterr().err
+    assert "member 2: " in err and "member 4: " in err
+    assert "2 plans written, 2 rows rejected" in err
+
+
+def test_html_output_is_one_document_with_a_card_per_member(roster, tmp_path, capsys):
+    out = tmp_path / "plans.html"
+    assert _run(roster, "--format", "html", "-o", str(out)) == 1
+    page = out.read_text(encoding="utf-8")
+    assert page.startswith("<!DOCTYPE html>\n")
+    assert page.endswith("  </main>\n</body>\n</html>\n")
+    for tag in ("<!DOCTYPE", "<html", "<head>", "<body>", "</body>", "</html>"):
+        assert page.count(tag) == 1, tag
+    assert page.count('<main class="main-card">') == page.count("</main>") == 2
+    assert page.index("Weight: 60.0 kg") < page.index("</main>") < page.index("Weight: 72.0 kg")
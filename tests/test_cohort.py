@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from conftest import roster_row
+from gym_cohort import Cohort, main
+
+
+def _profiles():
+    return [
+        roster_row(1),
+        roster_row(2, gender="Male", age="45", height="180", weight="95", goal="muscle-gain", activity="high"),
+        roster_row(3, age="52", height="160", weight="45", goal="fitness", activity="light"),
+        roster_row(4, gender="Male", age="33", height="175", weight="110"),
+        roster_row(5, gender="Other", age="28", weight="0"),
+    ]
+
+
+def _cohort():
+    profiles = _profiles()
+    return Cohort.from_profiles([p["id"] for p in profiles], profiles)
+
+
+def _aggregates(cohort):
+    return [a.copy() for a in (cohort.counts, cohort.protein_sum, cohort.protein_members,
+                               cohort.adherence_sum, cohort.adherence_members)]
+
+
+def _assert_matches_rebuild(cohort):
+    incremental = _aggregates(cohort)
+    cohort._rebuild()
+    for got, want in zip(incremental, _aggregates(cohort)):
+        np.testing.assert_allclose(got, want)
+
+
+def test_upsert_and_remove_match_a_rebuild():
+    cohort = _cohort()
+    cohort.set_adherence(["1", "2"], [0.5, 1.0])
+
+    cohort.upsert("1", roster_row(1, weight="90", goal="muscle-gain"))   # moves cell, keeps adherence
+    _assert_matches_rebuild(cohort)
+    cohort.upsert("6", roster_row(6, gender="Male"))                     # new member
+    _assert_matches_rebuild(cohort)
+    assert cohort.remove("2")
+    assert not cohort.remove("2")
+    _assert_matches_rebuild(cohort)
+    cohort.upsert("7", roster_row(7, age="61"))                          # reuses the freed row
+    _assert_matches_rebuild(cohort)
+
+    assert len(cohort) == 6
+    assert cohort.summary()["members"] == 6
+    assert cohort.summary()["adherence"]["members_with_logs"] == 1
+
+
+def test_upsert_grows_past_the_initial_capacity():
+    cohort = Cohort(capacity=2)
+    for i in range(5):
+        cohort.upsert(i, roster_row(i, age=str(20 + i)))
+    _assert_matches_rebuild(cohort)
+    assert cohort.summary()["members"] == 5
+
+
+def test_summary_filters():
+    cohort = _cohort()
+    everyone = cohort.summary()
+    assert everyone["members"] == 5
+    assert everyone["bmi_status"] == {"Underweight": 1, "Normal": 1, "Overweight": 1, "Obese": 1, "N/A": 1}
+
+    women = cohort.summary(gender="Female")
+    assert women["members"] == 2
+    assert women["goal_mix"] == {"fat-loss": 1, "muscle-gain": 0, "fitness": 1}
+
+    assert cohort.summary(gender=["Male", "Other"])["members"] == 3
+    assert cohort.summary(age=(30, 45))["members"] == 3
+    assert cohort.summary(age=(30, 45), activity="moderate")["members"] == 2
+    assert cohort.summary(gender="Male", age=(30, 40), activity=["moderate", "high"])["members"] == 1
+
+
+def test_unknown_filter_values_are_rejected(capsys):
+    cohort = _cohort()
+    with pytest.raises(ValueError, match="Femal"):
+        cohort.summary(gender="Femal")
+    with pytest.raises(ValueError, match="activity"):
+        cohort.summary(activity=["moderate", "very high"])
+
+    with pytest.raises(SystemExit) as exc:
+        main(["--gender", "Femal"])
+    assert exc.value.code == 2
+    assert "unknown gender 'Femal'" in capsys.readouterr().err
@@ -0,0 +1,17 @@
+import os
+
+from conftest import roster_row
+from gym_export import Assets, export_roster
+
+
+def test_repeated_member_ids_get_their_own_files(tmp_path):
+    rows = [roster_row(7, name="First"), roster_row(7, name="Second"), roster_row("7-2", name="Third"),
+            roster_row("A 1"), roster_row("a_1")]
+
+    out = list(export_roster(rows, str(tmp_path), fmt="html", workers=1, assets=Assets()))
+
+    assert [error for _, _, error in out] == [None] * 5
+    paths = [path for _, path, _ in out]
+    assert [os.path.basename(p) for p in paths] == ["7.html", "7-2.html", "7-2-2.html", "A_1.html", "a_1-2.html"]
+    with open(paths[1], encoding="utf-8") as fh:
+        assert "Second" in fh.read()
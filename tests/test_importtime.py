@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+
+from importtime import DEFAULT_MODULES, FORBIDDEN, check_module  # noqa: E402
+
+BUDGET_US = 50_000
+
+
+@pytest.mark.parametrize("module", DEFAULT_MODULES)
+def test_import_stays_cheap(module):
+    result = check_module(module, BUDGET_US, repeat=5)
+
+    assert result["forbidden"] == [], f"{module} imports {', '.join(result['forbidden'])} ({FORBIDDEN} are GUI-only)"
+    assert result["cumulative_us"] <= BUDGET_US, f"{module} took {result['cumulative_us'] / 1000:.1f} ms"
@@ -0,0 +1,24 @@
+import pytest
+
+from gym_injuries import KNEE, LOWER_BACK, SHOULDER, WRIST, parse_notes
+
+
+@pytest.mark.parametrize("notes, joints", [
+    ("", set()),
+    ("knee pain", {KNEE}),
+    ("Slipped disc, bad knees", {LOWER_BACK, KNEE}),
+    # a longer phrase wins over the shorter one inside it
+    ("upper back pain", set()),
+    ("upper-back tightness and sore wrists", {WRIST}),
+    # negation
+    ("no knee pain", set()),
+    ("without any shoulder trouble", set()),
+    ("No history of back pain", set()),
+    ("no knee, shoulder or hip issues", set()),
+    ("no knee pain, shoulder hurts", {SHOULDER}),
+    ("knee pain but no shoulder issues", {KNEE}),
+    ("never had knee issues. Wrist sprain last year", {WRIST}),
+    ("not fully recovered from knee surgery", {KNEE}),
+])
+def test_parse_notes(notes, joints):
+    assert parse_notes(notes) == frozenset(joints)
@@ -0,0 +1,90 @@
+import pytest
+
+import gym_batch
+import gym_instrument
+import gym_planner
+import gym_render
+
+
+@pytest.fixture
+def instrumented():
+    gym_instrument.reset()
+    yield gym_instrument
+    gym_instrument.disable()
+    gym_instrument.reset()
+
+
+def _originals():
+    return {
+        "planner.calculate_bmi": gym_planner.calculate_bmi,
+        "planner.get_workout_plan": gym_planner.get_workout_plan,
+        "render.format_plan": gym_render.format_plan,
+        "render._static_sections": gym_render._static_sections,
+        "batch.format_plan": gym_batch.format_plan,
+    }
+
+
+def test_enable_wraps_every_reference_and_disable_restores_them(instrumented):
+    before = _originals()
+    instrumented.enable()
+    assert instrumented.is_enabled()
+    wrapped = _originals()
+    for name, fn in wrapped.items():
+        assert fn is not before[name], name
+        assert fn.__wrapped__ is before[name]
+        assert fn.__name__ == before[name].__name__
+    # the module that imported format_plan by name shares the wrapper
+    assert gym_batch.format_plan is gym_render.format_plan
+
+    instrumented.enable()   # no double wrapping
+    assert _originals() == wrapped
+
+    instrumented.disable()
+    assert not instrumented.is_enabled()
+    assert _originals() == before
+    instrumented.disable()
+    assert _originals() == before
+
+
+def test_cached_stages_keep_their_cache_helpers(instrumented):
+    instrumented.enable()
+    assert gym_render._static_sections.cache_clear == gym_render._static_sections.__wrapped__.cache_clear
+
+
+def test_calls_and_errors_are_counted(instrumented):
+    instrumented.enable()
+    gym_planner.calculate_bmi(165, 60)
+    gym_planner.calculate_bmi(180, 80)
+    with pytest.raises(TypeError):
+        gym_planner.calculate_bmi("165", 60)
+    instrumented.disable()
+    gym_planner.calculate_bmi(165, 60)   # not counted once disabled
+
+    stage = instrumented.snapshot()["stages"]["calculate_bmi"]
+    assert (stage["calls"], stage["errors"]) == (3, 1)
+    assert stage["max_ns"] <= stage["total_ns"]
+    assert 'gym_planner_stage_calls_total{stage="calculate_bmi"} 3' in instrumented.to_prometheus()
+
+
+def test_allocation_tracking_stops_with_disable(instrumented):
+    import tracemalloc
+
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc already running")
+    instrumented.enable(track_allocations=True)
+    assert tracemalloc.is_tracing()
+    gym_planner.get_workout_plan("fitness", "beginner", "light")
+    assert instrumented.snapshot()["tracking_allocations"]
+    instrumented.disable()
+    assert not tracemalloc.is_tracing()
+    assert not instrumented.snapshot()["tracking_allocations"]
+
+
+def test_timed_records_failures(instrumented):
+    with instrumented.timed("write"):
+        pass
+    with pytest.raises(RuntimeError):
+        with instrumented.timed("write"):
+            raise RuntimeError("disk full")
+    stage = instrumented.snapshot()["stages"]["write"]
+    assert (stage["calls"], stage["errors"]) == (2, 1)
@@ -0,0 +1,48 @@
+import pytest
+
+from gym_model import MAGIC, DietPlan, MemberProfile, WorkoutPlan, dumps, loads
+from gym_planner import get_diet_plan, get_workout_plan
+
+
+@pytest.mark.parametrize("goal", ["fat-loss", "muscle-gain", "fitness"])
+@pytest.mark.parametrize("experience", ["beginner", "intermediate", "advanced"])
+def test_workout_plan_round_trip(goal, experience):
+    plan = get_workout_plan(goal, experience, "moderate", "knee pain")
+
+    restored = loads(dumps(plan))
+
+    assert isinstance(restored, WorkoutPlan)
+    assert restored == plan
+    assert [day.exercises for day in restored.days] == [day.exercises for day in plan.days]
+
+
+@pytest.mark.parametrize("diet_pref", ["veg", "non-veg", "egg"])
+def test_diet_plan_round_trip(diet_pref):
+    plan = get_diet_plan("muscle-gain", diet_pref, 72.5)
+
+    restored = loads(dumps(plan))
+
+    assert isinstance(restored, DietPlan)
+    assert restored == plan
+
+
+def test_member_profile_round_trip():
+    member = MemberProfile(34, "Other", 172.5, 68.25, "fitness", "light", "intermediate",
+                           "egg", "Zoë Ünal", "left knee – physio said go easy")
+
+    assert loads(dumps(member)) == member
+
+
+def test_loads_rejects_foreign_and_future_data():
+    with pytest.raises(ValueError, match="not a serialised"):
+        loads(b"not a plan")
+    data = bytearray(dumps(MemberProfile(30, "Male", 180.0, 80.0, "fitness", "high",
+                                         "advanced", "veg", "", "")))
+    data[len(MAGIC)] = 99  # schema version
+    with pytest.raises(ValueError, match="schema version 99"):
+        loads(bytes(data))
+
+
+def test_dumps_rejects_other_types():
+    with pytest.raises(TypeError):
+        dumps({"title": "not a record"})
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from gym_nutrition import (DIET_LEVELS, FOODS, MEALS, SERVINGS, calculate_bmr, calculate_targets,
+                           meal_index, meal_plan_from_json, meal_plan_to_json, plan_meals)
+
+FOOD_BY_NAME = {f[0]: f for f in FOODS}
+
+MEMBERS = [
+    (30, "Female", 165, 60, "fat-loss", "moderate", "veg"),
+    (25, "Male", 180, 80, "muscle-gain", "high", "non-veg"),
+    (40, "Other", 170, 70, "fitness", "light", "egg"),
+    (80, "Female", 150, 40, "fat-loss", "sedentary", "veg"),
+]
+
+
+def _targets(t):
+    return t.bmr, t.tdee, t.calories, t.protein, t.carbs, t.fat
+
+
+def test_bmr_uses_mifflin_st_jeor():
+    assert calculate_bmr(25, "Male", 180, 80) == 1805
+    assert calculate_bmr(30, "female", 165, 60) == 1320.25
+    assert calculate_bmr(30, "Other", 165, 60) == 1320.25 + (5 + 161) / 2
+
+
+def test_targets():
+    # TDEE 1805 * 1.725, +10%, rounded to 10 kcal; fat 25% of kcal, carbs the rest
+    assert _targets(calculate_targets(25, "Male", 180, 80, "muscle-gain", "high")) == (1805, 3114, 3420, 128, 513, 95)
+    assert _targets(calculate_targets(30, "Female", 165, 60, "fat-loss", "moderate")) == (1320, 2046, 1640, 96, 210, 46)
+    # unknown goal / activity: maintenance at moderate activity
+    assert calculate_targets(30, "Female", 165, 60, "bulk", "couch").calories == 2050
+
+
+def test_calories_never_drop_below_the_floor():
+    t = calculate_targets(80, "Female", 150, 40, "fat-loss", "sedentary")
+    assert t.calories == 1200
+    assert t.protein * 4 + t.carbs * 4 + t.fat * 9 == pytest.approx(1200, abs=10)
+
+
+@pytest.mark.parametrize("member", MEMBERS, ids=lambda m: f"{m[1]}-{m[4]}-{m[6]}")
+def test_meals_respect_diet_meal_slots_and_servings(member):
+    plan = plan_meals(*member)
+    level = DIET_LEVELS[member[-1]]
+    assert [m.name for m in plan.meals] == [name for name, _, _ in MEALS]
+
+    for meal, (_, code, _) in zip(plan.meals, MEALS):
+        foods = [FOOD_BY_NAME[name] for name, _, _ in meal.items]
+        assert [f[7] for f in foods][:2] == ["protein", "carb"]
+        assert len(foods) in (2, 3)
+        macros = np.zeros(4)
+        for food, (_, serving, n) in zip(foods, meal.items):
+            assert DIET_LEVELS[food[6]] <= level
+            assert code in food[8]
+            assert serving == food[1]
+            assert n in SERVINGS[food[7]]
+            macros += np.array(food[2:6]) * n
+        # Meal rounds its macros to 0.1
+        assert [meal.calories, meal.protein, meal.carbs, meal.fat] == pytest.approx(macros, abs=0.051)
+
+
+@pytest.mark.parametrize("member", MEMBERS, ids=lambda m: f"{m[1]}-{m[4]}-{m[6]}")
+def test_day_lands_near_the_targets(member):
+    plan = plan_meals(*member)
+    t = plan.targets
+    assert plan.calories == pytest.approx(t.calories, rel=0.05)
+    assert plan.protein == pytest.approx(t.protein, rel=0.1)
+    assert plan.carbs == pytest.approx(t.carbs, rel=0.1)
+    assert plan.fat == pytest.approx(t.fat, rel=0.1)
+
+
+def test_unknown_diet_preference_gets_the_egg_table():
+    plan = plan_meals(30, "Female", 165, 60, "fat-loss", "moderate", "pescatarian")
+    assert plan.diet_pref == "egg"
+    assert all(FOOD_BY_NAME[name][6] != "non-veg" for meal in plan.meals for name, _, _ in meal.items)
+
+
+def test_meal_index_is_read_only_and_covers_every_combination():
+    macros, foods, servings = meal_index(DIET_LEVELS["veg"], "S")
+    assert macros.shape == (len(foods), 4) and servings.shape == foods.shape
+    assert not macros.flags.writeable
+    assert (foods[:, 2] == -1).any()
+    assert len({tuple(f) + tuple(s) for f, s in zip(foods.tolist(), servings.tolist())}) == len(foods)
+
+
+def test_meal_plan_json_round_trip():
+    plan = plan_meals(*MEMBERS[1])
+    again = meal_plan_from_json(meal_plan_to_json(plan))
+    assert _targets(again.targets) == _targets(plan.targets)
+    assert [(m.name, m.items, m.calories, m.protein) for m in again.meals] == \
+           [(m.name, m.items, m.calories, m.protein) for m in plan.meals]
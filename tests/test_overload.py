@@ -0,0 +1,94 @@
+import datetime
+
+import numpy as np
+
+from gym_overload import DELOAD, HOLD, PROGRESS, compute_targets, rep_ranges, targets_from_log
+from gym_planner import get_workout_plan
+from gym_progress import ProgressLog
+
+
+def _targets(sessions, low=8, high=12):
+    # sessions: (day, load, reps) for member 0, exercise 0
+    day, load, reps = zip(*sessions)
+    n = len(sessions)
+    return compute_targets([0] * n, [0] * n, day, load, reps, [low], [high])
+
+
+def test_top_of_range_progresses():
+    t = _targets([(1, 100.0, 10), (4, 100.0, 12)])
+
+    assert t["status"].tolist() == [PROGRESS]
+    assert t["next_load"].tolist() == [102.5]
+    assert t["next_reps"].tolist() == [8]
+
+
+def test_inside_range_holds_and_adds_a_rep():
+    t = _targets([(1, 60.0, 9), (4, 60.0, 10)])
+
+    assert t["status"].tolist() == [HOLD]
+    assert t["next_load"].tolist() == [60.0]
+    assert t["next_reps"].tolist() == [11]
+
+
+def test_light_loads_move_up_at_least_a_kilo():
+    assert _targets([(1, 10.0, 12)])["next_load"].tolist() == [11.0]
+
+
+def test_missing_the_bottom_twice_deloads():
+    # e1RM still rising, but 7 reps is below the range two sessions running
+    t = _targets([(1, 100.0, 8), (4, 102.5, 7), (8, 105.0, 7)])
+
+    assert t["status"].tolist() == [DELOAD]
+    assert t["next_load"].tolist() == [94.5]
+    assert t["next_reps"].tolist() == [8]
+
+
+def test_falling_e1rm_twice_deloads():
+    t = _targets([(1, 100.0, 11), (4, 97.5, 10), (8, 95.0, 9)])
+
+    assert t["status"].tolist() == [DELOAD]
+
+
+def test_best_set_of_a_session_counts():
+    # two sets on day 4: the 12-rep set decides, so the member progresses
+    t = compute_targets([0, 0, 0], [0, 0, 0], [1, 4, 4], [100.0, 100.0, 100.0], [10, 8, 12], [8], [12])
+
+    assert t["sessions"].tolist() == [2]
+    assert t["status"].tolist() == [PROGRESS]
+
+
+def test_ranges_per_member():
+    # same lift, member 0 on 10-12, member 1 on 8-10: 10 reps holds for one
+    # and progresses for the other
+    low, high = np.array([[10], [8]]), np.array([[12], [10]])
+    t = compute_targets([0, 1], [0, 0], [1, 1], [100.0, 100.0], [10, 10], low, high)
+
+    assert t["status"].tolist() == [HOLD, PROGRESS]
+
+
+def test_rep_ranges_accept_ids_and_names():
+    low, high = rep_ranges(["squats-leg-press", "Squats / Leg Press", "Plank", "no such lift"])
+
+    assert list(zip(low.tolist(), high.tolist())) == [(10, 12), (10, 12), (8, 12), (8, 12)]
+
+
+def test_rep_ranges_follow_the_members_plan():
+    plan = get_workout_plan("muscle-gain", "beginner", "moderate")
+
+    low, high = rep_ranges(["Squats / Leg Press"], plan)
+
+    assert (low.tolist(), high.tolist()) == ([8], [10])
+
+
+def test_targets_from_log_uses_each_members_plan(tmp_path):
+    log = ProgressLog(str(tmp_path))
+    day = datetime.date(2026, 1, 5)
+    for member_id in ("cut", "bulk"):
+        log.log_lift(member_id, day, "squats-leg-press", 100.0, 10)
+    plans = {"cut": get_workout_plan("fat-loss", "beginner", "moderate"),
+             "bulk": get_workout_plan("muscle-gain", "beginner", "moderate")}
+
+    t = targets_from_log(log, plans=plans)
+
+    status = dict(zip(t["member_id"].tolist(), t["status"].tolist()))
+    assert status == {"cut": HOLD, "bulk": PROGRESS}
@@ -0,0 +1,85 @@
+import pytest
+
+from gym_periodize import (ACCUMULATION, DELOAD, INTENSIFICATION, block_layout, build_program,
+                           format_program, week_block)
+
+A, I, D = ACCUMULATION, INTENSIFICATION, DELOAD
+
+
+def _phases(weeks):
+    return [(phase[0].upper(), wave) for phase, wave in block_layout(weeks)]
+
+
+def test_block_layout():
+    assert block_layout(8) == ((A, 1), (A, 2), (A, 3), (D, 1), (I, 1), (I, 2), (I, 3), (D, 1))
+    assert _phases(12) == [("A", 1), ("A", 2), ("A", 3), ("D", 1)] * 2 + [("I", 1), ("I", 2), ("I", 3), ("D", 1)]
+    # a short last block still ends on a deload, unless it is a single week
+    assert _phases(14)[12:] == [("I", 1), ("D", 1)]
+    assert _phases(13)[12:] == [("I", 1)]
+    for weeks in range(8, 17):
+        layout = block_layout(weeks)
+        assert len(layout) == weeks
+        deloads = [week for week, (phase, _) in enumerate(layout) if phase == D]
+        assert deloads[:weeks // 4] == [3, 7, 11, 15][:weeks // 4]
+        assert (layout[-1][0] == D) == (weeks % 4 != 1)
+
+
+def _main_and_accessory(block):
+    day = block.days[0]
+    return day.items[0], day.items[2]
+
+
+def test_week_prescriptions_follow_the_phase():
+    base_main, base_accessory = _main_and_accessory(week_block("muscle-gain", "intermediate", 3, A, 1))
+    assert (base_main.sets, base_main.rep_low, base_main.rep_high) == (4, 8, 10)
+
+    main, accessory = _main_and_accessory(week_block("muscle-gain", "intermediate", 3, A, 2))
+    assert (main.sets, accessory.sets) == (base_main.sets + 1, base_accessory.sets + 1)
+    assert (main.rep_low, main.rep_high) == (8, 10)
+
+    main, _ = _main_and_accessory(week_block("muscle-gain", "intermediate", 3, I, 1))
+    assert (main.sets, main.rep_low, main.rep_high) == (4, 5, 7)
+    assert main.text.endswith("4×5–7")
+
+    main, accessory = _main_and_accessory(week_block("muscle-gain", "intermediate", 3, D, 1))
+    assert (main.sets, accessory.sets) == (2, 2)
+
+
+def test_experience_changes_main_lift_sets_only_upwards_for_advanced():
+    inter = _main_and_accessory(week_block("muscle-gain", "intermediate", 3, A, 1))
+    advanced = _main_and_accessory(week_block("muscle-gain", "advanced", 3, A, 1))
+    beginner = _main_and_accessory(week_block("muscle-gain", "beginner", 3, A, 1))
+    assert [p.sets for p in advanced] == [inter[0].sets + 1, inter[1].sets]
+    assert [p.sets for p in beginner] == [inter[0].sets - 1, inter[1].sets - 1]
+
+
+def test_days_per_week_cycles_the_template():
+    block = week_block("fat-loss", "intermediate", 5, A, 1)
+    assert [day.name.split(" – ")[0] for day in block.days] == [f"Session {i}" for i in range(1, 6)]
+    assert block.days[3].items == block.days[0].items
+    assert block.days[4].name.split(" – ", 1)[1] == block.days[1].name.split(" – ", 1)[1]
+
+
+def test_weeks_are_shared_between_weeks_and_members():
+    program = build_program("fitness", "beginner", "light", 12, 3)
+    assert len(program.weeks) == 12
+    assert program.title.startswith("12-Week ")
+    assert program.weeks[0] is program.weeks[4]
+    assert program.weeks[3] is program.weeks[7] is program.weeks[11]
+    assert program.weeks[0] is not program.weeks[8]
+    other = build_program("fitness", "beginner", "high", 16, 3)
+    assert other.weeks[1] is program.weeks[1]
+
+
+@pytest.mark.parametrize("weeks, days", [(7, 3), (17, 3), (12, 1), (12, 7)])
+def test_out_of_range_programs_are_rejected(weeks, days):
+    with pytest.raises(ValueError):
+        build_program("fitness", "beginner", "light", weeks, days)
+
+
+def test_format_program_lists_every_week():
+    text = format_program(build_program("muscle-gain", "intermediate", "moderate", 8, 2))
+    assert text.count("\nWeek ") == 8
+    assert "Week 4 – Deload: " in text
+    assert "Week 5 – Intensification: " in text
+    assert "    • Bench Press / Machine Press – 4×5–7" in text
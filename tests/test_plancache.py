@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import gym_plancache
+from conftest import roster_row
+from gym_plancache import member_values, open_cache
+from gym_validate import normalise_member
+
+MEMBER = (30, "Female", 165.0, 60.0, "fat-loss", "moderate", "veg")
+
+
+def test_meal_plans_come_back_from_disk_as_json(tmp_path):
+    pytest.importorskip("numpy")  # gym_nutrition solves with it
+    from gym_nutrition import plan_meals
+
+    cache = open_cache(str(tmp_path / "plans.db"))
+    solved = []
+
+    def solve(todo):
+        solved.extend(todo)
+        return [plan_meals(*values) for values in todo]
+
+    (plan,) = cache.get_many("meals", [MEMBER], solve)
+    cache.clear_memory()
+    (restored,) = cache.get_many("meals", [MEMBER], solve)
+
+    assert solved == [MEMBER]
+    (body,) = (row[0] for row in cache.disk.conn.execute("SELECT body FROM plan_cache"))
+    assert json.loads(body)[0] == "veg"
+    assert restored.targets.calories == plan.targets.calories
+    assert [(m.name, m.items, m.calories, m.protein, m.carbs, m.fat) for m in restored.meals] == \
+        [(m.name, m.items, m.calories, m.protein, m.carbs, m.fat) for m in plan.meals]
+    cache.close()
+
+
+def test_rule_reload_keeps_the_shared_file(tmp_path, monkeypatch, rules_data, restore_rules):
+    # another process may still serve the old rules from the same file
+    from gym_planner import current_rules, use_rules
+    from gym_rules import compile_rules
+
+    cache = open_cache(str(tmp_path / "plans.db"))
+    monkeypatch.setattr(gym_plancache, "_default", cache)
+    values = member_values(normalise_member(roster_row(1)))
+    old = current_rules()
+    cache.sections(values)
+
+    rules_data["tips"].append("Stretch after every session.")
+    use_rules(compile_rules(rules_data))
+    assert "Stretch after every session." in "".join(cache.sections(values))
+    use_rules(old)
+    disk_hits = cache.stats()["disk_hits"]
+    cache.sections(values)
+
+    assert cache.stats()["disk_hits"] == disk_hits + 1
+    assert cache.disk.conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0] == 2
+    cache.close()
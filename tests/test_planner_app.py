@@ -0,0 +1,30 @@
+from concurrent.futures import Future
+
+import gym_planner_app
+from gym_planner_app import GymPlannerApp
+
+
+class _Messages:
+    def __init__(self):
+        self.errors = []
+
+    def showerror(self, title, message):
+        self.errors.append((title, message))
+
+
+def test_a_failed_render_is_reported_and_the_old_plan_kept(monkeypatch):
+    # no window: only the attributes _poll_plan touches
+    messages = _Messages()
+    monkeypatch.setattr(gym_planner_app, "messagebox", messages)
+    app = GymPlannerApp.__new__(GymPlannerApp)
+    shown = []
+    app.show_sections = shown.append
+    future = Future()
+    future.set_exception(KeyError("unknown locale 'xx'"))
+    app._pending, app._polling = (future, None, "xx"), True
+
+    app._poll_plan()
+
+    assert messages.errors == [("Error", "Could not build the plan: \"unknown locale 'xx'\"")]
+    assert shown == []
+    assert (app._pending, app._polling) == (None, False)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pytest
+
+from gym_progress import ProgressLog
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ProgressLog(str(tmp_path / "progress"))
+
+
+def _weights(log, member_id):
+    return log.weighins(member_id)["weight"].tolist()
+
+
+@pytest.mark.parametrize("stray", [np.array([0], "<u4").tobytes(), b"\x01\x02"])
+def test_append_after_a_torn_append_stays_aligned(log, stray):
+    log.log_weighin("m1", "2026-01-01", 70)
+    log.log_weighin("m2", "2026-01-01", 80)
+    # an append interrupted after writing part of one column
+    with open(log.weighins_table._path("member"), "ab") as fh:
+        fh.write(stray)
+    assert len(log.weighins_table) == 2
+
+    log.log_weighin("m2", "2026-01-05", 69)
+    log.log_weighin("m1", "2026-01-06", 71)
+
+    assert _weights(log, "m1") == [70, 71]
+    assert _weights(log, "m2") == [80, 69]
+    log.compact()
+    assert _weights(log, "m1") == [70, 71]
+    assert _weights(log, "m2") == [80, 69]
+
+
+def test_mismatched_columns_write_nothing(log):
+    log.log_weighin("m1", "2026-01-01", 70)
+    with pytest.raises(ValueError):
+        log.weighins_table.append(member=[0, 0], day=[1, 2], weight=[1.0], waist=[np.nan, np.nan])
+    log.log_weighin("m1", "2026-01-02", 71)
+    assert _weights(log, "m1") == [70, 71]
+
+
+def test_query_merges_base_and_tail_in_day_order(log):
+    log.log_weighins(["m1", "m1"], ["2026-01-03", "2026-01-01"], [72, 70])
+    log.compact()
+    log.log_weighin("m1", "2026-01-02", 71)
+    rows = log.weighins("m1", start="2026-01-02")
+    assert rows["weight"].tolist() == [71, 72]
+
+
+class _Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("survives", range(8))
+def test_compact_interrupted_at_any_step_keeps_every_row_once(log, monkeypatch, survives):
+    log.log_weighins(["m1", "m2", "m1"], ["2026-01-03", "2026-01-01", "2026-01-01"], [72, 80, 70])
+    log.compact()
+    log.log_weighin("m1", "2026-01-02", 71)
+
+    # the process dies after `survives` renames / deletes / truncations
+    calls = []
+
+    def step(fn):
+        def wrapper(*args, **kwargs):
+            if len(calls) == survives:
+                raise _Crash
+            calls.append(args)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    with monkeypatch.context() as m:
+        for name in ("replace", "remove", "truncate"):
+            m.setattr(os, name, step(getattr(os, name)))
+        try:
+            log.compact()
+        except _Crash:
+            pass
+    assert _weights(log, "m1") == [70, 71, 72]
+    assert len(log.weighins_table) == 4
+
+    log.log_weighin("m1", "2026-01-04", 73)
+    log.compact()
+    assert _weights(log, "m1") == [70, 71, 72, 73]
+    assert _weights(log, "m2") == [80]
+    assert len(log.weighins_table) == 5
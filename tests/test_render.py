@@ -0,0 +1,25 @@
+import json
+import os
+
+import pytest
+
+from gym_model import MemberProfile
+from gym_planner_app import build_plan_sections
+from gym_render import format_plan
+from gym_validate import normalise_member
+
+# Forms rendered by the original single-file app's on_generate; English text
+# output must stay byte-for-byte the same.
+BASELINE = os.path.join(os.path.dirname(__file__), "data", "english_baseline.json")
+
+with open(BASELINE, encoding="utf-8") as fh:
+    CASES = json.load(fh)
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda c: f"{c['form']['goal']}-{c['form']['activity']}")
+def test_english_text_matches_baseline(case):
+    inputs = MemberProfile.from_mapping(normalise_member(case["form"]))
+
+    assert "".join(build_plan_sections(inputs)) == case["text"]
+    assert format_plan(*(inputs[f] for f in MemberProfile.__slots__[:8]),
+                       name=inputs.name, notes=inputs.notes) == case["text"]
@@ -0,0 +1,56 @@
+import copy
+import json
+
+import pytest
+
+from gym_planner import current_rules, get_diet_plan, use_rules
+from gym_rules import RuleError, RuleWatcher, compile_rules
+
+
+def test_default_rules_compile(rules_data):
+    index = compile_rules(rules_data)
+    assert index.version == current_rules().version
+
+
+@pytest.mark.parametrize("key, value, message", [
+    ("diet_summary", "Aim for {protien}g of protein", "unknown field 'protien'"),
+    ("diet_summary", "Aim for {}g of protein", "positional"),
+    ("diet_summary", "Aim for {protein g", "not a valid template"),
+    ("restriction_note", " Adjusted for {joint}.", "unknown field 'joint'"),
+    ("tips", [], "'tips' must not be empty"),
+    ("tips", "Sleep well", "'tips' must be a list"),
+    ("version", 99, "unsupported rules version"),
+])
+def test_bad_rule_files_raise_rule_error(rules_data, key, value, message):
+    rules_data[key] = value
+    with pytest.raises(RuleError, match=message):
+        compile_rules(rules_data)
+
+
+def test_empty_workout_days_raise_rule_error(rules_data):
+    goal = next(iter(rules_data["workouts"]))
+    rules_data["workouts"][goal]["days"] = []
+    with pytest.raises(RuleError, match="'days' must not be empty"):
+        compile_rules(rules_data)
+
+
+def test_unknown_fallback_raises_rule_error(rules_data):
+    rules_data["fallback"]["workout"] = "nope"
+    with pytest.raises(RuleError, match="unknown workout 'nope'"):
+        compile_rules(rules_data)
+
+
+def test_watcher_reports_a_broken_edit_and_keeps_the_old_rules(tmp_path, rules_data, restore_rules):
+    path = tmp_path / "plans.json"
+    path.write_text(json.dumps(rules_data), encoding="utf-8")
+    watcher = RuleWatcher(str(path), mtime=0)
+    use_rules(watcher.poll())
+    before = get_diet_plan("fat-loss", "veg", 60)
+
+    broken = copy.deepcopy(rules_data)
+    broken["diet_summary"] = "Aim for {protien}g"
+    path.write_text(json.dumps(broken), encoding="utf-8")
+    watcher.mtime = 0
+    with pytest.raises(RuleError):
+        watcher.poll()
+    assert get_diet_plan("fat-loss", "veg", 60) == before
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from conftest import roster_row
+from gym_schedule import (DAY_TICKS, STATIONS, WeekScheduler, _Session, parse_availability,
+                          schedule_roster)
+
+HOURS = "daily 06:00-22:00"
+AVAILABILITY = ["", "Mon,Wed,Fri 18:00-21:00", "weekends 08:00-12:00; Wed 06:00-09:00",
+                "Tue-Thu 17:00-20:30", "Mon 18:00-21:00", "Tue 06:00-06:30"]
+GOALS = ["fat-loss", "muscle-gain", "fitness"]
+TIGHT = {station: 1 for station in STATIONS}
+
+
+def _roster(n=36):
+    return [roster_row(i, goal=GOALS[i % 3], experience=("beginner", "advanced")[i % 2],
+                       availability=AVAILABILITY[i % len(AVAILABILITY)]) for i in range(n)]
+
+
+def _schedule(inventory=TIGHT):
+    scheduler, errors = schedule_roster(_roster(), inventory, HOURS, time_limit=None)
+    assert errors == []
+    return scheduler
+
+
+def test_sessions_fall_on_distinct_days_in_plan_order_inside_availability():
+    scheduler = _schedule()
+    hours = parse_availability(HOURS)
+    for member_id, sessions in scheduler.members:
+        allowed = hours & parse_availability(AVAILABILITY[int(member_id) % len(AVAILABILITY)] or HOURS)
+        days = [s.start // DAY_TICKS for s in sessions]
+        assert days == sorted(set(days))   # one session a day, in plan order
+        assert [s.index for s in sessions] == list(range(len(sessions)))
+        for s in sessions:
+            assert allowed[s.start:s.start + s.shape.ticks].all()
+            assert s.start // DAY_TICKS == (s.start + s.shape.ticks - 1) // DAY_TICKS
+
+
+def test_members_who_cannot_fit_every_session_are_reported():
+    scheduler = _schedule()
+    unscheduled = {}
+    for member_id, day, reason in scheduler.unscheduled:
+        unscheduled.setdefault(member_id, []).append((day[:5], reason))
+    placed = {member_id: len(sessions) for member_id, sessions in scheduler.members}
+    # Monday only: the first session fits, the later ones need later days
+    assert unscheduled["4"] == [("Day 2", "not enough available days"), ("Day 3", "not enough available days")]
+    assert placed["4"] == 1
+    # half an hour on Tuesday: only the cardio day is that short, but the
+    # strength day before it does not fit, and sessions drop from the end
+    assert unscheduled["5"] == [("Day 1", "no available time long enough"), ("Day 2", "not enough available days"),
+                                ("Day 3", "no available time long enough")]
+    assert placed["5"] == 0
+    assert all(placed[m] == 3 for m in placed if m not in unscheduled)
+
+
+def test_station_load_matches_the_placed_sessions():
+    scheduler = _schedule()
+    load = np.zeros_like(scheduler.load)
+    for _, sessions in scheduler.members:
+        for s in sessions:
+            offsets = s.shape.row_offsets[s.order]
+            for row in s.rows:
+                a = s.start + offsets[row]
+                load[s.shape.row_station[row], a:a + s.shape.row_ticks[row]] += 1
+            # one station per item that needs one
+            assert len(s.rows) == len(set(s.shape.row_item.tolist()))
+    np.testing.assert_array_equal(scheduler.load, load)
+
+
+def test_optimised_week_waits_less_than_earliest_slots():
+    scheduler = _schedule()
+    naive = WeekScheduler(TIGHT, HOURS)
+    naive.members = [(member_id, [_Session(s.member, s.index, s.shape, s.starts) for s in sessions])
+                     for member_id, sessions in scheduler.members]
+    naive.place_naive()
+    assert scheduler.waiting_minutes() < naive.waiting_minutes()
+
+
+def test_parse_availability():
+    mask = parse_availability("Fri-Mon 18:00-19:07; weekdays 06:00-06:15")
+    days = sorted({t // DAY_TICKS for t in np.flatnonzero(mask)})
+    assert days == [0, 1, 2, 3, 4, 5, 6]
+    assert mask[4 * DAY_TICKS + 18 * 12:4 * DAY_TICKS + 19 * 12 + 1].all()
+    assert not mask[4 * DAY_TICKS + 19 * 12 + 1]           # 19:07 rounds down to 19:05
+    assert mask.sum() == 4 * 13 + 5 * 3
+    assert not mask.flags.writeable
+
+
+@pytest.mark.parametrize("text", ["Mon", "Funday 10:00-11:00", "Mon 21:00-20:00", "Mon 10:00-25:00"])
+def test_bad_availability_is_an_error(text):
+    with pytest.raises(ValueError):
+        parse_availability(text)
+
+
+def test_bad_availability_in_a_roster_is_reported_per_member():
+    rows = _roster(3)
+    rows[1]["availability"] = "Someday 10:00-12:00"
+    scheduler, errors = schedule_roster(rows, hours=HOURS, time_limit=None)
+    assert [member_id for member_id, _ in errors] == ["1"]
+    assert [member_id for member_id, _ in scheduler.members] == ["0", "2"]
+
+
+def test_unknown_equipment_is_rejected():
+    with pytest.raises(ValueError, match="unknown equipment"):
+        WeekScheduler({"hoverboard": 2})
@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import gym_service
+from gym_plancache import open_cache
+from gym_service import PlanService, _open_sync_server
+from gym_sync import decode, encode
+
+PLAN = "/plan?age=30&gender=Female&height=165&weight=60&goal=fat-loss&activity=moderate" \
+       "&experience=beginner&diet_pref=veg"
+
+
+async def _exchange(service, raw):
+    # one raw HTTP/1.1 request against a real listener -> (status line, body)
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0].decode(), body
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3", "²"])
+def test_bad_content_length_is_a_400(length):
+    raw = f"POST /plan HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1")
+
+    status, body = asyncio.run(_exchange(PlanService(), raw))
+
+    assert status == "HTTP/1.1 400 Bad Request"
+    assert b"Content-Length" in body
+
+
+def test_unexpected_error_is_a_500(monkeypatch, capsys):
+    def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(gym_service, "build_plan_response", broken)
+    raw = f"GET {PLAN} HTTP/1.1\r\nConnection: close\r\n\r\n".encode()
+
+    status, body = asyncio.run(_exchange(PlanService(), raw))
+
+    assert status == "HTTP/1.1 500 Internal Server Error"
+    assert body == b'{"error": "internal server error"}'
+    assert "RuntimeError: boom" in capsys.readouterr().err
+
+
+def test_disk_cache_reads_match_direct_rendering(tmp_path):
+    plans = open_cache(str(tmp_path / "plans.db"), memory_entries=0)
+
+    async def both():
+        direct = await PlanService().handle("GET", PLAN, {})
+        cached = await PlanService(plans=plans).handle("GET", PLAN, {})
+        again = await PlanService(plans=plans).handle("GET", PLAN, {})
+        return direct, cached, again
+
+    direct, cached, again = asyncio.run(both())
+
+    assert direct[0] == cached[0] == again[0] == 200
+    assert direct[1] == cached[1] == again[1]
+    assert plans.stats()["disk_hits"] == 1
+    plans.close()
+
+
+def test_sync_runs_on_the_thread_that_opened_the_store(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=1)
+    sync = executor.submit(_open_sync_server, str(tmp_path / "members.db")).result()
+    service = PlanService(sync=sync, sync_executor=executor)
+
+    status, reply, _ = asyncio.run(service.handle("POST", "/sync", {}, encode({"protocol": 1, "since": 0})))
+
+    assert status == 200
+    assert decode(reply)["changes"] == []
+    executor.shutdown()
+
+
+def test_if_none_match_compares_whole_tags():
+    service = PlanService()
+
+    async def conditional(tags):
+        status, _, _ = await service.handle("GET", PLAN, {"if-none-match": tags})
+        return status
+
+    async def run():
+        _, _, headers = await service.handle("GET", PLAN, {})
+        etag = headers["ETag"]
+        return [await conditional(tags) for tags in (
+            etag, f'"other", W/{etag}', " * ", f'"x{etag[1:]}', etag[1:-1], f'"{etag}"', '"other"', "")]
+
+    assert asyncio.run(run()) == [304, 304, 304, 200, 200, 200, 200, 200]
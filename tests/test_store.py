@@ -0,0 +1,67 @@
+from conftest import roster_row
+from gym_batch import generate_plan
+from gym_store import regenerate
+
+
+def _import(store, rows):
+    changed, rejected = store.import_rows(rows)
+    assert rejected == []
+    return changed
+
+
+def test_regenerate_with_worker_pool(store):
+    # the pool's feeder thread must not touch the sqlite connection
+    _import(store, [roster_row(i, age=str(20 + i)) for i in range(1, 7)])
+
+    out = list(regenerate(store, workers=2, chunksize=2))
+
+    assert sorted(mid for mid, _, _ in out) == [str(i) for i in range(1, 7)]
+    assert all(error is None for _, _, error in out)
+    for member_id, text, _ in out:
+        assert store.get_plan(member_id) == text
+
+
+def test_incremental_regeneration_only_rebuilds_changed_members(store):
+    _import(store, [roster_row(i) for i in range(1, 4)])
+    assert len(list(regenerate(store, workers=1))) == 3
+    assert list(regenerate(store, workers=1)) == []
+
+    assert _import(store, [roster_row(2, weight="72")]) == 1
+    (member_id, text, error), = regenerate(store, workers=1)
+    assert (member_id, error) == ("2", None)
+    assert "72" in text
+    assert store.get_plan("2") == text
+
+
+def test_unchanged_upsert_keeps_stored_plan(store):
+    _import(store, [roster_row(1)])
+    list(regenerate(store, workers=1))
+    assert _import(store, [roster_row(1)]) == 0
+    assert store.get_plan("1") == generate_plan((1, store.get("1")))[1]
+
+
+def test_rule_edit_makes_stored_plans_stale(store, rules_data, restore_rules):
+    from gym_planner import use_rules
+    from gym_rules import compile_rules
+
+    _import(store, [roster_row(1)])
+    list(regenerate(store, workers=1))
+
+    rules_data["tips"].append("Stretch after every session.")
+    use_rules(compile_rules(rules_data))
+    assert store.get_plan("1") is None
+    (member_id, text, error), = regenerate(store, workers=1)
+    assert "Stretch after every session." in text
+    assert store.get_plan("1") == text
+
+
+def test_write_profile_keeps_the_given_time_and_leaves_the_commit_to_the_caller(store):
+    from gym_store import ProfileStore
+
+    profile = roster_row(1)
+    with store.conn:
+        assert store.write_profile("1", profile, 1000.5)
+        assert not store.write_profile("1", profile, 2000.0)   # unchanged inputs
+        with ProfileStore(store.path) as other:
+            assert other.get("1") is None
+    assert store.get("1")["updated_at"] == 1000.5
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from conftest import roster_row
+from gym_store import ProfileStore
+from gym_sync import LocalTransport, SyncServer, sync
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    stores = {name: ProfileStore(str(tmp_path / f"{name}.db")) for name in ("server", "a", "b")}
+    transport = LocalTransport(SyncServer(stores["server"]))
+    yield stores, transport
+    for store in stores.values():
+        store.close()
+
+
+def _weights(stores, member_id):
+    return {name: (store.get(member_id) or {}).get("weight") for name, store in stores.items()}
+
+
+def _sync_all(stores, transport, rounds=2):
+    for _ in range(rounds):
+        sync(stores["a"], transport)
+        sync(stores["b"], transport)
+
+
+def test_offline_edits_converge(nodes):
+    stores, transport = nodes
+    stores["a"].import_rows([roster_row("m1"), roster_row("m2")])
+    stores["b"].import_rows([roster_row("m3", weight="90")])
+    _sync_all(stores, transport)
+    for store in stores.values():
+        assert len(store) == 3
+
+    stores["a"].import_rows([roster_row("m1", weight="61")])
+    time.sleep(0.01)
+    stores["b"].import_rows([roster_row("m1", weight="62")])
+    stores["b"].delete("m2")
+    _sync_all(stores, transport)
+
+    assert _weights(stores, "m1") == {"server": 62.0, "a": 62.0, "b": 62.0}
+    assert _weights(stores, "m2") == {"server": None, "a": None, "b": None}
+
+
+def test_edit_after_a_delete_wins(nodes):
+    stores, transport = nodes
+    stores["a"].import_rows([roster_row("m1")])
+    _sync_all(stores, transport)
+
+    stores["a"].delete("m1")
+    time.sleep(0.01)
+    stores["b"].import_rows([roster_row("m1", weight="75")])
+    sync(stores["a"], transport)  # the delete reaches the server first
+    _sync_all(stores, transport)
+
+    assert _weights(stores, "m1") == {"server": 75.0, "a": 75.0, "b": 75.0}
+
+
+def test_delete_after_an_edit_wins(nodes):
+    stores, transport = nodes
+    stores["a"].import_rows([roster_row("m1")])
+    _sync_all(stores, transport)
+
+    stores["b"].import_rows([roster_row("m1", weight="75")])
+    time.sleep(0.01)
+    stores["a"].delete("m1")
+    _sync_all(stores, transport)
+
+    assert _weights(stores, "m1") == {"server": None, "a": None, "b": None}
+
@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import roster_row
+from gym_validate import ValidationError, normalise_member, validate_columns, validate_rows
+
+
+def test_normalise_member_maps_headers_units_and_spellings():
+    member = normalise_member({
+        "Age": "30", "sex": "f", "Height (in)": "70", "Weight": "176 lbs", "Fitness Goal": "Fat Loss",
+        "activity level": "very active", "level": "novice", "Diet Preference": "Vegetarian",
+        "full name": "  Asha ", "injuries": " knee ",
+    })
+
+    assert member == {"age": 30, "gender": "Female", "height": 177.8, "weight": 79.8, "goal": "fat-loss",
+                      "activity": "high", "experience": "beginner", "diet_pref": "veg",
+                      "name": "Asha", "notes": "knee"}
+
+
+def test_imperial_units_apply_to_bare_numbers():
+    member = normalise_member(roster_row(1, height="70", weight="132"), units="imperial")
+
+    assert (member["height"], member["weight"]) == (177.8, 59.9)
+    assert normalise_member(roster_row(1, height="5'11\""))["height"] == 180.3
+
+
+def test_normalise_member_reports_every_bad_field():
+    with pytest.raises(ValidationError) as exc:
+        normalise_member(roster_row(1, age="abc", height="999", goal="x"))
+
+    assert [issue.field for issue in exc.value.issues] == ["age", "height", "goal"]
+    assert "outside 100–250 cm" in exc.value.issues[1].message
+
+
+def test_validate_rows_rejects_only_the_bad_rows():
+    out = list(validate_rows([roster_row(1), roster_row(2, weight="heavy"), roster_row(3, gender="")]))
+
+    assert [member_id for member_id, _, _ in out] == ["1", "2", "3"]
+    assert out[0][1]["weight"] == 60.0 and out[0][2] == []
+    assert out[1][1] is None and [(i.row, i.field) for i in out[1][2]] == [(2, "weight")]
+    assert out[2][1] is None and out[2][2][0].message == "missing required field 'gender'"
+
+
+@pytest.mark.parametrize("raw", [{"kg": 60}, [60], {"kg": [60]}])
+def test_unhashable_values_are_issues_not_crashes(raw):
+    rows = [roster_row(1), roster_row(2, weight=raw), roster_row(3, weight=raw)]
+
+    out = list(validate_rows(rows))
+
+    assert out[0][1] is not None
+    for row, (_, member, issues) in zip((2, 3), out[1:]):
+        assert member is None
+        assert [(i.row, i.field, i.value) for i in issues] == [(row, "weight", raw)]
+    with pytest.raises(ValidationError):
+        normalise_member(roster_row(2, weight=raw))
+
+
+def test_store_import_rejects_unhashable_values(store):
+    changed, rejected = store.import_rows([roster_row(1), roster_row(2, goal=["cut"])])
+
+    assert changed == 1
+    assert rejected == [("2", "goal: unknown value ['cut'] (expected fat-loss, muscle-gain, fitness)")]
+
+
+def test_validate_columns_checks_the_shape():
+    with pytest.raises(ValidationError, match="missing required column 'gender'"):
+        validate_columns({"age": ["30"]})
+    columns = {field: [roster_row(1)[field]] for field in roster_row(1)}
+    columns["weight"] = ["60", "61"]
+    with pytest.raises(ValidationError, match="column 'weight' has 2 values, expected 1"):
+        validate_columns(columns)